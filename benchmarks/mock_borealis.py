@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""Local stand-in for the Borealis API endpoints used by borealis_server.py.
+
+A small asyncio HTTP/1.1 server (standard library only) that serves
+deterministic fake data for:
+
+- /api/search
+- /api/datasets/:persistentId/metadata and /api/datasets/{id}/metadata
+- /api/datasets/:persistentId/versions/:latest/files (and /{id}/...)
+- /api/access/datafile/{id} (optionally redirecting to /storage/{id}), with
+  Range requests (206/416) and column subsets (?variables=2,4)
+- /api/access/datafile/{id}/metadata/ddi (a DDI codebook of the file's columns)
+
+It can inject latency, signed-URL redirects (optionally several hops within
+storage), 401s for requests carrying an API key, random 503s, large
+payloads, wide files and storage that ignores Range, and it counts requests
+per endpoint and status so benchmarks can
+report upstream traffic (GET /__mock__/stats returns the counters, GET
+/__mock__/reset clears them). Storage requests that carry X-Dataverse-key
+are counted separately: the key must never reach a storage host.
+
+Run it standalone to point a real server at it:
+
+    python3 benchmarks/mock_borealis.py --port 8765 --latency-ms 50
+    # then run the server with BOREALIS_BASE_URL=http://127.0.0.1:8765/api
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+
+@dataclass
+class MockConfig:
+    """Behaviour knobs for the mock API."""
+    latency_ms: float = 0.0          # added to every response
+    jitter_ms: float = 0.0           # uniform random extra latency
+    search_total: int = 1000         # total hits reported by /search
+    files_per_dataset: int = 50      # files in every dataset
+    file_bytes: int = 1024 * 1024    # size of every data file
+    file_line_bytes: int = 80        # approximate length of each file line
+    metadata_padding: int = 2000     # extra description characters per metadata record
+    redirect_files: bool = False     # 303 datafile requests to a signed /storage URL
+    redirect_hops: int = 1           # storage URLs redirected to before the file is served
+    reject_key: bool = False         # answer 401 to any request carrying X-Dataverse-key
+    send_content_length: bool = True # False streams files chunked, without a size
+    ranges: bool = True              # honor Range headers on file downloads
+    columns: int = 3                 # columns in every data file (and DDI variables)
+    error_rate: float = 0.0          # fraction of API requests answered with 503
+
+
+class MockBorealis:
+    """Asyncio HTTP server that imitates the Borealis endpoints."""
+
+    def __init__(self, config: MockConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or MockConfig()
+        self.host = host
+        self.port = port
+        self.requests = Counter()     # (endpoint, status) -> count
+        self.connections = 0
+        self.bytes_sent = 0
+        self.storage_key_requests = 0
+        self._server = None
+        self._file_rows = 0
+        self._file_body = self._build_file_body()
+        self._subset_bodies = {}      # variables parameter -> body with only those columns
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/api"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def reset_counters(self) -> None:
+        self.requests.clear()
+        self.connections = 0
+        self.bytes_sent = 0
+        self.storage_key_requests = 0
+
+    def request_count(self) -> int:
+        return sum(self.requests.values())
+
+    def stats(self) -> dict:
+        return {
+            "requests": {f"{endpoint} {status}": count for (endpoint, status), count in sorted(self.requests.items())},
+            "total_requests": self.request_count(),
+            "connections": self.connections,
+            "bytes_sent": self.bytes_sent,
+            "storage_requests_with_key": self.storage_key_requests,
+        }
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, _ = lines[0].split(" ", 2)
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    await self._dispatch(method, target, headers, writer)
+                except ConnectionError:
+                    # Client stopped reading (e.g. a streamed download closed early)
+                    return
+                if not keep_alive:
+                    return
+        finally:
+            writer.close()
+
+    async def _delay(self) -> None:
+        delay = self.config.latency_ms + random.uniform(0, self.config.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+    async def _dispatch(self, method: str, target: str, headers: dict, writer: asyncio.StreamWriter) -> None:
+        url = urlsplit(target)
+        path = url.path
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        await self._delay()
+
+        # Control endpoints for benchmark harnesses (not counted)
+        if path == "/__mock__/stats":
+            body = json.dumps(self.stats()).encode()
+            writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+            await writer.drain()
+            return
+        if path == "/__mock__/reset":
+            self.reset_counters()
+            writer.write(b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n")
+            await writer.drain()
+            return
+
+        if self.config.error_rate and path.startswith("/api/") and random.random() < self.config.error_rate:
+            await self._send_json(writer, self._endpoint_name(path), 503,
+                                  {"status": "ERROR", "message": "Service temporarily unavailable"})
+            return
+
+        if self.config.reject_key and "x-dataverse-key" in headers:
+            endpoint = self._endpoint_name(path)
+            await self._send_json(writer, endpoint, 401, {"status": "ERROR", "message": "Bad api key"})
+            return
+
+        if path == "/api/search":
+            await self._send_json(writer, "search", 200, self._search(params))
+        elif path.startswith("/api/access/datafile/") and path.endswith("/metadata/ddi"):
+            await self._send(writer, "ddi", 200, self._ddi(path.split("/")[4]).encode(), {"Content-Type": "text/xml"})
+        elif path.startswith("/api/datasets/") and path.endswith("/metadata"):
+            identifier = params.get("persistentId") or path.split("/")[3]
+            await self._send_json(writer, "metadata", 200, self._metadata(identifier))
+        elif path.startswith("/api/datasets/") and path.endswith("/files"):
+            await self._send_json(writer, "files", 200, self._files(params))
+        elif path.startswith("/api/access/datafile/"):
+            file_id = path.rsplit("/", 1)[-1]
+            if self.config.redirect_files:
+                await self._send(writer, "datafile", 303, b"",
+                                 {"Location": self._storage_url(file_id, 1, params.get("variables"))})
+            else:
+                await self._send_file(writer, "datafile", method, headers.get("range"), params.get("variables"))
+        elif path.startswith("/storage/"):
+            if "x-dataverse-key" in headers:
+                self.storage_key_requests += 1
+            hop = int(params.get("hop", 1))
+            if hop < self.config.redirect_hops:
+                await self._send(writer, "storage", 303, b"",
+                                 {"Location": self._storage_url(path.rsplit("/", 1)[-1], hop + 1, params.get("variables"))})
+            else:
+                await self._send_file(writer, "storage", method, headers.get("range"), params.get("variables"))
+        else:
+            await self._send_json(writer, "other", 404, {"status": "ERROR", "message": "Not found"})
+
+    def _storage_url(self, file_id: str, hop: int, variables: str = None) -> str:
+        # "localhost" makes storage a different host from the 127.0.0.1 API
+        issued = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        subset = f"&variables={variables}" if variables else ""
+        return (f"http://localhost:{self.port}/storage/{file_id}?hop={hop}{subset}"
+                f"&X-Amz-Date={issued}&X-Amz-Expires=3600&X-Amz-Signature=mock")
+
+    @staticmethod
+    def _endpoint_name(path: str) -> str:
+        if path == "/api/search":
+            return "search"
+        if path.endswith("/metadata/ddi"):
+            return "ddi"
+        if path.endswith("/metadata"):
+            return "metadata"
+        if path.endswith("/files"):
+            return "files"
+        if path.startswith("/api/access/datafile/"):
+            return "datafile"
+        return "other"
+
+    def _search(self, params: dict) -> dict:
+        per_page = int(params.get("per_page", 10))
+        start = int(params.get("start", 0))
+        total = self.config.search_total
+        items = []
+        for rank in range(start, min(start + per_page, total)):
+            items.append({
+                "name": f"Mock dataset {rank} for {params.get('q', '*')}",
+                "type": "dataset",
+                "url": f"https://borealisdata.ca/dataset.xhtml?persistentId=doi:10.5683/SP3/M{rank:05d}",
+                "global_id": f"doi:10.5683/SP3/M{rank:05d}",
+                "description": "A mock dataset used for benchmarking. " * 4,
+                "published_at": "2021-06-01T00:00:00Z",
+                "authors": [f"Author {rank}", "Second Author"],
+            })
+        return {"status": "OK", "data": {"q": params.get("q"), "total_count": total, "start": start, "items": items}}
+
+    def _metadata(self, identifier: str) -> dict:
+        return {"status": "OK", "data": {
+            "@id": identifier,
+            "title": f"Mock dataset {identifier}",
+            "author": [
+                {"citation:authorName": "Author One", "citation:authorAffiliation": "Mock University"},
+                {"citation:authorName": "Author Two"},
+            ],
+            "citation:dsDescription": {"citation:dsDescriptionValue": "Mock description. " + "x" * self.config.metadata_padding},
+            "citation:keyword": [{"citation:keywordValue": "benchmark"}, {"citation:keywordValue": "mock"}],
+            "schema:datePublished": "2021-06-01",
+            "subject": "Other",
+            "schema:license": "CC0 1.0",
+            "schema:version": "1.0",
+        }}
+
+    def _files(self, params: dict) -> dict:
+        limit = int(params.get("limit", 10))
+        offset = int(params.get("offset", 0))
+        total = self.config.files_per_dataset
+        extensions = ["csv", "txt", "tab", "pdf", "R"]
+        data = []
+        for index in range(offset, min(offset + limit, total)):
+            extension = extensions[index % len(extensions)]
+            data.append({
+                "label": f"file_{index}.{extension}",
+                "restricted": False,
+                "datasetVersionId": 1,
+                "dataFile": {
+                    "id": 100000 + index,
+                    "filename": f"file_{index}.{extension}",
+                    "friendlyType": "Comma Separated Values" if extension == "csv" else "Plain Text",
+                    "filesize": self.config.file_bytes,
+                    "md5": "0" * 32,
+                },
+            })
+        return {"status": "OK", "data": data, "totalCount": total}
+
+    def _column_names(self) -> list:
+        return ["id", "value", "comment"][:self.config.columns] + [
+            f"var{index}" for index in range(4, self.config.columns + 1)
+        ]
+
+    def _ddi(self, file_id: str) -> str:
+        """Build a DDI codebook describing the columns of every data file."""
+        rows = self._file_rows
+        parts = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<codeBook xmlns="ddi:codebook:2_5" version="2.5">',
+            f'<fileDscr ID="f{file_id}"><fileTxt><dimensns><caseQnty>{rows}</caseQnty>'
+            f'<varQnty>{self.config.columns}</varQnty></dimensns></fileTxt></fileDscr>',
+            "<dataDscr>",
+        ]
+        for number, name in enumerate(self._column_names(), 1):
+            if name == "comment":
+                parts.append(f'<var ID="v{number}" name="{name}" intrvl="discrete">'
+                             f'<labl level="variable">Free-text comment</labl>'
+                             f'<sumStat type="vald">{rows}</sumStat><sumStat type="invd">0</sumStat>'
+                             f'<varFormat type="character"/></var>')
+                continue
+            if name == "id":
+                low, high, label, interval = 0, max(rows - 1, 0), "Row identifier", "contin"
+            elif name == "value":
+                low, high, label, interval = 0, 96, "Measured value", "contin"
+            else:
+                low, high, label, interval = 0, 9, f"Survey item {number}", "discrete"
+            parts.append(f'<var ID="v{number}" name="{name}" intrvl="{interval}">'
+                         f'<labl level="variable">{label}</labl>'
+                         f'<sumStat type="mean">{(low + high) / 2}</sumStat>'
+                         f'<sumStat type="min">{low}</sumStat><sumStat type="max">{high}</sumStat>'
+                         f'<sumStat type="vald">{rows}</sumStat><sumStat type="invd">0</sumStat>')
+            if interval == "discrete":
+                for value in range(low, high + 1):
+                    parts.append(f'<catgry><catValu>{value}</catValu><labl level="category">Answer {value}</labl>'
+                                 f'<catStat type="freq">{rows // (high - low + 1)}</catStat></catgry>')
+            parts.append('<varFormat type="numeric"/></var>')
+        parts.append("</dataDscr></codeBook>")
+        return "".join(parts)
+
+    async def _send_json(self, writer, endpoint: str, status: int, payload: dict) -> None:
+        await self._send(writer, endpoint, status, json.dumps(payload).encode(), {"Content-Type": "application/json"})
+
+    async def _send(self, writer, endpoint: str, status: int, body: bytes, headers: dict = None) -> None:
+        self.requests[(endpoint, status)] += 1
+        reason = {200: "OK", 206: "Partial Content", 303: "See Other", 401: "Unauthorized", 404: "Not Found",
+                  416: "Range Not Satisfiable"}.get(status, "OK")
+        head = [f"HTTP/1.1 {status} {reason}", f"Content-Length: {len(body)}"]
+        head.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        self.bytes_sent += len(body)
+        await writer.drain()
+
+    def _build_file_body(self) -> bytes:
+        """Build the CSV-like body served for every data file (once, up front)."""
+        size = self.config.file_bytes
+        filler = "x" * max(1, self.config.file_line_bytes - 16)
+        lines = [",".join(self._column_names()) + "\n"]
+        total = len(lines[0])
+        row = 0
+        while total < size:
+            values = [str(row), str(row * 3 % 97), filler][:self.config.columns]
+            values.extend(str((row + index) % 10) for index in range(4, self.config.columns + 1))
+            line = ",".join(values) + "\n"
+            lines.append(line)
+            total += len(line)
+            row += 1
+        self._file_rows = row
+        return "".join(lines).encode()[:size]
+
+    def _file_body_for(self, variables: str = None) -> bytes:
+        """Return the file body, or only the given 1-based columns of it."""
+        if not variables:
+            return self._file_body
+        body = self._subset_bodies.get(variables)
+        if body is None:
+            picks = [int(number) - 1 for number in variables.split(",") if number.strip().isdigit()]
+            lines = []
+            for line in self._file_body.decode().split("\n"):
+                fields = line.split(",")
+                lines.append(",".join(fields[pick] for pick in picks if pick < len(fields)))
+            body = self._subset_bodies[variables] = "\n".join(lines).encode()
+        return body
+
+    async def _send_file(self, writer, endpoint: str, method: str, range_header: str = None,
+                         variables: str = None) -> None:
+        """Stream the data file body (or the requested byte range of it) in chunks."""
+        body = self._file_body_for(variables)
+        status, extra = 200, []
+        if range_header and self.config.ranges and range_header.startswith("bytes="):
+            first, _, last = range_header[len("bytes="):].partition("-")
+            first = int(first or 0)
+            if first >= len(body):
+                await self._send(writer, endpoint, 416, b"", {"Content-Range": f"bytes */{len(body)}"})
+                return
+            end = min(int(last), len(body) - 1) if last else len(body) - 1
+            status = 206
+            extra.append(f"Content-Range: bytes {first}-{end}/{len(body)}")
+            body = body[first:end + 1]
+        self.requests[(endpoint, status)] += 1
+        head = [f"HTTP/1.1 {status} {'Partial Content' if status == 206 else 'OK'}", "Content-Type: text/csv", *extra]
+        if self.config.send_content_length:
+            head.append(f"Content-Length: {len(body)}")
+        else:
+            head.append("Transfer-Encoding: chunked")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        if method == "HEAD":
+            await writer.drain()
+            return
+
+        chunk_size = 64 * 1024
+        for start in range(0, len(body), chunk_size):
+            if writer.is_closing():
+                raise ConnectionResetError("client closed the connection")
+            chunk = body[start:start + chunk_size]
+            if self.config.send_content_length:
+                writer.write(chunk)
+            else:
+                writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            self.bytes_sent += len(chunk)
+            await writer.drain()
+        if not self.config.send_content_length:
+            writer.write(b"0\r\n\r\n")
+            await writer.drain()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a local mock of the Borealis API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_mock_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the MockConfig options to an argument parser."""
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latency added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="random extra latency per response")
+    parser.add_argument("--search-total", type=int, default=1000, help="total hits reported by /search")
+    parser.add_argument("--files-per-dataset", type=int, default=50, help="files in every dataset")
+    parser.add_argument("--file-bytes", type=int, default=1024 * 1024, help="size of every data file")
+    parser.add_argument("--redirect-files", action="store_true", help="redirect file downloads to signed storage URLs")
+    parser.add_argument("--redirect-hops", type=int, default=1,
+                        help="storage URLs in the redirect chain before the file is served")
+    parser.add_argument("--reject-key", action="store_true", help="answer 401 to requests carrying an API key")
+    parser.add_argument("--no-content-length", action="store_true", help="stream files without a Content-Length")
+    parser.add_argument("--no-ranges", action="store_true", help="ignore Range headers and always send the whole file")
+    parser.add_argument("--columns", type=int, default=3, help="columns in every data file (at least 1)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of API requests answered with 503")
+
+
+def mock_arguments_from(args: argparse.Namespace) -> list:
+    """Turn parsed MockConfig options back into command-line arguments."""
+    argv = [
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--search-total", str(args.search_total),
+        "--files-per-dataset", str(args.files_per_dataset),
+        "--file-bytes", str(args.file_bytes),
+        "--error-rate", str(args.error_rate),
+        "--redirect-hops", str(args.redirect_hops),
+        "--columns", str(args.columns),
+    ]
+    if args.redirect_files:
+        argv.append("--redirect-files")
+    if args.reject_key:
+        argv.append("--reject-key")
+    if args.no_content_length:
+        argv.append("--no-content-length")
+    if args.no_ranges:
+        argv.append("--no-ranges")
+    return argv
+
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        search_total=args.search_total,
+        files_per_dataset=args.files_per_dataset,
+        file_bytes=args.file_bytes,
+        redirect_files=args.redirect_files,
+        redirect_hops=args.redirect_hops,
+        reject_key=args.reject_key,
+        send_content_length=not args.no_content_length,
+        ranges=not args.no_ranges,
+        columns=max(1, args.columns),
+        error_rate=args.error_rate,
+    )
+
+
+async def serve(args: argparse.Namespace) -> None:
+    mock = MockBorealis(config_from_args(args), args.host, args.port)
+    await mock.start()
+    # Benchmark harnesses read this line to find the port
+    print(f"Mock Borealis API listening on {mock.base_url}", flush=True)
+    started = time.monotonic()
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        print(f"Served {mock.request_count()} requests in {time.monotonic() - started:.0f}s")
+        await mock.stop()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
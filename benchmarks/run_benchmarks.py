@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""Offline benchmarks for borealis_server.py against the local mock API.
+
+Starts benchmarks/mock_borealis.py in a separate process on an ephemeral
+port (so its work doesn't skew timings or memory), points the server
+module at it and reports, per tool:
+
+- latency percentiles (p50/p95/p99) over sequential calls
+- upstream requests per call and response size
+- peak Python memory (tracemalloc) during the run
+
+plus throughput for concurrent search -> metadata -> files -> file chains.
+
+Examples:
+
+    python3 benchmarks/run_benchmarks.py
+    python3 benchmarks/run_benchmarks.py --latency-ms 40 --iterations 100 --concurrency 16
+    python3 benchmarks/run_benchmarks.py --redirect-files --reject-key --json results.json
+    python3 benchmarks/run_benchmarks.py --redirect-files --redirect-hops 3 --api-key
+    python3 benchmarks/run_benchmarks.py --error-rate 0.05 --rate-limit 50
+    python3 benchmarks/run_benchmarks.py --per-page 100 --file-limit 500 --format compact
+    python3 benchmarks/run_benchmarks.py --tools get_dataset_file --start-line 9000 --warm
+    python3 benchmarks/run_benchmarks.py --tools get_dataset_file describe_file_variables \\
+        --columns 40 --select-columns id var7
+
+By default every call starts with empty in-memory caches (cold); pass
+--warm to keep caches between calls. The server's client-side rate limit
+is off unless --rate-limit is given, since the mock isn't Borealis.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import httpx
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+import borealis_server  # noqa: E402
+from mock_borealis import add_mock_arguments, mock_arguments_from  # noqa: E402
+
+FAKE_API_KEY = "00000000-0000-0000-0000-000000000000"
+
+
+class MockProcess:
+    """Run mock_borealis.py in a child process and read its counters."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(BENCHMARK_DIR, "mock_borealis.py"), "--port", "0",
+             *mock_arguments_from(args)],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        line = self.process.stdout.readline()
+        if "listening on" not in line:
+            self.process.kill()
+            raise RuntimeError(f"mock API failed to start: {line!r}")
+        self.base_url = line.rsplit(" ", 1)[-1].strip()
+        self._control = self.base_url.rsplit("/api", 1)[0] + "/__mock__"
+
+    def reset_counters(self) -> None:
+        httpx.get(f"{self._control}/reset")
+
+    def stats(self) -> dict:
+        return httpx.get(f"{self._control}/stats").json()
+
+    def stop(self) -> None:
+        self.process.terminate()
+        self.process.wait(timeout=10)
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def reset_server_state() -> None:
+    """Empty the server's in-memory caches and per-process state.
+
+    Every TTLCache held by the module or the institution resolver is
+    cleared, so caches added later are covered too. In-flight call sharing,
+    rate limiters and what was learned about the API key start over as well.
+    """
+    holders = [vars(borealis_server), vars(borealis_server.institution_resolver)]
+    for holder in holders:
+        for value in holder.values():
+            if isinstance(value, borealis_server.TTLCache):
+                value.clear()
+    borealis_server.inflight = borealis_server.SingleFlight()
+    borealis_server.rate_limiters.clear()
+    borealis_server.auth_state = borealis_server.AuthState(borealis_server.API_KEY)
+
+
+def tool_arguments(tool: str, index: int, args: argparse.Namespace) -> dict:
+    """Arguments for the index-th call of a tool (distinct per call)."""
+    doi = f"doi:10.5683/SP3/M{index:05d}"
+    if tool == "search_datasets":
+        arguments = {"query": f"salmon and trout {index}", "per_page": args.per_page}
+    elif tool == "get_dataset_metadata":
+        arguments = {"identifier": doi}
+    elif tool == "list_dataset_files":
+        arguments = {"identifier": doi, "limit": args.file_limit, "file_type": "csv"}
+    elif tool == "get_dataset_file":
+        arguments = {"file_id": str(100000 + index), "filename": f"file_{index}.csv", "max_lines": args.max_lines,
+                     "start_line": args.start_line}
+        if args.select_columns:
+            arguments["columns"] = args.select_columns
+    elif tool == "search_in_file":
+        arguments = {"file_id": str(100000 + index), "filename": f"file_{index}.csv", "pattern": "salmon",
+                     "start_line": args.start_line}
+    elif tool == "profile_tabular_file":
+        arguments = {"file_id": str(100000 + index), "filename": f"file_{index}.csv"}
+    elif tool == "describe_file_variables":
+        arguments = {"file_id": str(100000 + index), "filename": f"file_{index}.tab"}
+    else:
+        raise ValueError(tool)
+    arguments["format"] = args.format
+    return arguments
+
+
+async def timed_call(tool: str, arguments: dict) -> tuple:
+    """Call a tool through call_tool(); returns (seconds, characters returned)."""
+    started = time.perf_counter()
+    result = await borealis_server.call_tool(tool, arguments)
+    elapsed = time.perf_counter() - started
+    return elapsed, sum(len(item.text) for item in result)
+
+
+async def bench_tool(mock: MockProcess, tool: str, args: argparse.Namespace) -> dict:
+    """Sequential latency benchmark for one tool."""
+    reset_server_state()
+    mock.reset_counters()
+    latencies = []
+    output_chars = 0
+    tracemalloc.start()
+    for index in range(args.iterations):
+        if not args.warm:
+            reset_server_state()
+        arguments = tool_arguments(tool, 0 if args.warm else index, args)
+        elapsed, chars = await timed_call(tool, arguments)
+        latencies.append(elapsed)
+        output_chars += chars
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = mock.stats()
+    return {
+        "tool": tool,
+        "calls": args.iterations,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "upstream_requests": stats["total_requests"],
+        "upstream_per_call": stats["total_requests"] / args.iterations,
+        "upstream_by_endpoint": stats["requests"],
+        "upstream_bytes_sent": stats["bytes_sent"],
+        "storage_requests_with_key": stats["storage_requests_with_key"],
+        "output_chars_per_call": output_chars / args.iterations,
+        "peak_memory_mb": peak / (1024 * 1024),
+    }
+
+
+async def bench_throughput(mock: MockProcess, args: argparse.Namespace) -> dict:
+    """Run search -> metadata -> files -> file chains from concurrent workers."""
+    reset_server_state()
+    mock.reset_counters()
+    retries_before = sum(borealis_server.metrics.retries.values())
+    queue = asyncio.Queue()
+    for index in range(args.chains):
+        queue.put_nowait(index)
+    latencies = []
+
+    async def worker() -> None:
+        while True:
+            try:
+                index = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            for tool in ("search_datasets", "get_dataset_metadata", "list_dataset_files", "get_dataset_file"):
+                await borealis_server.call_tool(tool, tool_arguments(tool, index, args))
+            latencies.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = mock.stats()
+    return {
+        "concurrency": args.concurrency,
+        "chains": args.chains,
+        "wall_seconds": wall,
+        "chains_per_second": args.chains / wall,
+        "tool_calls_per_second": args.chains * 4 / wall,
+        "chain_p50_ms": percentile(latencies, 50) * 1000,
+        "chain_p95_ms": percentile(latencies, 95) * 1000,
+        "chain_p99_ms": percentile(latencies, 99) * 1000,
+        "upstream_requests": stats["total_requests"],
+        "upstream_by_endpoint": stats["requests"],
+        "connections_opened": stats["connections"],
+        "storage_requests_with_key": stats["storage_requests_with_key"],
+        "retries": sum(borealis_server.metrics.retries.values()) - retries_before,
+        "concurrency_limit": borealis_server.concurrency_limiter.stats()["limit"],
+        "peak_memory_mb": peak / (1024 * 1024),
+    }
+
+
+def print_report(tool_results: list, throughput: dict) -> None:
+    header = f"{'tool':<22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/call':>10}{'out chars':>11}{'peak MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for result in tool_results:
+        print(f"{result['tool']:<22}{result['p50_ms']:>9.1f}{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+              f"{result['upstream_per_call']:>10.2f}{result['output_chars_per_call']:>11.0f}{result['peak_memory_mb']:>9.2f}")
+    print()
+    print(f"Throughput: {throughput['chains']} chains x 4 calls, concurrency {throughput['concurrency']}")
+    print(f"  {throughput['chains_per_second']:.1f} chains/s, {throughput['tool_calls_per_second']:.1f} tool calls/s "
+          f"in {throughput['wall_seconds']:.2f}s")
+    print(f"  chain latency p50/p95/p99: {throughput['chain_p50_ms']:.1f} / {throughput['chain_p95_ms']:.1f} / "
+          f"{throughput['chain_p99_ms']:.1f} ms")
+    print(f"  upstream requests: {throughput['upstream_requests']} over {throughput['connections_opened']} connection(s), "
+          f"{throughput['retries']} retried, concurrency limit {throughput['concurrency_limit']}")
+    for endpoint, count in throughput["upstream_by_endpoint"].items():
+        print(f"    {endpoint}: {count}")
+    print(f"  peak memory: {throughput['peak_memory_mb']:.2f} MB")
+    leaks = key_leaks(tool_results, throughput)
+    if leaks:
+        print(f"\nERROR: {leaks} storage request(s) carried X-Dataverse-key")
+
+
+def key_leaks(tool_results: list, throughput: dict) -> int:
+    """Count storage requests that received the API key (must be zero)."""
+    return sum(result["storage_requests_with_key"] for result in tool_results) + throughput["storage_requests_with_key"]
+
+
+async def run(args: argparse.Namespace) -> dict:
+    mock = MockProcess(args)
+    borealis_server.BOREALIS_BASE_URL = mock.base_url
+    # Keep benchmarks independent of the environment
+    borealis_server.disk_cache = None
+    borealis_server.RATE_LIMIT = args.rate_limit
+    if args.api_key or args.reject_key:
+        borealis_server.API_KEY = FAKE_API_KEY
+        borealis_server.auth_state = borealis_server.AuthState(FAKE_API_KEY)
+    try:
+        tool_results = []
+        for tool in args.tools:
+            tool_results.append(await bench_tool(mock, tool, args))
+        throughput = await bench_throughput(mock, args)
+    finally:
+        await borealis_server.get_http_client().aclose()
+        mock.stop()
+    print_report(tool_results, throughput)
+    return {"tools": tool_results, "throughput": throughput, "settings": vars(args)}
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark borealis_server.py against a local mock API.")
+    parser.add_argument("--iterations", type=int, default=50, help="sequential calls per tool")
+    parser.add_argument("--concurrency", type=int, default=8, help="workers in the throughput run")
+    parser.add_argument("--chains", type=int, default=100, help="search->metadata->files->file chains in the throughput run")
+    parser.add_argument("--per-page", type=int, default=10, help="per_page for search calls")
+    parser.add_argument("--max-lines", type=int, default=100, help="max_lines for get_dataset_file calls")
+    parser.add_argument("--file-limit", type=int, default=20, help="limit for list_dataset_files calls")
+    parser.add_argument("--start-line", type=int, default=1,
+                        help="start_line for get_dataset_file and search_in_file calls (Range paging with --warm)")
+    parser.add_argument("--select-columns", nargs="+", metavar="NAME",
+                        help="columns for get_dataset_file calls, fetched as a subset (e.g. id var7)")
+    parser.add_argument("--format", choices=["markdown", "compact", "json"], default="markdown",
+                        help="output format requested from the tools")
+    parser.add_argument("--tools", nargs="+",
+                        default=["search_datasets", "get_dataset_metadata", "list_dataset_files", "get_dataset_file"],
+                        help="tools to benchmark individually")
+    parser.add_argument("--warm", action="store_true", help="keep caches between calls (repeat the same arguments)")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="server-side BOREALIS_RATE_LIMIT to apply (requests/s per host, 0 = off)")
+    parser.add_argument("--api-key", action="store_true",
+                        help="send a fake API key (accepted by the mock unless --reject-key is given)")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    add_mock_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    args = parse_args()
+    results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if key_leaks(results["tools"], results["throughput"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,936 @@
 #!/usr/bin/env python3
 import asyncio
+import base64
+import csv
+import concurrent.futures
+import hashlib
+import heapq
+import importlib.util
+import io
+import itertools
+import json
+import logging
+import math
 import os
+import random
 import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict, deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Hashable, Optional
+from xml.etree import ElementTree
 import httpx
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
 # Configuration
-BOREALIS_BASE_URL = "https://borealisdata.ca/api"
+BOREALIS_BASE_URL = os.environ.get("BOREALIS_BASE_URL", "https://borealisdata.ca/api")
 API_KEY = os.environ.get("BOREALIS_API_KEY", "")
 
+# Diagnostics go to stderr; stdout carries the MCP protocol
+logger = logging.getLogger("borealis_server")
+
+def _env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment, falling back to the default."""
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+def _env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment, falling back to the default."""
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Read a boolean setting (1/true/yes/on) from the environment."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+# HTTP connection pool settings. One client is shared by every tool call so
+# chained calls (search -> metadata -> files -> file) reuse warm connections.
+HTTP_MAX_CONNECTIONS = _env_int("BOREALIS_HTTP_MAX_CONNECTIONS", 20)
+HTTP_MAX_KEEPALIVE_CONNECTIONS = _env_int("BOREALIS_HTTP_MAX_KEEPALIVE", 10)
+HTTP_KEEPALIVE_EXPIRY = _env_float("BOREALIS_HTTP_KEEPALIVE_EXPIRY", 60.0)
+HTTP2_ENABLED = _env_flag("BOREALIS_HTTP2")
+
+# Per-endpoint timeouts (seconds). Connect is kept short; file downloads get
+# a longer read timeout than the JSON endpoints.
+HTTP_CONNECT_TIMEOUT = _env_float("BOREALIS_CONNECT_TIMEOUT", 10.0)
+SEARCH_TIMEOUT = httpx.Timeout(_env_float("BOREALIS_SEARCH_TIMEOUT", 30.0), connect=HTTP_CONNECT_TIMEOUT)
+METADATA_TIMEOUT = httpx.Timeout(_env_float("BOREALIS_METADATA_TIMEOUT", 30.0), connect=HTTP_CONNECT_TIMEOUT)
+FILES_TIMEOUT = httpx.Timeout(_env_float("BOREALIS_FILES_TIMEOUT", 30.0), connect=HTTP_CONNECT_TIMEOUT)
+DOWNLOAD_TIMEOUT = httpx.Timeout(_env_float("BOREALIS_DOWNLOAD_TIMEOUT", 60.0), connect=HTTP_CONNECT_TIMEOUT)
+
+_http_client: Optional[httpx.AsyncClient] = None
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create the pooled HTTP client used for all Borealis API calls."""
+    http2 = HTTP2_ENABLED
+    if http2 and importlib.util.find_spec("h2") is None:
+        # httpx needs the optional 'h2' package for HTTP/2 support
+        logger.warning("BOREALIS_HTTP2 is set but the 'h2' package is not installed; using HTTP/1.1. "
+                       "Install it with: pip install 'httpx[http2]'")
+        http2 = False
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(30.0, connect=HTTP_CONNECT_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        http2=http2,
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = create_http_client()
+    return _http_client
+
+# A rejected API key is not sent again until it is re-probed; the delay
+# doubles after each failed probe, up to the maximum (seconds).
+AUTH_REPROBE_INITIAL = _env_float("BOREALIS_AUTH_REPROBE_INITIAL", 60.0)
+AUTH_REPROBE_MAX = _env_float("BOREALIS_AUTH_REPROBE_MAX", 3600.0)
+
+class AuthState:
+    """Remember whether the configured API key works, shared by all handlers.
+
+    States: "none" (no usable key configured), "unknown" (not tried yet),
+    "valid" (the API accepted it) and "rejected" (the API answered 401, so
+    public content is fetched without it). While rejected, requests go out
+    anonymously in one round trip, and a single request re-probes the key
+    whenever the backoff delay has passed.
+    """
+
+    def __init__(self, api_key: str):
+        self.key_configured = bool(api_key) and len(api_key) > 10  # Basic validation
+        self.state = "unknown" if self.key_configured else "none"
+        self.backoff = AUTH_REPROBE_INITIAL
+        self.next_probe = 0.0
+        self.rejections = 0
+        self.anonymous_retries = 0
+        self.skipped = 0
+        self.public_skips = 0  # data files fetched without the key because they're public
+
+    def use_key(self) -> bool:
+        """Return True if the next request should send the API key."""
+        if not self.key_configured:
+            return False
+        if self.state != "rejected":
+            return True
+        now = time.monotonic()
+        if now >= self.next_probe:
+            # Let this request probe the key; others stay anonymous meanwhile
+            self.next_probe = now + self.backoff
+            return True
+        self.skipped += 1
+        return False
+
+    def record_accepted(self) -> None:
+        """The API accepted a request that carried the key."""
+        if self.state != "valid":
+            logger.info("Borealis API key accepted (was %s)", self.state)
+        self.state = "valid"
+        self.backoff = AUTH_REPROBE_INITIAL
+
+    def record_rejected(self) -> None:
+        """The API rejected the key; stop sending it until the next probe."""
+        self.rejections += 1
+        self.next_probe = time.monotonic() + self.backoff
+        logger.warning(
+            "Borealis API key rejected; sending requests without it, next check in %.0fs",
+            self.backoff
+        )
+        self.backoff = min(self.backoff * 2, AUTH_REPROBE_MAX)
+        self.state = "rejected"
+
+    def snapshot(self) -> dict:
+        """Return the key state and counters for diagnostics."""
+        return {
+            "state": self.state,
+            "key_configured": self.key_configured,
+            "rejections": self.rejections,
+            "anonymous_retries": self.anonymous_retries,
+            "requests_sent_without_key": self.skipped,
+            "public_files_fetched_without_key": self.public_skips,
+            "next_probe_in_seconds": max(0.0, self.next_probe - time.monotonic()) if self.state == "rejected" else None,
+        }
+
+auth_state = AuthState(API_KEY)
+
+# Runtime metrics. BOREALIS_STATS_TOOL=1 exposes them through the server_stats
+# tool; BOREALIS_METRICS_FILE writes them in Prometheus text format every
+# BOREALIS_METRICS_INTERVAL seconds (e.g. for node_exporter's textfile
+# collector). "{pid}" in the file name is replaced by the process ID so several
+# servers can share a directory.
+STATS_TOOL_ENABLED = _env_flag("BOREALIS_STATS_TOOL")
+METRICS_FILE = os.environ.get("BOREALIS_METRICS_FILE", "")
+METRICS_INTERVAL = _env_float("BOREALIS_METRICS_INTERVAL", 15.0)
+
+# Tool latency histogram bucket upper bounds (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+class Metrics:
+    """In-process counters for tool calls and upstream traffic.
+
+    Only touched from the event loop, so no locking is needed. Tool latency
+    is kept as a fixed-bucket histogram per tool.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.tool_buckets: dict = defaultdict(lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+        self.tool_seconds: dict = defaultdict(float)
+        self.tool_calls: dict = defaultdict(int)  # (tool, outcome) -> count
+        self.bytes_returned: dict = defaultdict(int)  # tool -> UTF-8 bytes sent to the client
+        self.upstream: dict = defaultdict(int)  # (endpoint, status) -> count
+        self.retries: dict = defaultdict(int)  # (endpoint, reason) -> count
+        self.throttled_seconds = 0.0
+        self.bytes_downloaded = 0
+
+    def record_tool(self, tool: str, seconds: float, outcome: str, returned: int) -> None:
+        """Record one finished tool call."""
+        buckets = self.tool_buckets[tool]
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                buckets[index] += 1
+                break
+        else:
+            buckets[-1] += 1
+        self.tool_seconds[tool] += seconds
+        self.tool_calls[(tool, outcome)] += 1
+        self.bytes_returned[tool] += returned
+
+    def record_upstream(self, endpoint: str, status) -> None:
+        """Count one upstream HTTP response (or "error" for a transport failure)."""
+        self.upstream[(endpoint, str(status))] += 1
+
+    def latency_quantile(self, tool: str, q: float) -> Optional[float]:
+        """Upper bucket bound below which a fraction q of the tool's calls finished."""
+        buckets = self.tool_buckets.get(tool)
+        if not buckets:
+            return None
+        target = q * sum(buckets)
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def snapshot(self) -> dict:
+        """Return all metrics as a JSON-serializable dict."""
+        tools = {}
+        for tool, buckets in sorted(self.tool_buckets.items()):
+            calls = sum(buckets)
+            tools[tool] = {
+                "calls": calls,
+                "errors": self.tool_calls.get((tool, "error"), 0),
+                "mean_ms": round(self.tool_seconds[tool] / calls * 1000, 1) if calls else 0.0,
+                "p50_ms_at_most": _bound_ms(self.latency_quantile(tool, 0.5)),
+                "p95_ms_at_most": _bound_ms(self.latency_quantile(tool, 0.95)),
+                "p99_ms_at_most": _bound_ms(self.latency_quantile(tool, 0.99)),
+                "bytes_returned": self.bytes_returned[tool],
+            }
+        upstream = defaultdict(dict)
+        for (endpoint, status), count in sorted(self.upstream.items()):
+            upstream[endpoint][status] = count
+        retries = defaultdict(dict)
+        for (endpoint, reason), count in sorted(self.retries.items()):
+            retries[endpoint][reason] = count
+        return {
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "tools": tools,
+            "upstream_requests": dict(upstream),
+            "upstream_retries": dict(retries),
+            "rate_limit_wait_seconds": round(self.throttled_seconds, 3),
+            "concurrency": concurrency_limiter.stats(),
+            "bytes_downloaded": self.bytes_downloaded,
+            "bytes_returned": sum(self.bytes_returned.values()),
+            "auth": auth_state.snapshot(),
+            "caches": cache_stats(),
+            "coalesced": inflight.stats(),
+            "local_index": search_index.stats() if search_index is not None else None,
+        }
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        out = []
+        out.append("# HELP borealis_tool_duration_seconds Tool call latency.")
+        out.append("# TYPE borealis_tool_duration_seconds histogram")
+        for tool, buckets in sorted(self.tool_buckets.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, buckets):
+                cumulative += count
+                out.append(f'borealis_tool_duration_seconds_bucket{{tool="{tool}",le="{bound}"}} {cumulative}')
+            cumulative += buckets[-1]
+            out.append(f'borealis_tool_duration_seconds_bucket{{tool="{tool}",le="+Inf"}} {cumulative}')
+            out.append(f'borealis_tool_duration_seconds_sum{{tool="{tool}"}} {self.tool_seconds[tool]:.6f}')
+            out.append(f'borealis_tool_duration_seconds_count{{tool="{tool}"}} {cumulative}')
+        out.append("# HELP borealis_tool_calls_total Tool calls by outcome.")
+        out.append("# TYPE borealis_tool_calls_total counter")
+        for (tool, outcome), count in sorted(self.tool_calls.items()):
+            out.append(f'borealis_tool_calls_total{{tool="{tool}",outcome="{outcome}"}} {count}')
+        out.append("# HELP borealis_response_bytes_total Bytes of tool output returned to the client.")
+        out.append("# TYPE borealis_response_bytes_total counter")
+        for tool, count in sorted(self.bytes_returned.items()):
+            out.append(f'borealis_response_bytes_total{{tool="{tool}"}} {count}')
+        out.append("# HELP borealis_upstream_requests_total Upstream HTTP responses by endpoint and status.")
+        out.append("# TYPE borealis_upstream_requests_total counter")
+        for (endpoint, status), count in sorted(self.upstream.items()):
+            out.append(f'borealis_upstream_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+        out.append("# HELP borealis_upstream_retries_total Upstream requests retried, by endpoint and reason.")
+        out.append("# TYPE borealis_upstream_retries_total counter")
+        for (endpoint, reason), count in sorted(self.retries.items()):
+            out.append(f'borealis_upstream_retries_total{{endpoint="{endpoint}",reason="{reason}"}} {count}')
+        out.append("# HELP borealis_rate_limit_wait_seconds_total Time requests waited for the client-side rate limit.")
+        out.append("# TYPE borealis_rate_limit_wait_seconds_total counter")
+        out.append(f"borealis_rate_limit_wait_seconds_total {self.throttled_seconds:.6f}")
+        concurrency = concurrency_limiter.stats()
+        out.append("# HELP borealis_upstream_concurrency_limit Current adaptive limit on concurrent upstream requests.")
+        out.append("# TYPE borealis_upstream_concurrency_limit gauge")
+        out.append(f"borealis_upstream_concurrency_limit {concurrency['limit']}")
+        out.append("# HELP borealis_upstream_in_flight Upstream requests in flight.")
+        out.append("# TYPE borealis_upstream_in_flight gauge")
+        out.append(f"borealis_upstream_in_flight {concurrency['in_flight']}")
+        out.append("# HELP borealis_upstream_bytes_total Response body bytes downloaded from upstream.")
+        out.append("# TYPE borealis_upstream_bytes_total counter")
+        out.append(f"borealis_upstream_bytes_total {self.bytes_downloaded}")
+        auth = auth_state.snapshot()
+        for name, key, help_text in (
+            ("borealis_auth_rejections_total", "rejections", "Times the API key was rejected."),
+            ("borealis_auth_anonymous_retries_total", "anonymous_retries", "Requests retried without the API key after a 401."),
+            ("borealis_auth_requests_without_key_total", "requests_sent_without_key", "Requests sent without a rejected key."),
+        ):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} counter")
+            out.append(f"{name} {auth[key]}")
+        caches = cache_stats()
+        for name, key, kind, help_text in (
+            ("borealis_cache_hits_total", "hits", "counter", "Cache lookups answered from the cache."),
+            ("borealis_cache_misses_total", "misses", "counter", "Cache lookups that missed."),
+            ("borealis_cache_entries", "entries", "gauge", "Entries currently cached."),
+            ("borealis_cache_bytes", "bytes", "gauge", "Bytes currently cached."),
+        ):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            for cache, stats in caches.items():
+                out.append(f'{name}{{cache="{cache}"}} {stats[key]}')
+        out.append("# HELP borealis_coalesced_calls_total Calls that joined an identical call already in flight.")
+        out.append("# TYPE borealis_coalesced_calls_total counter")
+        for kind, stats in inflight.stats().items():
+            out.append(f'borealis_coalesced_calls_total{{kind="{kind}"}} {stats["shared"]}')
+        out.append("# HELP borealis_start_time_seconds Server start time (Unix epoch).")
+        out.append("# TYPE borealis_start_time_seconds gauge")
+        out.append(f"borealis_start_time_seconds {self.started:.0f}")
+        return "\n".join(out) + "\n"
+
+def _bound_ms(seconds: Optional[float]) -> Optional[float]:
+    if seconds is None or seconds == float("inf"):
+        return None
+    return seconds * 1000
+
+metrics = Metrics()
+
+def write_metrics_file(path: str, text: str) -> None:
+    """Atomically replace the metrics file so scrapers never see a partial write."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+async def metrics_writer(path: str, interval: float) -> None:
+    """Write the Prometheus metrics file every interval seconds until cancelled."""
+    while True:
+        try:
+            await asyncio.to_thread(write_metrics_file, path, metrics.render_prometheus())
+        except OSError as e:
+            logger.warning("Cannot write metrics file %s: %s", path, e)
+        await asyncio.sleep(interval)
+
+# Metadata cache settings. Published datasets rarely change, so repeat
+# questions about the same DOI in a conversation are served from memory.
+# Set the TTL to 0 to disable caching.
+METADATA_CACHE_TTL = _env_float("BOREALIS_METADATA_CACHE_TTL", 3600.0)
+METADATA_CACHE_MAX_ENTRIES = _env_int("BOREALIS_METADATA_CACHE_MAX_ENTRIES", 256)
+METADATA_CACHE_MAX_BYTES = _env_int("BOREALIS_METADATA_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+
+class TTLCache:
+    """Bounded in-memory cache with per-entry expiry and LRU eviction.
+
+    Entries are evicted least-recently-used first whenever either the entry
+    count or the total recorded size (in bytes) goes over its limit.
+    """
+
+    def __init__(self, ttl: float, max_entries: int, max_bytes: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value for key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, _, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, size: int, ttl: Optional[float] = None) -> None:
+        """Store value under key, evicting least-recently-used entries as needed.
+
+        `ttl` overrides the cache-wide TTL for this entry.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.max_entries <= 0 or size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def pop(self, key: Hashable) -> None:
+        """Remove key from the cache if present."""
+        if key in self._entries:
+            self._remove(key)
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> dict:
+        """Return entry/byte usage and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
+
+# Search result cache settings. Searches are cached for less time than
+# metadata because newly published datasets should show up reasonably soon.
+SEARCH_CACHE_TTL = _env_float("BOREALIS_SEARCH_CACHE_TTL", 300.0)
+SEARCH_CACHE_MAX_ENTRIES = _env_int("BOREALIS_SEARCH_CACHE_MAX_ENTRIES", 128)
+SEARCH_CACHE_MAX_BYTES = _env_int("BOREALIS_SEARCH_CACHE_MAX_BYTES", 16 * 1024 * 1024)
+
+# Batch metadata requests: identifiers accepted per call and concurrent fetches
+BATCH_MAX_IDENTIFIERS = _env_int("BOREALIS_BATCH_MAX_IDENTIFIERS", 50)
+BATCH_CONCURRENCY = _env_int("BOREALIS_BATCH_CONCURRENCY", 8)
+
+metadata_cache = TTLCache(METADATA_CACHE_TTL, METADATA_CACHE_MAX_ENTRIES, METADATA_CACHE_MAX_BYTES)
+search_cache = TTLCache(SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_MAX_BYTES)
+
+# Optional persistent response cache. When BOREALIS_CACHE_DIR is set, search,
+# metadata and file-list responses are stored in SQLite there so a restarted
+# server starts warm. Entries older than the matching in-memory TTL are
+# revalidated with conditional requests (ETag / Last-Modified).
+CACHE_DIR = os.environ.get("BOREALIS_CACHE_DIR", "")
+DISK_CACHE_MAX_BYTES = _env_int("BOREALIS_DISK_CACHE_MAX_BYTES", 256 * 1024 * 1024)
+
+class DiskCache:
+    """SQLite-backed HTTP response cache that several server processes can share.
+
+    The database runs in WAL mode with a busy timeout so concurrent readers and
+    writers in other processes wait instead of failing. Entries are evicted
+    least-recently-accessed first once the total body size exceeds max_bytes.
+    Methods are blocking; call them through asyncio.to_thread().
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "responses.sqlite3")
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=10000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " body BLOB NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+
+    def get(self, key: str) -> Optional[tuple]:
+        """Return (body, etag, last_modified, stored_at) for key, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return row
+
+    def put(self, key: str, body: bytes, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Store a response body with its validators, then evict if over budget."""
+        if len(body) > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, body, etag, last_modified, stored_at, accessed_at, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, body, etag, last_modified, now, now, len(body)),
+            )
+            self._evict()
+
+    def touch(self, key: str) -> None:
+        """Mark an entry as freshly revalidated (after a 304 Not Modified)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key)
+            )
+            self.revalidated += 1
+
+    def _evict(self) -> None:
+        # BEGIN IMMEDIATE takes the write lock so two processes don't both evict
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            while total > self.max_bytes:
+                rows = self._conn.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed_at LIMIT 50"
+                ).fetchall()
+                if not rows:
+                    break
+                for key, size in rows:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    total -= size
+                    if total <= self.max_bytes:
+                        break
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def stats(self) -> dict:
+        """Return entry/byte usage and hit/miss/revalidation counters."""
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+        }
+
+disk_cache: Optional[DiskCache] = None
+if CACHE_DIR:
+    try:
+        disk_cache = DiskCache(os.path.expanduser(CACHE_DIR), DISK_CACHE_MAX_BYTES)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("Disk cache disabled: cannot open %s: %s", CACHE_DIR, e)
+
+# Disk cache entries are namespaced by API key so processes using different
+# keys (and so possibly seeing different unpublished content) never share them
+_KEY_SCOPE = hashlib.sha256(API_KEY.encode()).hexdigest()[:12] if API_KEY else "anonymous"
+
+def cache_stats() -> dict:
+    """Return usage and hit/miss counters for each cache."""
+    stats = {
+        "metadata": metadata_cache.stats(),
+        "search": search_cache.stats(),
+        "manifest": manifest_cache.stats(),
+        "signed_urls": redirect_cache.stats(),
+        "line_offsets": line_index_cache.stats(),
+        "ddi": ddi_cache.stats(),
+    }
+    if disk_cache is not None:
+        stats["disk"] = disk_cache.stats()
+    return stats
+
+class APIStatusError(Exception):
+    """Raised when the Borealis API answers with a non-OK status field."""
+
+    def __init__(self, status):
+        super().__init__(f"API returned status '{status}'")
+        self.status = status
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers asking for the same key.
+
+    The first caller starts the work as a task; callers arriving before it
+    finishes await that task and get the same result or exception. Nothing
+    is kept once it finishes (caching is left to the caches). Keys are tuples
+    whose first element names the kind of call, for the counters.
+    """
+
+    def __init__(self):
+        self._calls: dict = {}
+        self.started = defaultdict(int)
+        self.shared = defaultdict(int)
+
+    async def do(self, key: tuple, factory) -> Any:
+        """Return the result of factory(), or of the identical call already running."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+            self.started[key[0]] += 1
+        else:
+            self.shared[key[0]] += 1
+        # Shielded so one caller being cancelled doesn't cancel the others' call
+        return await asyncio.shield(task)
+
+    def _finished(self, key: tuple, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # Mark as retrieved even if every caller went away
+
+    def stats(self) -> dict:
+        """Return calls started and calls that joined one in flight, per kind."""
+        return {
+            kind: {"started": self.started[kind], "shared": self.shared[kind]}
+            for kind in sorted(set(self.started) | set(self.shared))
+        }
+
+inflight = SingleFlight()
+
+# Client-side rate limit per host (requests per second, with bursts up to
+# RATE_BURST). Set BOREALIS_RATE_LIMIT to 0 to disable.
+RATE_LIMIT = _env_float("BOREALIS_RATE_LIMIT", 10.0)
+RATE_BURST = _env_float("BOREALIS_RATE_BURST", 20.0)
+
+# Retries for transient failures (timeouts, connection errors, 429/502/503/504).
+# Delays grow exponentially from RETRY_BASE_DELAY with full jitter, capped at
+# RETRY_MAX_DELAY; a Retry-After header is honored up to RETRY_MAX_WAIT.
+RETRY_MAX = _env_int("BOREALIS_RETRY_MAX", 3)
+RETRY_BASE_DELAY = _env_float("BOREALIS_RETRY_BASE_DELAY", 0.5)
+RETRY_MAX_DELAY = _env_float("BOREALIS_RETRY_MAX_DELAY", 8.0)
+RETRY_MAX_WAIT = _env_float("BOREALIS_RETRY_MAX_WAIT", 30.0)
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Adaptive upstream concurrency: starts at CONCURRENCY_INITIAL, grows while
+# requests succeed and shrinks when they fail or get much slower than usual
+CONCURRENCY_INITIAL = _env_int("BOREALIS_CONCURRENCY_INITIAL", 8)
+CONCURRENCY_MIN = _env_int("BOREALIS_CONCURRENCY_MIN", 1)
+CONCURRENCY_MAX = _env_int("BOREALIS_CONCURRENCY_MAX", HTTP_MAX_CONNECTIONS)
+SLOW_RESPONSE_FACTOR = _env_float("BOREALIS_SLOW_RESPONSE_FACTOR", 3.0)
+
+class TokenBucket:
+    """Token-bucket rate limiter for one host.
+
+    Callers reserve a token up front and sleep until it is due, so waiters
+    are served in arrival order without a lock. pause() holds every request
+    back, e.g. for a 429's Retry-After.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    async def acquire(self) -> float:
+        """Wait for a token; returns the seconds spent waiting."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = max(-self.tokens / self.rate if self.tokens < 0 else 0.0, self.paused_until - now)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold back all requests to this host for the given time."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+rate_limiters: dict = {}
+
+def get_rate_limiter(host: str) -> Optional[TokenBucket]:
+    """Return the token bucket for a host, or None when rate limiting is off."""
+    if RATE_LIMIT <= 0:
+        return None
+    bucket = rate_limiters.get(host)
+    if bucket is None:
+        bucket = rate_limiters[host] = TokenBucket(RATE_LIMIT, RATE_BURST)
+    return bucket
+
+class AdaptiveLimiter:
+    """AIMD limit on concurrent upstream requests.
+
+    Each successful response raises the limit by 1/limit (about +1 per
+    round of requests). A throttling or server error, a timeout, or a
+    response more than SLOW_RESPONSE_FACTOR times slower than the recent
+    average for its endpoint cuts it by 30%, at most once per second so a
+    burst of failures counts as one signal. For streamed downloads the slot
+    is held until the response headers arrive.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.in_flight = 0
+        self.decreases = 0
+        self._waiters: list = []
+        self._latency: dict = {}  # endpoint -> (moving average seconds, samples)
+        self._last_decrease = 0.0
+
+    async def acquire(self) -> None:
+        """Wait until a request slot is free under the current limit."""
+        while self.in_flight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                elif not waiter.cancelled():
+                    # We were woken but won't take the slot; pass it on
+                    self._wake()
+                raise
+        self.in_flight += 1
+
+    def release(self, endpoint: str, seconds: float, congested: bool) -> None:
+        """Free a slot and adjust the limit from the request's outcome."""
+        self.in_flight -= 1
+        average, samples = self._latency.get(endpoint, (seconds, 0))
+        slow = samples >= 5 and seconds > SLOW_RESPONSE_FACTOR * average
+        self._latency[endpoint] = (average + 0.2 * (seconds - average), samples + 1)
+        if congested or slow:
+            now = time.monotonic()
+            if now - self._last_decrease >= 1.0:
+                self.limit = max(float(self.minimum), self.limit * 0.7)
+                self._last_decrease = now
+                self.decreases += 1
+                logger.info("Upstream concurrency limit lowered to %d (%s)",
+                            int(self.limit), "error" if congested else "slow response")
+        else:
+            self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        free = int(self.limit) - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.pop(0)
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def stats(self) -> dict:
+        """Return the current limit, requests in flight and decrease count."""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "decreases": self.decreases,
+        }
+
+concurrency_limiter = AdaptiveLimiter(CONCURRENCY_INITIAL, CONCURRENCY_MIN, CONCURRENCY_MAX)
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date), if present."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff delay for the given retry attempt (0-based)."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * (2 ** attempt)))
+
+def upstream_endpoint(url: httpx.URL) -> str:
+    """Classify an upstream URL for metrics: search, metadata, files, datafile, ddi, storage or other."""
+    base = httpx.URL(BOREALIS_BASE_URL)
+    if url.host != base.host:
+        return "storage"
+    path = url.path[len(base.path):] if url.path.startswith(base.path) else url.path
+    if path.startswith("/search"):
+        return "search"
+    if path.startswith("/access/datafile"):
+        return "ddi" if "/metadata" in path else "datafile"
+    if path.startswith("/datasets"):
+        return "files" if path.endswith("/files") else "metadata"
+    return "other"
+
+async def upstream_send(request: httpx.Request, stream: bool = False) -> httpx.Response:
+    """Send a GET on the shared client with rate limiting, concurrency control and retries.
+
+    Timeouts, connection errors and 429/502/503/504 responses are retried up
+    to RETRY_MAX times with jittered exponential backoff, or after the
+    server's Retry-After. The last response (or error) is passed on as is.
+    Every response is counted by endpoint and status.
+    """
+    endpoint = upstream_endpoint(request.url)
+    bucket = get_rate_limiter(request.url.host)
+    attempt = 0
+    while True:
+        if bucket is not None:
+            metrics.throttled_seconds += await bucket.acquire()
+        await concurrency_limiter.acquire()
+        started = time.monotonic()
+        congested = False
+        try:
+            response = await get_http_client().send(request, stream=stream)
+            congested = response.status_code in RETRY_STATUSES
+        except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError) as e:
+            congested = True
+            metrics.record_upstream(endpoint, "error")
+            if attempt >= RETRY_MAX:
+                raise
+            delay = backoff_delay(attempt)
+            reason = type(e).__name__
+        except httpx.RequestError:
+            metrics.record_upstream(endpoint, "error")
+            raise
+        else:
+            metrics.record_upstream(endpoint, response.status_code)
+            retry_after = retry_after_seconds(response) if congested else None
+            # Give up when out of attempts, or when the server wants us gone
+            # for longer than a caller should wait
+            if not congested or attempt >= RETRY_MAX or (retry_after or 0.0) > RETRY_MAX_WAIT:
+                if not stream:
+                    metrics.bytes_downloaded += len(response.content)
+                return response
+            if retry_after is not None and bucket is not None:
+                bucket.pause(retry_after)
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            reason = str(response.status_code)
+            if stream:
+                await response.aclose()
+        finally:
+            concurrency_limiter.release(endpoint, time.monotonic() - started, congested)
+        metrics.retries[(endpoint, reason)] += 1
+        logger.debug("Retrying %s %s after %s (attempt %d, waiting %.2fs)",
+                     request.method, request.url, reason, attempt + 1, delay)
+        await asyncio.sleep(delay)
+        attempt += 1
+
+async def fetch_json(url: str, params: dict, timeout: httpx.Timeout,
+                     headers: Optional[dict] = None, cache_key: Optional[str] = None,
+                     max_age: float = 0.0) -> tuple:
+    """GET a Borealis JSON endpoint; returns (response_data, size in bytes).
+
+    Sends the API key when configured and retries without it on a 401. When
+    the disk cache is enabled and cache_key is given, entries younger than
+    max_age seconds are returned without a request, older ones are
+    revalidated with If-None-Match / If-Modified-Since, and successful
+    responses are stored. HTTP errors are raised as httpx.HTTPStatusError.
+    Concurrent identical requests share one exchange and its parsed result,
+    so callers must not modify the returned data.
+    """
+    flight_key = ("json", str(httpx.URL(url, params=params)), tuple(sorted((headers or {}).items())))
+    return await inflight.do(
+        flight_key, lambda: _fetch_json(url, params, timeout, headers, cache_key, max_age)
+    )
+
+async def _fetch_json(url: str, params: dict, timeout: httpx.Timeout, headers: Optional[dict],
+                      cache_key: Optional[str], max_age: float) -> tuple:
+    headers = dict(headers or {})
+    disk_key = f"{_KEY_SCOPE}:{cache_key}" if disk_cache is not None and cache_key else None
+    
+    entry = None
+    if disk_key:
+        entry = await asyncio.to_thread(disk_cache.get, disk_key)
+        if entry is not None:
+            body, etag, last_modified, stored_at = entry
+            if time.time() - stored_at < max_age:
+                return json.loads(body), len(body)
+            # Stale: ask the server whether it changed
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+    
+    # Only send the API key if it hasn't been rejected recently
+    use_auth = auth_state.use_key()
+    
+    client = get_http_client()
+    response = await upstream_send(client.build_request(
+        "GET",
+        url,
+        params=params,
+        headers={**headers, "X-Dataverse-key": API_KEY} if use_auth else headers,
+        timeout=timeout
+    ))
+    
+    if use_auth:
+        if response.status_code == 401:
+            # Bad or expired key: remember it, then try again without auth for public content
+            auth_state.record_rejected()
+            auth_state.anonymous_retries += 1
+            response = await upstream_send(
+                client.build_request("GET", url, params=params, headers=headers, timeout=timeout)
+            )
+        elif response.status_code < 400:
+            # A 404 or 5xx says nothing about the key
+            auth_state.record_accepted()
+    
+    if response.status_code == 304 and entry is not None:
+        await asyncio.to_thread(disk_cache.touch, disk_key)
+        body = entry[0]
+        return json.loads(body), len(body)
+    
+    response.raise_for_status()
+    response_data = response.json()
+    
+    # Only successful responses are cached
+    if disk_key and response_data.get("status") == "OK":
+        await asyncio.to_thread(
+            disk_cache.put, disk_key, response.content,
+            response.headers.get("etag"), response.headers.get("last-modified")
+        )
+    return response_data, len(response.content)
+
 # Mapping of university names to dataverse identifiers
 UNIVERSITY_DATAVERSE_MAP = {
     "algoma university": "algoma",
@@ -71,6 +991,7 @@ UNIVERSITY_DATAVERSE_MAP = {
     "mcmaster university": "mcmaster",
     "memorial": "memorial",
     "memorial university": "memorial",
+    "memorial university of newfoundland": "memorial",
     "mount allison": "mta",
     "mount allison university": "mta",
     "mta": "mta",
@@ -219,13 +1140,193 @@ UNIVERSITY_DATAVERSE_MAP = {
     "york": "york",
 }
 
+# Institution names listed alongside the dataverse aliases (used to build the
+# resolver index and for display)
+DATAVERSE_LIST_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "list_of_common_dataverses.txt")
+
+# Minimum score for a fuzzy institution match to be used as the search subtree
+RESOLVER_MIN_CONFIDENCE = _env_float("BOREALIS_RESOLVER_MIN_CONFIDENCE", 0.8)
+# Resolved names remembered (least recently used evicted first)
+RESOLVER_CACHE_MAX_ENTRIES = 2048
+
+# Abbreviations expanded before matching, and generic words ignored when
+# comparing the distinctive tokens of two names
+NAME_ABBREVIATIONS = {
+    "univ": "university", "uni": "university", "u": "university",
+    "st": "saint", "ste": "sainte", "coll": "college", "inst": "institute",
+    "bc": "british columbia",
+}
+NAME_STOPWORDS = {
+    "university", "universite", "college", "institute", "institut", "of", "the",
+    "de", "du", "des", "la", "le", "l", "d", "a", "en", "and", "et",
+}
+
+def fold_name(text: str) -> str:
+    """Lowercase, strip accents and punctuation, and collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    # Drop apostrophes so "Queen's" and "Queens" fold to the same name
+    text = re.sub(r"['’]", "", text)
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two strings."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        previous = current
+    return previous[-1]
+
+def similarity(a: str, b: str) -> float:
+    """Edit-distance similarity between 0 (different) and 1 (identical)."""
+    if not a or not b:
+        return 0.0
+    return 1.0 - edit_distance(a, b) / max(len(a), len(b))
+
+class InstitutionResolver:
+    """Resolve institution names and abbreviations to dataverse aliases.
+
+    Built once at startup from UNIVERSITY_DATAVERSE_MAP and the dataverse
+    list file. Lookups try, in order: an exact match on the folded name
+    (accents, case and punctuation removed, abbreviations expanded), the
+    name with spaces removed ("U of T" / "UofT"), initials ("UBC"), and
+    finally token overlap with edit-distance tolerance for typos. Each
+    candidate carries a confidence score between 0 and 1.
+    """
+
+    def __init__(self):
+        self._exact = {}
+        self._compact = {}
+        self._initials = defaultdict(set)
+        self._names = []
+        self.display_names = {}
+        # The index only changes through add(), so entries never go stale
+        self._resolved = TTLCache(float("inf"), RESOLVER_CACHE_MAX_ENTRIES, RESOLVER_CACHE_MAX_ENTRIES * 1024)
+
+    @staticmethod
+    def _expand(folded: str) -> str:
+        return " ".join(NAME_ABBREVIATIONS.get(token, token) for token in folded.split())
+
+    def add(self, name: str, alias: str, display_name: Optional[str] = None) -> None:
+        """Index one name (or abbreviation) for a dataverse alias."""
+        folded = fold_name(name)
+        if not folded:
+            return
+        if display_name:
+            self.display_names.setdefault(alias, display_name)
+        for variant in {folded, self._expand(folded)}:
+            self._exact.setdefault(variant, alias)
+            self._compact.setdefault(variant.replace(" ", ""), alias)
+            words = [token for token in variant.split() if token not in ("of", "the", "de", "du", "la")]
+            if len(words) > 1:
+                self._initials["".join(word[0] for word in words)].add(alias)
+        tokens = frozenset(token for token in self._expand(folded).split() if token not in NAME_STOPWORDS)
+        if tokens:
+            self._names.append((alias, tokens))
+        self._resolved.clear()
+
+    def resolve(self, text: str, limit: int = 3) -> list:
+        """Return up to `limit` (alias, confidence) candidates, best first."""
+        folded = self._expand(fold_name(text))
+        if not folded:
+            return []
+        ranked = self._resolved.get(folded)
+        if ranked is not None:
+            return ranked[:limit]
+        
+        scores = {}
+        
+        def offer(alias: str, score: float) -> None:
+            if score > scores.get(alias, 0.0):
+                scores[alias] = score
+        
+        if folded in self._exact:
+            offer(self._exact[folded], 1.0)
+        compact = folded.replace(" ", "")
+        if compact in self._compact:
+            offer(self._compact[compact], 0.97)
+        for alias in self._initials.get(compact, ()):
+            # Initials can collide, so they rank below name matches
+            offer(alias, 0.9 if len(self._initials[compact]) == 1 else 0.7)
+        
+        query_tokens = [token for token in folded.split() if token not in NAME_STOPWORDS]
+        if query_tokens:
+            for alias, tokens in self._names:
+                # Best fuzzy match for each query token, and how many of the
+                # candidate's own tokens were found in the query
+                matched = 0.0
+                hits = 0
+                found = set()
+                for query_token in query_tokens:
+                    best, best_token = 0.0, None
+                    for token in tokens:
+                        score = 1.0 if token == query_token else similarity(query_token, token)
+                        if score > best:
+                            best, best_token = score, token
+                    # Tolerate typos only in longer words
+                    if best == 1.0 or (best >= 0.8 and len(query_token) >= 5):
+                        matched += best
+                        hits += 1
+                        found.add(best_token)
+                if not matched:
+                    continue
+                query_coverage = matched / len(query_tokens)
+                name_coverage = len(found) / len(tokens)
+                score = (query_coverage + name_coverage) / 2
+                if name_coverage == 1.0 and hits == len(query_tokens):
+                    # The query and the name have the same distinctive words,
+                    # up to typos, e.g. "McMastr University" -> "mcmaster". A query
+                    # with words of its own ("Guelph Humber", "ottawa hospital")
+                    # may be another institution, and stays a suggestion.
+                    score = max(score, 0.8 + 0.1 * query_coverage)
+                offer(alias, score * 0.95)
+        
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        self._resolved.set(folded, ranked, len(folded) + 64 * len(ranked))
+        return ranked[:limit]
+
+def build_institution_resolver() -> InstitutionResolver:
+    """Build the resolver index from the mapping and the dataverse list file."""
+    resolver = InstitutionResolver()
+    try:
+        with open(DATAVERSE_LIST_FILE, encoding="utf-8") as f:
+            next(f, None)  # header row
+            for line in f:
+                fields = [field.strip() for field in line.split(",")]
+                if len(fields) >= 2 and fields[0] and fields[1]:
+                    resolver.add(fields[0], fields[1], display_name=fields[0])
+                    resolver.add(fields[1], fields[1])
+    except OSError:
+        logger.info("Dataverse list %s not found; using the built-in mapping only", DATAVERSE_LIST_FILE)
+    for name, alias in UNIVERSITY_DATAVERSE_MAP.items():
+        resolver.add(name, alias)
+        resolver.add(alias, alias)
+    return resolver
+
+institution_resolver = build_institution_resolver()
+
 # Create MCP server
 app = Server("borealis-dataverse")
 
+# Tool names used as metric labels; anything else is counted as "unknown"
+TOOL_NAMES = {
+    "search_datasets", "get_dataset_metadata", "get_datasets_metadata",
+    "list_dataset_files", "get_dataset_file", "profile_tabular_file", "search_in_file",
+    "describe_file_variables", "server_stats",
+}
+
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List available tools for Borealis Dataverse."""
-    return [
+    tools = [
         Tool(
             name="search_datasets",
             description="Search for datasets in Borealis Dataverse by keywords, subjects, or other criteria. Returns a list of matching datasets with basic information. When presenting results to the user, ALWAYS include the full DOI URL (e.g., https://doi.org/10.34990/FK2/XXXXX) and the authors for each dataset in your summary. Do not omit author information.",
@@ -249,7 +1350,7 @@ async def list_tools() -> list[Tool]:
                     },
                     "type": {
                         "type": "string",
-                        "description": "Filter by type: 'dataset', 'dataverse', or 'file'. Leave empty for all types.",
+                        "description": "Filter by type: 'dataset', 'dataverse', or 'file'. Leave empty for all types. 'dataset' and 'dataverse' searches of a harvested dataverse are answered from the local index.",
                         "enum": ["dataset", "dataverse", "file"]
                     },
                     "dataverse": {
@@ -267,7 +1368,16 @@ async def list_tools() -> list[Tool]:
                     "city": {
                         "type": "string",
                         "description": "Optional: Filter by the geographic coverage/subject area of datasets (e.g., datasets ABOUT 'Toronto', 'Halifax', 'Vancouver'). This indicates what city the data describes, not where researchers are located."
-                    }
+                    },
+                    "max_results": {
+                        "type": "integer",
+                        "description": f"Optional: Retrieve up to this many results in one call (maximum {SEARCH_MAX_RESULTS}), fetched as parallel pages of 100. Use for survey-style questions (e.g. 'all datasets about salmon in BC') instead of many separate searches."
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "Optional: Continuation cursor from a previous search_datasets response. Resumes after the results already shown, with the same query and filters (other filter arguments are ignored)."
+                    },
+                    "format": FORMAT_PROPERTY
                 },
                 "required": ["query"]
             }
@@ -281,11 +1391,28 @@ async def list_tools() -> list[Tool]:
                     "identifier": {
                         "type": "string",
                         "description": "Dataset identifier - can be either a DOI (e.g., 'doi:10.34990/FK2/ABC123' or 'https://doi.org/10.34990/FK2/ABC123') or a numeric database ID. DOIs are preferred."
-                    }
+                    },
+                    "format": FORMAT_PROPERTY
                 },
                 "required": ["identifier"]
             }
         ),
+        Tool(
+            name="get_datasets_metadata",
+            description="Retrieve compact metadata for several datasets from Borealis Dataverse in one call. Use this instead of calling get_dataset_metadata repeatedly, e.g. when the user wants details on the top results of a search. Returns title, DOI, authors, year, keywords and a short description for each dataset, plus an error line for any identifier that could not be retrieved. Use get_dataset_metadata for the full record of a single dataset.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "identifiers": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": f"Dataset identifiers (DOIs such as 'doi:10.34990/FK2/ABC123' or 'https://doi.org/10.34990/FK2/ABC123', or numeric database IDs). Maximum {BATCH_MAX_IDENTIFIERS}."
+                    },
+                    "format": FORMAT_PROPERTY
+                },
+                "required": ["identifiers"]
+            }
+        ),
         Tool(
             name="list_dataset_files",
             description="List all files in a specific dataset from Borealis Dataverse. Use this when the user asks what files are in a dataset or wants to see the file list. Returns file names, sizes, formats, descriptions, and access restrictions. By default shows first 20 files; user can request more or filter by file type.",
@@ -309,14 +1436,15 @@ async def list_tools() -> list[Tool]:
                     "file_type": {
                         "type": "string",
                         "description": "Optional: Filter by file type or search in filenames (e.g., 'csv', 'readme', 'pdf', 'spss', 'data'). Searches in both filename and friendly type."
-                    }
+                    },
+                    "format": FORMAT_PROPERTY
                 },
                 "required": ["identifier"]
             }
         ),
         Tool(
             name="get_dataset_file",
-            description="Download and retrieve the content of a specific file from a Borealis dataset. Use this when the user wants to examine, analyze, or explore a specific file. IMPORTANT: Only supports text-based files under 5MB. Binary files (PDF, ZIP, Excel) and large data files are not suitable for chat display. By default, file content is truncated to the first 100 lines to protect Claude's context window. You can request up to 2,000 lines via the max_lines parameter. When truncation occurs, inform the user of the limit and offer to re-fetch with more lines (up to 2,000) or to download the file directly from Borealis.",
+            description="Download and retrieve the content of a specific file from a Borealis dataset. Use this when the user wants to examine, analyze, or explore a specific file. IMPORTANT: Only supports text-based files; at most 5MB of lines are shown per call. Binary files (PDF, ZIP, Excel) are not suitable for chat display. By default, file content is truncated to the first 100 lines to protect Claude's context window. You can request up to 2,000 lines via the max_lines parameter, and page through a large file with start_line. When truncation occurs, inform the user of the limit and offer to show the next lines, re-fetch with more lines (up to 2,000) or download the file directly from Borealis. For a quick look at a whole large file, use preview='sample': the header, the last lines and a random sample of lines in between, within a character budget.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -332,30 +1460,253 @@ async def list_tools() -> list[Tool]:
                         "type": "integer",
                         "description": "Maximum number of lines to display (default: 100, maximum: 2000). Increase if the user wants to see more of the file."
                     },
+                    "start_line": {
+                        "type": "integer",
+                        "description": "First line to display, counting from 1 (default: 1). Use to page through a large file, e.g. start_line=50000 to show lines 50,000 onward.",
+                        "default": 1
+                    },
+                    "columns": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Optional: Names of the columns to fetch from an ingested tabular file (e.g. ['age', 'province']). Only those columns are downloaded, so a few columns of a wide survey file cost a fraction of the bytes."
+                    },
+                    "file_format": {
+                        "type": "string",
+                        "enum": ["tab", "original"],
+                        "description": "Which version of an ingested tabular file to read: 'tab' (default) is Borealis' tab-delimited archival copy, 'original' the file as uploaded (e.g. a CSV). Other files have only one version.",
+                        "default": "tab"
+                    },
+                    "preview": {
+                        "type": "string",
+                        "enum": ["head", "sample"],
+                        "description": "'head' (default) shows consecutive lines from start_line. 'sample' reads the whole file once and shows its first lines, last lines and randomly sampled lines in between, with the omitted line ranges marked; max_lines and start_line are ignored.",
+                        "default": "head"
+                    },
+                    "max_chars": {
+                        "type": "integer",
+                        "description": "Character budget for preview='sample' (default: 8000, maximum: 100000; about 4 characters per token).",
+                        "default": PREVIEW_DEFAULT_CHARS
+                    },
                     "doi": {
                         "type": "string",
                         "description": "Optional: The DOI URL of the parent dataset (e.g., 'https://doi.org/10.34990/FK2/ABC123'). Included in truncation messages so the user can download the full file directly."
-                    }
+                    },
+                    "format": FORMAT_PROPERTY
+                },
+                "required": ["file_id"]
+            }
+        ),
+        Tool(
+            name="profile_tabular_file",
+            description="Summarize a CSV, TSV or tab-delimited data file from a Borealis dataset without reading it into the conversation. Streams the whole file once (files far larger than get_dataset_file's 5MB limit are supported) and reports the delimiter, header, row count and, for each column, its inferred type, null count, distinct values, min/max/mean/standard deviation for numeric columns and the most frequent values for categorical ones. Prefer this over get_dataset_file when the user wants to understand what a data file contains.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "file_id": {
+                        "type": "string",
+                        "description": "The numeric file ID from the file list (e.g., '276461'). Get this from list_dataset_files."
+                    },
+                    "filename": {
+                        "type": "string",
+                        "description": "Optional: The filename, used to check the format and in messages."
+                    },
+                    "top_k": {
+                        "type": "integer",
+                        "description": "Most frequent values to list for categorical columns (default: 5, maximum: 20).",
+                        "default": 5
+                    },
+                    "format": FORMAT_PROPERTY
+                },
+                "required": ["file_id"]
+            }
+        ),
+        Tool(
+            name="search_in_file",
+            description="Search a text file from a Borealis dataset for a word, variable name or regular expression, like grep, and return only the matching lines with their line numbers and surrounding context. The file is streamed and not held in memory, so files far larger than get_dataset_file's 5MB limit can be searched. Use this instead of get_dataset_file when looking for something specific in a file; follow up with get_dataset_file and start_line to read around a match.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "file_id": {
+                        "type": "string",
+                        "description": "The numeric file ID from the file list (e.g., '276461'). Get this from list_dataset_files."
+                    },
+                    "pattern": {
+                        "type": "string",
+                        "description": "Text to look for. Matched literally unless regex is true."
+                    },
+                    "filename": {
+                        "type": "string",
+                        "description": "Optional: The filename, used to check the format and in messages."
+                    },
+                    "regex": {
+                        "type": "boolean",
+                        "description": "Treat pattern as a Python regular expression (default: false).",
+                        "default": False
+                    },
+                    "ignore_case": {
+                        "type": "boolean",
+                        "description": "Match regardless of case (default: false).",
+                        "default": False
+                    },
+                    "context": {
+                        "type": "integer",
+                        "description": "Lines of context to show before and after each match (default: 2, maximum: 10).",
+                        "default": 2
+                    },
+                    "max_matches": {
+                        "type": "integer",
+                        "description": "Stop after this many matching lines (default: 20, maximum: 200).",
+                        "default": 20
+                    },
+                    "start_line": {
+                        "type": "integer",
+                        "description": "Line to start searching from (default: 1). Use the value suggested in a previous result to find further matches.",
+                        "default": 1
+                    },
+                    "format": FORMAT_PROPERTY
+                },
+                "required": ["file_id", "pattern"]
+            }
+        ),
+        Tool(
+            name="describe_file_variables",
+            description="List the variables (columns) of an ingested tabular data file in a Borealis dataset, with their labels, types and the summary statistics and value labels Borealis computed at ingest, without downloading any data. Works for files of any size in a few kilobytes. Use this first to answer 'what's in this file' or to find the columns to fetch with get_dataset_file's columns parameter. Only ingested tabular files (usually listed as Tab-Delimited) have this metadata; use profile_tabular_file for other CSV files.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "file_id": {
+                        "type": "string",
+                        "description": "The numeric file ID from the file list (e.g., '276461'). Get this from list_dataset_files."
+                    },
+                    "filename": {
+                        "type": "string",
+                        "description": "Optional: The filename, used in messages."
+                    },
+                    "filter": {
+                        "type": "string",
+                        "description": "Optional: Only list variables whose name or label contains this text (case-insensitive), e.g. 'income'."
+                    },
+                    "limit": {
+                        "type": "integer",
+                        "description": "Maximum number of variables to list (default: 100, maximum: 1000).",
+                        "default": 100
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "description": "Number of variables to skip (for pagination).",
+                        "default": 0
+                    },
+                    "format": FORMAT_PROPERTY
                 },
                 "required": ["file_id"]
             }
         )
     ]
+    if STATS_TOOL_ENABLED:
+        tools.append(Tool(
+            name="server_stats",
+            description="Report this server's runtime statistics: per-tool call counts and latency, upstream Borealis requests by endpoint and status, API key fallbacks, bytes downloaded versus returned, and cache hit ratios. For operators diagnosing performance; not needed to answer research questions.",
+            inputSchema={
+                "type": "object",
+                "properties": {}
+            }
+        ))
+    return tools
 
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
-    """Handle tool calls."""
+    """Handle tool calls, recording latency and output size."""
+    started = time.perf_counter()
+    outcome = "error"
+    returned = 0
+    try:
+        result = await dispatch_tool(name, arguments)
+        returned = sum(len(item.text.encode("utf-8")) for item in result if isinstance(item, TextContent))
+        outcome = "ok"
+        return result
+    finally:
+        label = name if name in TOOL_NAMES else "unknown"
+        metrics.record_tool(label, time.perf_counter() - started, outcome, returned)
+
+async def dispatch_tool(name: str, arguments: dict) -> list[TextContent]:
+    """Route a tool call to its handler."""
     if name == "search_datasets":
         return await search_datasets(arguments)
     elif name == "get_dataset_metadata":
         return await get_dataset_metadata(arguments)
+    elif name == "get_datasets_metadata":
+        return await get_datasets_metadata(arguments)
     elif name == "list_dataset_files":
         return await list_dataset_files(arguments)
     elif name == "get_dataset_file":
         return await get_dataset_file(arguments)
+    elif name == "profile_tabular_file":
+        return await profile_tabular_file(arguments)
+    elif name == "search_in_file":
+        return await search_in_file(arguments)
+    elif name == "describe_file_variables":
+        return await describe_file_variables(arguments)
+    elif name == "server_stats" and STATS_TOOL_ENABLED:
+        return await server_stats(arguments)
     else:
         raise ValueError(f"Unknown tool: {name}")
 
+# Handlers build a structured result (a dict with a "kind") and render it in
+# the format the caller asked for. Markdown is the original layout; compact
+# keeps only the essentials, one line per item; json is the result itself.
+OUTPUT_FORMATS = ("markdown", "compact", "json")
+RENDERERS = {}
+
+# Shared "format" parameter of the tools with structured results
+FORMAT_PROPERTY = {
+    "type": "string",
+    "description": "Output layout: 'markdown' (default, full detail), 'compact' (one line per item with only the essentials; several times smaller for long result lists) or 'json' (structured data).",
+    "enum": list(OUTPUT_FORMATS),
+    "default": "markdown"
+}
+
+def renderer(kind: str, format_name: str):
+    """Register a function rendering results of one kind in one format."""
+    def register(function):
+        RENDERERS[(kind, format_name)] = function
+        return function
+    return register
+
+def output_format(arguments: dict) -> Optional[str]:
+    """Return the requested output format, or None if it isn't one we know."""
+    requested = str(arguments.get("format") or "markdown").strip().lower()
+    return requested if requested in OUTPUT_FORMATS else None
+
+def format_error(arguments: dict) -> list[TextContent]:
+    """Build the error returned for an unknown output format."""
+    return [TextContent(
+        type="text",
+        text=f"Error: Unknown format '{arguments.get('format')}'. Use one of: {', '.join(OUTPUT_FORMATS)}."
+    )]
+
+def render_result(result: dict, requested_format: str) -> list[TextContent]:
+    """Render a structured result as tool output."""
+    if requested_format == "json":
+        text = json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+    else:
+        text = RENDERERS[(result["kind"], requested_format)](result)
+    return [TextContent(type="text", text=text)]
+
+def format_size(size: int) -> str:
+    """Format a byte count for readability."""
+    if size < 1024:
+        return f"{size} bytes"
+    elif size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    elif size < 1024 * 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    return f"{size / (1024 * 1024 * 1024):.2f} GB"
+
+def compact_cell(value: Any, limit: int = 80) -> str:
+    """Flatten a value into one pipe-free table cell of at most limit characters."""
+    text = " ".join(str(value).split()).replace("|", "/")
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
 def format_authors(authors: list) -> str:
     """Format author list - show all if 3 or fewer, otherwise show first + et al."""
     if not authors:
@@ -374,178 +1725,879 @@ def format_date(date_string: str) -> str:
     # Extract just the year (first 4 characters)
     return date_string[:4]
 
-async def search_datasets(arguments: dict) -> list[TextContent]:
-    """Search for datasets in Borealis Dataverse."""
-    query = arguments.get("query", "*")
-    # Normalize boolean operators to uppercase so Borealis treats them as boolean logic.
-    # The API requires AND/OR/NOT in uppercase; lowercase versions are treated as keywords.
+def normalize_identifier(identifier: str) -> str:
+    """Normalize a DOI URL, bare DOI or numeric ID to the form the API expects."""
+    identifier = identifier.strip()
+    # If it's a full DOI URL, extract just the DOI part
+    if identifier.startswith("http"):
+        # Extract DOI from URL like https://doi.org/10.34990/FK2/ABC123
+        identifier = identifier.split("doi.org/")[-1]
+        if not identifier.startswith("doi:"):
+            identifier = f"doi:{identifier}"
+    elif not identifier.startswith("doi:") and not identifier.isdigit():
+        # If it looks like a DOI but doesn't have the prefix, add it
+        identifier = f"doi:{identifier}"
+    return identifier
+
+def normalize_search_query(query: str) -> str:
+    """Normalize boolean operators and whitespace in a search query."""
+    # Normalize boolean operators to uppercase so Borealis treats them as boolean logic.
+    # The API requires AND/OR/NOT in uppercase; lowercase versions are treated as keywords.
     # Word boundaries prevent false matches inside words (e.g., "Oregon", "android").
     query = re.sub(r'\b(and|or|not)\b', lambda m: m.group(0).upper(), query, flags=re.IGNORECASE)
-    per_page = arguments.get("per_page", 10)
-    sort_field = arguments.get("sort", "relevance")
-    result_type = arguments.get("type")
-    dataverse = arguments.get("dataverse")
-    country = arguments.get("country")
-    province = arguments.get("province")
-    city = arguments.get("city")
+    # Collapse runs of whitespace so trivially different queries look the same
+    return " ".join(query.split()) or "*"
+
+# Deep search: results per API page (the API maximum), the most results one
+# call may fetch, and how many pages are requested at once
+SEARCH_API_PAGE_SIZE = 100
+SEARCH_MAX_RESULTS = _env_int("BOREALIS_SEARCH_MAX_RESULTS", 1000)
+SEARCH_PAGE_CONCURRENCY = _env_int("BOREALIS_SEARCH_CONCURRENCY", 4)
+
+# Optional local full-text index of harvested dataverse subtrees. When
+# BOREALIS_INDEX_DIR is set and a subtree has been harvested (see
+# `borealis_server.py harvest`), searches limited to that subtree are answered
+# from SQLite FTS5 with BM25 ranking as long as the harvest is younger than
+# BOREALIS_INDEX_MAX_AGE seconds; otherwise the live API is used.
+INDEX_DIR = os.environ.get("BOREALIS_INDEX_DIR", "")
+INDEX_MAX_AGE = _env_float("BOREALIS_INDEX_MAX_AGE", 86400.0)
+INDEX_GEO_FIELD = "geospatial:geographicCoverage"
+INDEX_TYPES = ("dataset", "dataverse")
+
+# Column weights for bm25(): name, description, keywords, authors, other
+INDEX_BM25_WEIGHTS = (5.0, 1.0, 3.0, 2.0, 1.0)
+
+# Incremental sync of harvested subtrees every BOREALIS_SYNC_INTERVAL seconds
+# while the server runs (0 = only via `borealis_server.py sync`)
+SYNC_INTERVAL = _env_float("BOREALIS_SYNC_INTERVAL", 0.0)
+
+def item_date(item: dict) -> str:
+    """Date the search API sorts a record by (release date, or creation date for drafts)."""
+    return item.get("published_at") or item.get("createdAt") or ""
+
+def index_geo_values(item: dict) -> list:
+    """Return (field, folded value) pairs from a record's geographic coverage."""
+    values = []
+    block = (item.get("metadataBlocks") or {}).get("geospatial") or {}
+    for field in block.get("fields", []):
+        if field.get("typeName") != "geographicCoverage":
+            continue
+        for coverage in field.get("value") or []:
+            for part in ("country", "state", "city"):
+                value = (coverage.get(part) or {}).get("value")
+                if value:
+                    values.append((part, value.strip().casefold()))
+    return values
+
+def fts_query(query: str) -> Optional[str]:
+    """Translate a normalized search query into an FTS5 MATCH expression.
+
+    Returns "" for a match-all query, or None when the query uses syntax the
+    index can't reproduce (field queries, +/- prefixes, a leading NOT), in
+    which case the live API answers instead.
+    """
+    tokens = re.findall(r'"[^"]*"|\(|\)|[^\s()"]+', query)
+    if tokens == ["*"]:
+        return ""
+    parts = []
+    for token in tokens:
+        if token in ("AND", "OR", "NOT"):
+            if token == "NOT" and parts and parts[-1] == "AND":
+                parts[-1] = "NOT"  # "a AND NOT b" is FTS5's "a NOT b"
+                continue
+            if token == "NOT" and (not parts or parts[-1] in ("(", "OR")):
+                return None  # FTS5's NOT needs a left-hand side
+            parts.append(token)
+        elif token in ("(", ")"):
+            parts.append(token)
+        elif token.startswith('"'):
+            phrase = token.strip('"').strip()
+            if not phrase:
+                return None
+            parts.append('"' + phrase.replace('"', '""') + '"')
+        elif ":" in token or token[0] in "+-" or "?" in token or "*" in token[:-1]:
+            return None
+        elif token.endswith("*"):
+            parts.append('"' + token[:-1] + '"*')
+        else:
+            parts.append('"' + token + '"')
+    if not parts or parts[-1] in ("AND", "OR", "NOT"):
+        return None
+    return " ".join(parts)
+
+class SearchIndex:
+    """SQLite FTS5 index of search records harvested from dataverse subtrees.
+
+    Dataset and dataverse records are stored once with their original search
+    API item, linked to every harvested subtree they appeared in, with their
+    geographic coverage kept in a side table for the country/state/city
+    filters. Methods are blocking; call them through asyncio.to_thread().
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, "search_index.sqlite3")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=10000")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " id INTEGER PRIMARY KEY,"
+            " key TEXT UNIQUE NOT NULL,"
+            " type TEXT NOT NULL,"
+            " name TEXT,"
+            " published_at TEXT,"
+            " item TEXT NOT NULL);"
+            "CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5("
+            " name, description, keywords, authors, other,"
+            " tokenize='porter unicode61 remove_diacritics 2');"
+            "CREATE TABLE IF NOT EXISTS record_subtrees ("
+            " subtree TEXT NOT NULL,"
+            " record_id INTEGER NOT NULL,"
+            " PRIMARY KEY (subtree, record_id));"
+            "CREATE TABLE IF NOT EXISTS record_geo ("
+            " record_id INTEGER NOT NULL,"
+            " field TEXT NOT NULL,"
+            " value TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS record_geo_lookup ON record_geo(field, value, record_id);"
+            "CREATE TABLE IF NOT EXISTS subtrees ("
+            " alias TEXT PRIMARY KEY,"
+            " synced_at REAL NOT NULL,"
+            " records INTEGER NOT NULL,"
+            " geo_indexed INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS sync_state ("
+            " alias TEXT PRIMARY KEY,"
+            " high_water TEXT NOT NULL,"
+            " last_run REAL,"
+            " last_changed INTEGER,"
+            " last_seconds REAL);"
+            "CREATE TABLE IF NOT EXISTS manifests ("
+            " key TEXT PRIMARY KEY,"
+            " version_id INTEGER,"
+            " files TEXT NOT NULL,"
+            " stored_at REAL NOT NULL);"
+        )
+
+    def _upsert(self, item: dict) -> int:
+        """Insert or replace one record and its full-text and geo rows; returns its id."""
+        key = search_item_key(item)
+        stored = {k: v for k, v in item.items() if k != "metadataBlocks"}
+        row = self._conn.execute("SELECT id, item FROM records WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            record_id = self._conn.execute(
+                "INSERT INTO records (key, type, name, published_at, item) VALUES (?, ?, ?, ?, ?)",
+                (key, item.get("type", ""), item.get("name", ""), item.get("published_at", ""), json.dumps(stored)),
+            ).lastrowid
+        else:
+            record_id = row[0]
+            if row[1] != json.dumps(stored):
+                # A changed record may have a new version with other files
+                self._conn.execute("DELETE FROM manifests WHERE key = ?", (key.casefold(),))
+            self._conn.execute(
+                "UPDATE records SET type = ?, name = ?, published_at = ?, item = ? WHERE id = ?",
+                (item.get("type", ""), item.get("name", ""), item.get("published_at", ""), json.dumps(stored), record_id),
+            )
+            self._conn.execute("DELETE FROM records_fts WHERE rowid = ?", (record_id,))
+            self._conn.execute("DELETE FROM record_geo WHERE record_id = ?", (record_id,))
+        geo = index_geo_values(item)
+        other = [item.get("publisher", ""), item.get("name_of_dataverse", ""), item.get("global_id", "")]
+        other.extend(value for _, value in geo)
+        self._conn.execute(
+            "INSERT INTO records_fts (rowid, name, description, keywords, authors, other) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                record_id,
+                item.get("name", ""),
+                item.get("description", ""),
+                " ".join(item.get("keywords", []) + item.get("subjects", [])),
+                " ".join(item.get("authors", [])),
+                " ".join(v for v in other if v),
+            ),
+        )
+        self._conn.executemany(
+            "INSERT INTO record_geo (record_id, field, value) VALUES (?, ?, ?)",
+            [(record_id, field, value) for field, value in geo],
+        )
+        return record_id
+
+    def replace_subtree(self, alias: str, items: list, geo_indexed: bool) -> None:
+        """Replace everything known about a subtree with a complete harvest."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM record_subtrees WHERE subtree = ?", (alias,))
+                for item in items:
+                    record_id = self._upsert(item)
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO record_subtrees (subtree, record_id) VALUES (?, ?)", (alias, record_id)
+                    )
+                self._remove_orphans()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO subtrees (alias, synced_at, records, geo_indexed) VALUES (?, ?, ?, ?)",
+                    (alias, time.time(), len(items), int(geo_indexed)),
+                )
+                self._conn.execute(
+                    "INSERT INTO sync_state (alias, high_water) VALUES (?, ?)"
+                    " ON CONFLICT (alias) DO UPDATE SET high_water = excluded.high_water",
+                    (alias, max((item_date(item) for item in items), default="")),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def apply_changes(self, alias: str, items: list, manifests: dict, high_water: str, seconds: float) -> int:
+        """Upsert records changed since the last sync and their file manifests.
+
+        `manifests` maps a dataset's folded identifier to (version_id, files).
+        Returns the number of records now in the subtree.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for item in items:
+                    record_id = self._upsert(item)
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO record_subtrees (subtree, record_id) VALUES (?, ?)", (alias, record_id)
+                    )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO manifests (key, version_id, files, stored_at) VALUES (?, ?, ?, ?)",
+                    [(key, version_id, json.dumps(files), now) for key, (version_id, files) in manifests.items()],
+                )
+                count = self._conn.execute(
+                    "SELECT COUNT(*) FROM record_subtrees WHERE subtree = ?", (alias,)
+                ).fetchone()[0]
+                self._conn.execute(
+                    "UPDATE subtrees SET synced_at = ?, records = ? WHERE alias = ?", (now, count, alias)
+                )
+                self._conn.execute(
+                    "UPDATE sync_state SET high_water = MAX(high_water, ?), last_run = ?, last_changed = ?,"
+                    " last_seconds = ? WHERE alias = ?",
+                    (high_water, now, len(items), seconds, alias),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return count
+
+    def changed_items(self, items: list) -> list:
+        """Return the items that are new or differ from the stored records."""
+        changed = []
+        with self._lock:
+            for item in items:
+                row = self._conn.execute("SELECT item FROM records WHERE key = ?", (search_item_key(item),)).fetchone()
+                stored = {k: v for k, v in item.items() if k != "metadataBlocks"}
+                if row is None or row[0] != json.dumps(stored):
+                    changed.append(item)
+        return changed
+
+    def high_water(self, alias: str) -> Optional[str]:
+        """Return the newest record date seen in a subtree, or None if it was never harvested."""
+        with self._lock:
+            row = self._conn.execute("SELECT high_water FROM sync_state WHERE alias = ?", (alias,)).fetchone()
+        return row[0] if row else None
+
+    def subtree_aliases(self) -> list:
+        """Return the aliases of all harvested subtrees."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT alias FROM subtrees ORDER BY alias")]
+
+    def manifest(self, key: str) -> Optional[tuple]:
+        """Return (version_id, files) stored by a sync for a dataset, if still fresh."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version_id, files, stored_at FROM manifests WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or time.time() - row[2] > INDEX_MAX_AGE:
+            return None
+        return row[0], json.loads(row[1])
+
+    def _remove_orphans(self) -> None:
+        # Records that no harvested subtree contains any more
+        orphans = [row[0] for row in self._conn.execute(
+            "SELECT id FROM records WHERE id NOT IN (SELECT record_id FROM record_subtrees)"
+        )]
+        for record_id in orphans:
+            key = self._conn.execute("SELECT key FROM records WHERE id = ?", (record_id,)).fetchone()[0]
+            self._conn.execute("DELETE FROM manifests WHERE key = ?", (key.casefold(),))
+            self._conn.execute("DELETE FROM records WHERE id = ?", (record_id,))
+            self._conn.execute("DELETE FROM records_fts WHERE rowid = ?", (record_id,))
+            self._conn.execute("DELETE FROM record_geo WHERE record_id = ?", (record_id,))
+
+    def subtree(self, alias: str) -> Optional[dict]:
+        """Return the harvest state of a subtree, or None if it was never harvested."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_at, records, geo_indexed FROM subtrees WHERE alias = ?", (alias,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"alias": alias, "synced_at": row[0], "records": row[1], "geo_indexed": bool(row[2])}
+
+    def search(self, request: dict, match: str, start: int, per_page: int) -> Optional[dict]:
+        """Answer a canonical search request from the index, shaped like a /search response.
+
+        Returns None when the request's subtree isn't harvested, the harvest
+        is stale, or geographic filters are used without indexed coverage.
+        """
+        info = self.subtree(request["dataverse"])
+        if info is None or time.time() - info["synced_at"] > INDEX_MAX_AGE:
+            return None
+        if request["fq"] and not info["geo_indexed"]:
+            return None
+        
+        joins = ["JOIN record_subtrees s ON s.record_id = r.id AND s.subtree = ?"]
+        where = []
+        params: list = [request["dataverse"]]
+        if match:
+            joins.append("JOIN records_fts ON records_fts.rowid = r.id")
+            where.append("records_fts MATCH ?")
+            params.append(match)
+        if request["type"]:
+            where.append("r.type = ?")
+            params.append(request["type"])
+        for fq in request["fq"]:
+            field, _, value = fq.partition(":")
+            where.append("EXISTS (SELECT 1 FROM record_geo g WHERE g.record_id = r.id AND g.field = ? AND g.value = ?)")
+            params.extend([field, value.strip().casefold()])
+        sql = "FROM records r " + " ".join(joins) + (" WHERE " + " AND ".join(where) if where else "")
+        
+        if request["sort"] == "date":
+            order = "r.published_at DESC"
+        elif request["sort"] == "name":
+            order = "r.name COLLATE NOCASE ASC"
+        elif match:
+            order = "bm25(records_fts, {}, {}, {}, {}, {})".format(*INDEX_BM25_WEIGHTS)
+        else:
+            order = "r.published_at DESC"
+        
+        with self._lock:
+            total = self._conn.execute(f"SELECT COUNT(*) {sql}", params).fetchone()[0]
+            rows = self._conn.execute(
+                f"SELECT r.item {sql} ORDER BY {order}, r.id LIMIT ? OFFSET ?", params + [per_page, start]
+            ).fetchall()
+        return {
+            "status": "OK",
+            "data": {"total_count": total, "items": [json.loads(row[0]) for row in rows]},
+            "local_index": info,
+        }
+
+    def stats(self) -> dict:
+        """Return the harvested subtrees with their last sync, and record counts."""
+        with self._lock:
+            records = self._conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+            manifests = self._conn.execute("SELECT COUNT(*) FROM manifests").fetchone()[0]
+            subtrees = self._conn.execute(
+                "SELECT s.alias, s.synced_at, s.records, y.high_water, y.last_changed, y.last_seconds"
+                " FROM subtrees s LEFT JOIN sync_state y ON y.alias = s.alias ORDER BY s.alias"
+            ).fetchall()
+        return {
+            "records": records,
+            "manifests": manifests,
+            "subtrees": {
+                alias: {
+                    "records": count,
+                    "age_seconds": round(time.time() - synced_at),
+                    "high_water": high_water,
+                    "last_sync_changed": last_changed,
+                    "last_sync_seconds": last_seconds,
+                }
+                for alias, synced_at, count, high_water, last_changed, last_seconds in subtrees
+            },
+        }
+
+search_index: Optional[SearchIndex] = None
+if INDEX_DIR:
+    try:
+        search_index = SearchIndex(os.path.expanduser(INDEX_DIR))
+    except (OSError, sqlite3.Error) as e:
+        logger.warning("Local search index disabled: cannot open %s: %s", INDEX_DIR, e)
+
+async def search_local_index(request: dict, start: int, per_page: int) -> Optional[dict]:
+    """Answer a search from the local index if it covers the request, else return None."""
+    if search_index is None or not request["dataverse"]:
+        return None
+    # No type filter means files too, which the index doesn't hold
+    if request["type"] not in INDEX_TYPES:
+        return None
+    match = fts_query(request["query"])
+    if match is None:
+        return None
+    try:
+        return await asyncio.to_thread(search_index.search, request, match, start, per_page)
+    except sqlite3.Error as e:
+        # e.g. a query FTS5 can't parse; the live API will answer it
+        logger.debug("Local index could not answer %r: %s", request["query"], e)
+        return None
+
+async def fetch_subtree_page(alias: str, start: int) -> dict:
+    """Fetch one page of a subtree's dataset and dataverse records, newest first."""
+    data, _ = await fetch_json(
+        f"{BOREALIS_BASE_URL}/search",
+        {
+            "q": "*",
+            "subtree": alias,
+            "type": list(INDEX_TYPES),
+            "sort": "date",
+            "order": "desc",
+            "metadata_fields": INDEX_GEO_FIELD,
+            "per_page": SEARCH_API_PAGE_SIZE,
+            "start": start,
+        },
+        timeout=SEARCH_TIMEOUT
+    )
+    if data.get("status") != "OK":
+        raise APIStatusError(data.get("status"))
+    return data.get("data", {})
+
+async def harvest_subtree(alias: str) -> int:
+    """Fetch every dataset and dataverse record in a subtree into the local index.
+
+    Pages are requested concurrently after the first one and include each
+    dataset's geographic coverage. Returns the record count.
+    """
+    first_page = await fetch_subtree_page(alias, 0)
+    total_count = first_page.get("total_count", 0)
+    pages = [first_page.get("items", [])]
+    semaphore = asyncio.Semaphore(SEARCH_PAGE_CONCURRENCY)
     
-    # Validate per_page
-    if per_page > 100:
-        per_page = 100
+    async def fetch_rest(start: int) -> list:
+        async with semaphore:
+            return (await fetch_subtree_page(alias, start)).get("items", [])
+    
+    pages.extend(await asyncio.gather(*(
+        fetch_rest(start) for start in range(SEARCH_API_PAGE_SIZE, total_count, SEARCH_API_PAGE_SIZE)
+    )))
+    items = {}
+    for page_items in pages:
+        for item in page_items:
+            items.setdefault(search_item_key(item), item)
+    # The API leaves metadataBlocks out when it doesn't support metadata_fields
+    geo_indexed = any("metadataBlocks" in item for item in items.values())
+    await asyncio.to_thread(search_index.replace_subtree, alias, list(items.values()), geo_indexed)
+    return len(items)
+
+async def sync_subtree(alias: str) -> dict:
+    """Bring a harvested subtree up to date; returns a report of the run.
+
+    Pages sorted by date are read only until a record older than the stored
+    high-water mark shows up. Changed records are upserted and the file
+    manifests of changed datasets refreshed. The incremental pass can't see
+    deletions, so if the subtree's record count then differs from the API's
+    total, the whole subtree is harvested again.
+    """
+    started = time.monotonic()
+    high_water = await asyncio.to_thread(search_index.high_water, alias)
+    if high_water is None:
+        count = await harvest_subtree(alias)
+        return {"subtree": alias, "mode": "full", "records_changed": count, "manifests_updated": 0,
+                "pages": None, "seconds": round(time.monotonic() - started, 2)}
+    
+    fresh = []
+    pages = 0
+    start = 0
+    total_count = 0
+    while True:
+        page = await fetch_subtree_page(alias, start)
+        pages += 1
+        total_count = page.get("total_count", 0)
+        items = page.get("items", [])
+        # Records dated the same as the mark are read again, in case several
+        # share a timestamp; only those that differ from the index count
+        page_fresh = [item for item in items if item_date(item) >= high_water]
+        fresh.extend(page_fresh)
+        start += len(items)
+        if len(page_fresh) < len(items) or not items or start >= total_count:
+            break
+    changed = await asyncio.to_thread(search_index.changed_items, fresh)
+    
+    # Refresh the file lists of changed datasets
+    manifests = {}
+    semaphore = asyncio.Semaphore(SEARCH_PAGE_CONCURRENCY)
+    
+    async def refresh_manifest(identifier: str) -> None:
+        async with semaphore:
+            try:
+                manifest = await build_file_manifest(identifier)
+            except (httpx.HTTPError, APIStatusError) as e:
+                logger.warning("Sync of '%s': cannot fetch file list of %s: %s", alias, identifier, e)
+                return
+            manifests[identifier.casefold()] = (manifest.version_id, manifest.files)
+    
+    await asyncio.gather(*(
+        refresh_manifest(item["global_id"]) for item in changed
+        if item.get("type") == "dataset" and item.get("global_id")
+    ))
     
-    # If dataverse is specified, try to map university name to identifier
-    if dataverse:
-        # Normalize the input (lowercase, strip whitespace)
-        normalized = dataverse.lower().strip()
-        # Look up in mapping, or use as-is if not found (might already be an identifier)
-        dataverse = UNIVERSITY_DATAVERSE_MAP.get(normalized, dataverse)
+    new_high_water = max((item_date(item) for item in changed), default=high_water)
+    seconds = time.monotonic() - started
+    count = await asyncio.to_thread(
+        search_index.apply_changes, alias, changed, manifests, new_high_water, round(seconds, 3)
+    )
+    report = {"subtree": alias, "mode": "incremental", "records_changed": len(changed),
+              "manifests_updated": len(manifests), "pages": pages, "seconds": round(seconds, 2)}
+    if count != total_count:
+        # Something was deleted or deaccessioned; start over
+        logger.info("Sync of '%s': index has %d records but the API reports %d; harvesting again",
+                    alias, count, total_count)
+        report["records_changed"] = await harvest_subtree(alias)
+        report["mode"] = "full (record count changed)"
+        report["seconds"] = round(time.monotonic() - started, 2)
+    return report
+
+def format_sync_report(report: dict) -> str:
+    """One-line summary of a sync run."""
+    return (f"Synced '{report['subtree']}' ({report['mode']}): {report['records_changed']} records changed, "
+            f"{report['manifests_updated']} file lists updated in {report['seconds']:.2f}s")
+
+async def sync_all_subtrees(aliases: Optional[list] = None) -> list:
+    """Sync the given (or all harvested) subtrees one after another; returns the reports."""
+    if aliases is None:
+        aliases = await asyncio.to_thread(search_index.subtree_aliases)
+    reports = []
+    for alias in aliases:
+        try:
+            report = await sync_subtree(alias)
+        except (httpx.HTTPError, APIStatusError, sqlite3.Error) as e:
+            logger.warning("Sync of '%s' failed: %s", alias, e)
+            continue
+        except Exception:
+            # e.g. an unexpected payload; the other subtrees still sync
+            logger.exception("Sync of '%s' failed unexpectedly", alias)
+            continue
+        logger.info(format_sync_report(report))
+        reports.append(report)
+    return reports
+
+async def sync_loop(interval: float) -> None:
+    """Sync all harvested subtrees every interval seconds until cancelled."""
+    while True:
+        # An error must not end the task: nothing would restart it
+        try:
+            await sync_all_subtrees()
+        except Exception:
+            logger.exception("Background sync failed; trying again in %.0fs", interval)
+        await asyncio.sleep(interval)
+
+async def fetch_search_page(request: dict, start: int, per_page: int) -> dict:
+    """Return one page of /search results for a canonical request, using the caches.
+
+    `request` holds the normalized query, sort, type, dataverse and fq
+    filters. Requests the local index covers are answered from it (the
+    result then has a "local_index" entry). Raises APIStatusError if the API
+    reports a non-OK status.
+    """
+    local = await search_local_index(request, start, per_page)
+    if local is not None:
+        return local
     
-    # Build query parameters
     params = {
-        "q": query,
+        "q": request["query"],
         "per_page": per_page,
     }
+    if start:
+        params["start"] = start
     
     # Add sort parameters if not relevance (default)
-    if sort_field != "relevance":
-        params["sort"] = sort_field
-        params["order"] = "desc" if sort_field == "date" else "asc"
+    if request["sort"] != "relevance":
+        params["sort"] = request["sort"]
+        params["order"] = "desc" if request["sort"] == "date" else "asc"
     
     # Add type filter if specified
-    if result_type:
-        params["type"] = result_type
+    if request["type"]:
+        params["type"] = request["type"]
     
     # Add dataverse/subtree filter if specified
-    if dataverse:
-        params["subtree"] = dataverse
-    
-    # Add geographic filters using fq (filter query) parameter
-    # Multiple fq parameters can be combined
-    if country:
-        params["fq"] = f"country:{country}"
-    
-    if province:
-        # If we already have an fq param, we need to handle multiple filters
-        # The API accepts multiple fq parameters as separate query params
-        fq_value = f"state:{province}"
-        if "fq" in params:
-            # httpx will handle multiple values for the same parameter
-            if isinstance(params["fq"], list):
-                params["fq"].append(fq_value)
-            else:
-                params["fq"] = [params["fq"], fq_value]
-        else:
-            params["fq"] = fq_value
+    if request["dataverse"]:
+        params["subtree"] = request["dataverse"]
     
-    if city:
-        fq_value = f"city:{city}"
-        if "fq" in params:
-            if isinstance(params["fq"], list):
-                params["fq"].append(fq_value)
-            else:
-                params["fq"] = [params["fq"], fq_value]
-        else:
-            params["fq"] = fq_value
+    # The API accepts multiple fq parameters; httpx sends a list as repeated
+    # query params
+    if request["fq"]:
+        params["fq"] = request["fq"]
     
-    # Prepare headers - only add API key if it exists and looks valid
-    headers = {}
-    use_auth = False
-    if API_KEY and len(API_KEY) > 10:  # Basic validation
-        headers["X-Dataverse-key"] = API_KEY
-        use_auth = True
+    # Canonical form of the request, used as the result cache key
+    cache_key = (request["query"], per_page, request["sort"], request["type"],
+                 request["dataverse"], tuple(request["fq"]), start)
     
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{BOREALIS_BASE_URL}/search",
-                params=params,
-                headers=headers
-            )
-            
-            # If we get a 401 with auth, try again without auth for public search
-            if response.status_code == 401 and use_auth:
-                headers = {}  # Remove auth header
-                response = await client.get(
-                    f"{BOREALIS_BASE_URL}/search",
-                    params=params,
-                    headers=headers
-                )
-            
-            response.raise_for_status()
-            data = response.json()
+    data = search_cache.get(cache_key)
+    if data is None:
+        data, size = await fetch_json(
+            f"{BOREALIS_BASE_URL}/search",
+            params,
+            timeout=SEARCH_TIMEOUT,
+            cache_key="search:" + json.dumps(cache_key),
+            max_age=SEARCH_CACHE_TTL
+        )
         
-        # Check if the response was successful
-        if data.get("status") != "OK":
+        # Only successful responses are cached
+        if data.get("status") == "OK":
+            search_cache.set(cache_key, data, size)
+    
+    if data.get("status") != "OK":
+        raise APIStatusError(data.get("status"))
+    return data
+
+def encode_search_cursor(request: dict, start: int, batch: int) -> str:
+    """Build an opaque continuation cursor for the results after `start`."""
+    payload = json.dumps({"r": request, "s": start, "n": batch}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_search_cursor(cursor: str) -> tuple:
+    """Return (request, start, batch) from a cursor; raises ValueError if it is malformed."""
+    try:
+        padded = cursor.strip() + "=" * (-len(cursor.strip()) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        request = payload["r"]
+        start = int(payload["s"])
+        batch = int(payload["n"])
+        if set(request) != {"query", "sort", "type", "dataverse", "fq"} or start < 0 or batch < 1:
+            raise ValueError("unexpected cursor contents")
+        return request, start, batch
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"malformed cursor: {e}") from e
+
+def search_item_key(item: dict) -> str:
+    """Identity of a search hit for de-duplication across pages."""
+    return item.get("global_id") or item.get("file_id") or item.get("entity_id") or item.get("url") or item.get("name", "")
+
+def search_result_item(item: dict) -> dict:
+    """Keep the fields of a search hit that are shown to the caller."""
+    item_type = item.get("type", "unknown")
+    url = item.get("url", "")
+    description = item.get("description", "No description available")
+    
+    # Truncate long descriptions to ~150 characters
+    if len(description) > 150:
+        description = description[:150] + "..."
+    
+    entry = {"type": item_type, "name": item.get("name", "Untitled"), "url": url}
+    # For datasets, always show: DOI, Authors, Date, Description
+    if item_type == "dataset":
+        global_id = item.get("global_id", "")
+        if global_id:
+            # Convert DOI to full URL if it's not already
+            entry["doi"] = global_id if global_id.startswith("http") else f"https://doi.org/{global_id.replace('doi:', '')}"
+        else:
+            entry["doi"] = url  # Fallback to dataset URL
+        entry["authors"] = item.get("authors", [])
+        entry["published_at"] = item.get("published_at", "")
+    entry["description"] = description
+    return entry
+
+def format_search_item(idx: int, entry: dict) -> str:
+    """Format one search hit as a numbered entry."""
+    parts = [f"{idx}. **{entry['name']}**\n", f"   Type: {entry['type']}\n"]
+    if entry["type"] == "dataset":
+        parts.append(f"   DOI: {entry['doi']}\n")
+        parts.append(f"   Authors: {format_authors(entry['authors'])}\n")
+        parts.append(f"   Date: {format_date(entry['published_at'])}\n")
+    # For dataverses and files, show simpler info
+    elif entry["url"]:
+        parts.append(f"   URL: {entry['url']}\n")
+    parts.append(f"   Description: {entry['description']}\n\n")
+    return "".join(parts)
+
+@renderer("search", "markdown")
+def render_search_markdown(result: dict) -> str:
+    parts = list(result["notes"])
+    parts.append(f"Found {result['total_count']} results for '{result['query']}'\n")
+    start = result["start"]
+    if start:
+        parts.append(f"Showing {len(result['items'])} results, starting at result {start + 1}:\n\n")
+    else:
+        parts.append(f"Showing {len(result['items'])} results:\n\n")
+    parts.extend(format_search_item(idx, entry) for idx, entry in enumerate(result["items"], start + 1))
+    if result["duplicates"]:
+        parts.append(f"({result['duplicates']} duplicate result(s) removed.)\n")
+    if result["next_cursor"]:
+        parts.append(
+            f"(Showing results {start + 1}-{result['next_start']} of {result['total_count']} total results. "
+            f"To see more, call search_datasets again with cursor='{result['next_cursor']}'; "
+            f"set max_results (up to {SEARCH_MAX_RESULTS}) to get more results per call.)\n"
+        )
+    return "".join(parts)
+
+@renderer("search", "compact")
+def render_search_compact(result: dict) -> str:
+    start = result["start"]
+    lines = [note.rstrip("\n") for note in result["notes"]]
+    lines.append(f"{result['total_count']} results for '{result['query']}', showing {start + 1}-"
+                 f"{start + len(result['items'])}. DOIs resolve at https://doi.org/")
+    lines.append("#|type|title|DOI or URL|authors|year")
+    for idx, entry in enumerate(result["items"], start + 1):
+        if entry["type"] == "dataset":
+            link = entry["doi"].replace("https://doi.org/", "")
+            authors = format_authors(entry["authors"]) if entry["authors"] else ""
+            year = entry["published_at"][:4]
+        else:
+            link, authors, year = entry["url"], "", ""
+        lines.append(f"{idx}|{entry['type']}|{compact_cell(entry['name'])}|{link}|{compact_cell(authors, 40)}|{year}")
+    if result["duplicates"]:
+        lines.append(f"({result['duplicates']} duplicates removed)")
+    if result["next_cursor"]:
+        lines.append(f"More: cursor='{result['next_cursor']}'")
+    return "\n".join(lines) + "\n"
+
+async def search_datasets(arguments: dict) -> list[TextContent]:
+    """Search for datasets in Borealis Dataverse."""
+    requested_format = output_format(arguments)
+    if requested_format is None:
+        return format_error(arguments)
+    per_page = arguments.get("per_page", 10)
+    max_results = arguments.get("max_results")
+    cursor = arguments.get("cursor")
+    
+    # Validate per_page
+    if per_page > 100:
+        per_page = 100
+    
+    dataverse_note = ""
+    dataverse_candidates = []
+    start = 0
+    if cursor:
+        # A cursor carries the canonical request, so the original filters apply
+        try:
+            request, start, batch = decode_search_cursor(cursor)
+        except ValueError:
             return [TextContent(
                 type="text",
-                text=f"Error: API returned status '{data.get('status')}'"
+                text="Error: Invalid cursor. Use the cursor exactly as returned by a previous search_datasets call, or start a new search without one."
             )]
+        if not max_results:
+            max_results = batch
+        query = request["query"]
+    else:
+        query = normalize_search_query(arguments.get("query", "*"))
+        sort_field = arguments.get("sort", "relevance")
+        result_type = arguments.get("type")
+        dataverse = arguments.get("dataverse")
+        country = arguments.get("country")
+        province = arguments.get("province")
+        city = arguments.get("city")
+        
+        # If dataverse is specified, try to map university name to identifier
+        if dataverse:
+            requested_dataverse = dataverse.strip()
+            dataverse_candidates = institution_resolver.resolve(requested_dataverse)
+            # Underscores only appear in dataverse aliases (e.g. 'toronto_geo'), so
+            # those are only replaced on an exact match, never a fuzzy one
+            min_confidence = 0.97 if "_" in requested_dataverse else RESOLVER_MIN_CONFIDENCE
+            if dataverse_candidates and dataverse_candidates[0][1] >= min_confidence:
+                dataverse, confidence = dataverse_candidates[0]
+                if confidence < 0.97:
+                    # Tell the caller when the match wasn't (nearly) exact
+                    display_name = institution_resolver.display_names.get(dataverse, dataverse)
+                    dataverse_note = (f"(Interpreted dataverse '{requested_dataverse}' as '{dataverse}' - "
+                                      f"{display_name}, confidence {confidence:.2f})\n")
+                dataverse_candidates = []
+            else:
+                # Use as-is if not found (might already be an identifier)
+                dataverse = requested_dataverse
+        
+        # Geographic filters use the fq (filter query) parameter. Filters are
+        # sorted so equivalent requests share a cache key.
+        fq_filters = []
+        if country:
+            fq_filters.append(f"country:{country.strip()}")
+        if province:
+            fq_filters.append(f"state:{province.strip()}")
+        if city:
+            fq_filters.append(f"city:{city.strip()}")
+        
+        request = {
+            "query": query,
+            "sort": sort_field,
+            "type": result_type,
+            "dataverse": dataverse,
+            "fq": sorted(fq_filters),
+        }
+    
+    # Deep retrieval: more results than one page, fetched as concurrent pages
+    wanted = min(max(int(max_results), 1), SEARCH_MAX_RESULTS) if max_results else per_page
+    page_size = wanted if wanted <= per_page else SEARCH_API_PAGE_SIZE
+    
+    try:
+        first_page = await fetch_search_page(request, start, min(page_size, wanted))
         
         # Extract search results
-        search_data = data.get("data", {})
-        items = search_data.get("items", [])
+        search_data = first_page.get("data", {})
         total_count = search_data.get("total_count", 0)
+        pages = [search_data.get("items", [])]
+        
+        end = min(start + wanted, total_count)
+        offsets = range(start + page_size, end, page_size)
+        if offsets:
+            semaphore = asyncio.Semaphore(SEARCH_PAGE_CONCURRENCY)
+            
+            async def fetch_page(offset: int) -> list:
+                async with semaphore:
+                    page = await fetch_search_page(request, offset, min(page_size, end - offset))
+                    return page.get("data", {}).get("items", [])
+            
+            pages.extend(await asyncio.gather(*(fetch_page(offset) for offset in offsets)))
+        
+        # Merge in rank order; results can shift between pages while they are
+        # fetched, so drop repeats
+        items = []
+        seen = set()
+        fetched = 0
+        for page_items in pages:
+            fetched += len(page_items)
+            for item in page_items:
+                key = search_item_key(item)
+                if key in seen:
+                    continue
+                seen.add(key)
+                items.append(item)
+        duplicates = fetched - len(items)
+        next_start = start + fetched
         
         if total_count == 0:
+            suggestion = ""
+            if dataverse_candidates:
+                # The dataverse was passed through unresolved; offer close matches
+                suggestion = "\n\nThe dataverse '" + request["dataverse"] + "' did not match a known institution. Closest matches: " + ", ".join(
+                    f"'{alias}' ({institution_resolver.display_names.get(alias, alias)}, confidence {score:.2f})"
+                    for alias, score in dataverse_candidates
+                )
             return [TextContent(
                 type="text",
-                text=f"No results found for query: '{query}'"
+                text=f"No results found for query: '{query}'{suggestion}"
             )]
         
-        # Format results with consistent structure
-        result_text = f"Found {total_count} results for '{query}'\n"
-        result_text += f"Showing {len(items)} results:\n\n"
-        
-        for idx, item in enumerate(items, 1):
-            item_type = item.get("type", "unknown")
-            name = item.get("name", "Untitled")
-            url = item.get("url", "")
-            description = item.get("description", "No description available")
-            
-            # Truncate long descriptions to ~150 characters
-            if len(description) > 150:
-                description = description[:150] + "..."
-            
-            # Start with title and type
-            result_text += f"{idx}. **{name}**\n"
-            result_text += f"   Type: {item_type}\n"
-            
-            # For datasets, always show: DOI, Authors, Date, Description
-            if item_type == "dataset":
-                # DOI (required field)
-                global_id = item.get("global_id", "")
-                if global_id:
-                    # Convert DOI to full URL if it's not already
-                    doi_url = global_id if global_id.startswith("http") else f"https://doi.org/{global_id.replace('doi:', '')}"
-                    result_text += f"   DOI: {doi_url}\n"
-                else:
-                    result_text += f"   DOI: {url}\n"  # Fallback to dataset URL
-                
-                # Authors (required field)
-                authors = item.get("authors", [])
-                result_text += f"   Authors: {format_authors(authors)}\n"
-                
-                # Date (required field)
-                published_at = item.get("published_at", "")
-                result_text += f"   Date: {format_date(published_at)}\n"
-                
-                # Description (required field)
-                result_text += f"   Description: {description}\n"
-            
-            # For dataverses and files, show simpler info
-            else:
-                if url:
-                    result_text += f"   URL: {url}\n"
-                result_text += f"   Description: {description}\n"
-            
-            result_text += "\n"
-        
-        if total_count > len(items):
-            result_text += f"(Showing {len(items)} of {total_count} total results. "
-            result_text += "Adjust 'per_page' parameter to see more results.)\n"
+        if not items:
+            return [TextContent(
+                type="text",
+                text=f"No more results for '{query}' (all {total_count} results have been shown)."
+            )]
         
-        return [TextContent(type="text", text=result_text)]
+        notes = [dataverse_note] if dataverse_note else []
+        if "local_index" in first_page:
+            index_age = (time.time() - first_page["local_index"]["synced_at"]) / 3600
+            notes.append(f"(Answered from the local index of '{request['dataverse']}', harvested "
+                         f"{index_age:.1f} hours ago; datasets and dataverses only, not files.)\n")
+        result = {
+            "kind": "search",
+            "query": query,
+            "total_count": total_count,
+            "start": start,
+            "notes": notes,
+            "items": [search_result_item(item) for item in items],
+            "duplicates": duplicates,
+            "next_start": next_start,
+            "next_cursor": encode_search_cursor(request, next_start, wanted)
+                           if total_count > next_start and fetched else None,
+        }
+        return render_result(result, requested_format)
         
+    except APIStatusError as e:
+        return [TextContent(
+            type="text",
+            text=f"Error: API returned status '{e.status}'"
+        )]
     except httpx.HTTPStatusError as e:
         error_msg = f"HTTP error occurred: {e.response.status_code}\n"
         try:
@@ -562,8 +2614,42 @@ async def search_datasets(arguments: dict) -> list[TextContent]:
         error_msg = f"Unexpected error: {str(e)}"
         return [TextContent(type="text", text=error_msg)]
 
+async def fetch_dataset_metadata(identifier: str) -> dict:
+    """Return the JSON-LD metadata response for a normalized identifier, using the cache."""
+    # Build the API URL
+    # Use persistentId parameter for DOIs, or direct ID for numeric IDs
+    if identifier.startswith("doi:"):
+        api_url = f"{BOREALIS_BASE_URL}/datasets/:persistentId/metadata"
+        params = {"persistentId": identifier}
+    else:
+        # Numeric dataset ID
+        api_url = f"{BOREALIS_BASE_URL}/datasets/{identifier}/metadata"
+        params = {}
+    
+    # DOIs are case-insensitive, so fold case for the cache key
+    cache_key = identifier.casefold()
+    
+    response_data = metadata_cache.get(cache_key)
+    if response_data is None:
+        response_data, size = await fetch_json(
+            api_url,
+            params,
+            timeout=METADATA_TIMEOUT,
+            headers={"Accept": "application/ld+json"},
+            cache_key=f"metadata:{cache_key}",
+            max_age=METADATA_CACHE_TTL
+        )
+        
+        # Only successful responses are cached
+        if response_data.get("status") == "OK":
+            metadata_cache.set(cache_key, response_data, size)
+    return response_data
+
 async def get_dataset_metadata(arguments: dict) -> list[TextContent]:
     """Retrieve detailed metadata for a specific dataset."""
+    requested_format = output_format(arguments)
+    if requested_format is None:
+        return format_error(arguments)
     identifier = arguments.get("identifier", "")
     
     if not identifier:
@@ -573,56 +2659,10 @@ async def get_dataset_metadata(arguments: dict) -> list[TextContent]:
         )]
     
     # Clean up the identifier
-    # If it's a full DOI URL, extract just the DOI part
-    if identifier.startswith("http"):
-        # Extract DOI from URL like https://doi.org/10.34990/FK2/ABC123
-        identifier = identifier.split("doi.org/")[-1]
-        if not identifier.startswith("doi:"):
-            identifier = f"doi:{identifier}"
-    elif not identifier.startswith("doi:") and not identifier.isdigit():
-        # If it looks like a DOI but doesn't have the prefix, add it
-        identifier = f"doi:{identifier}"
-    
-    # Build the API URL
-    # Use persistentId parameter for DOIs, or direct ID for numeric IDs
-    if identifier.startswith("doi:"):
-        api_url = f"{BOREALIS_BASE_URL}/datasets/:persistentId/metadata"
-        params = {"persistentId": identifier}
-    else:
-        # Numeric dataset ID
-        api_url = f"{BOREALIS_BASE_URL}/datasets/{identifier}/metadata"
-        params = {}
-    
-    # Prepare headers
-    headers = {
-        "Accept": "application/ld+json"
-    }
-    use_auth = False
-    if API_KEY and len(API_KEY) > 10:
-        headers["X-Dataverse-key"] = API_KEY
-        use_auth = True
+    identifier = normalize_identifier(identifier)
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                api_url,
-                params=params,
-                headers=headers
-            )
-            
-            # If we get a 401 with auth, try again without auth for public datasets
-            if response.status_code == 401 and use_auth:
-                headers = {
-                    "Accept": "application/ld+json"
-                }
-                response = await client.get(
-                    api_url,
-                    params=params,
-                    headers=headers
-                )
-            
-            response.raise_for_status()
-            response_data = response.json()
+        response_data = await fetch_dataset_metadata(identifier)
         
         # Check if response was successful
         if response_data.get("status") != "OK":
@@ -640,118 +2680,7 @@ async def get_dataset_metadata(arguments: dict) -> list[TextContent]:
                 text="Error: No metadata found in API response."
             )]
         
-        # Parse and format the metadata
-        result_text = "# Dataset Metadata\n\n"
-        
-        # Title
-        title = metadata.get("title", metadata.get("schema:name", "No title available"))
-        result_text += f"**Title:** {title}\n\n"
-        
-        # DOI/Identifier
-        doi = metadata.get("@id", "")
-        if doi:
-            result_text += f"**DOI:** {doi}\n\n"
-        
-        # Description (from citation:dsDescription)
-        description_obj = metadata.get("citation:dsDescription", {})
-        if isinstance(description_obj, dict):
-            description = description_obj.get("citation:dsDescriptionValue", "No description available")
-        else:
-            description = metadata.get("schema:description", "No description available")
-        
-        # Strip HTML tags for cleaner display if present
-        import re
-        description_text = re.sub(r'<[^>]+>', '', description)
-        # Limit description length for display
-        if len(description_text) > 500:
-            description_text = description_text[:500] + "..."
-        result_text += f"**Description:** {description_text}\n\n"
-        
-        # Authors/Creators
-        authors = metadata.get("author", [])
-        if authors:
-            author_list = []
-            for author in authors:
-                if isinstance(author, dict):
-                    name = author.get("citation:authorName", "")
-                    affiliation = author.get("citation:authorAffiliation", "")
-                    if name:
-                        if affiliation:
-                            author_list.append(f"{name} ({affiliation})")
-                        else:
-                            author_list.append(name)
-            if author_list:
-                result_text += f"**Authors:**\n"
-                for author in author_list:
-                    result_text += f"  - {author}\n"
-                result_text += "\n"
-        
-        # Publication Date
-        date_published = metadata.get("schema:datePublished", metadata.get("dateOfDeposit", ""))
-        if date_published:
-            result_text += f"**Publication Date:** {format_date(date_published)}\n\n"
-        
-        # Keywords
-        keywords = metadata.get("citation:keyword", [])
-        if keywords:
-            keyword_list = []
-            for kw in keywords:
-                if isinstance(kw, dict):
-                    keyword_list.append(kw.get("citation:keywordValue", ""))
-                else:
-                    keyword_list.append(str(kw))
-            if keyword_list:
-                result_text += f"**Keywords:** {', '.join(keyword_list)}\n\n"
-        
-        # Subject
-        subject = metadata.get("subject", "")
-        if subject:
-            result_text += f"**Subject:** {subject}\n\n"
-        
-        # License
-        license_info = metadata.get("schema:license", "")
-        if license_info:
-            result_text += f"**License:** {license_info}\n\n"
-        
-        # Alternative URL (often HuggingFace, GitHub, etc.)
-        alt_url = metadata.get("alternativeURL", "")
-        if alt_url:
-            result_text += f"**Alternative URL:** {alt_url}\n\n"
-        
-        # Dataverse/Collection
-        part_of = metadata.get("schema:isPartOf", {})
-        if isinstance(part_of, dict):
-            collection_name = part_of.get("schema:name", "")
-            if collection_name:
-                result_text += f"**Collection:** {collection_name}\n\n"
-        
-        # Contact
-        contacts = metadata.get("citation:datasetContact", [])
-        if contacts:
-            contact_list = []
-            for contact in contacts:
-                if isinstance(contact, dict):
-                    name = contact.get("citation:datasetContactName", "")
-                    affiliation = contact.get("citation:datasetContactAffiliation", "")
-                    if name:
-                        if affiliation:
-                            contact_list.append(f"{name} ({affiliation})")
-                        else:
-                            contact_list.append(name)
-            if contact_list:
-                result_text += f"**Contact:** {', '.join(contact_list)}\n\n"
-        
-        # Version
-        version = metadata.get("schema:version", "")
-        if version:
-            result_text += f"**Version:** {version}\n\n"
-        
-        # Status
-        status = metadata.get("schema:creativeWorkStatus", "")
-        if status:
-            result_text += f"**Status:** {status}\n\n"
-        
-        return [TextContent(type="text", text=result_text)]
+        return render_result(metadata_result(metadata), requested_format)
         
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 404:
@@ -772,158 +2701,578 @@ async def get_dataset_metadata(arguments: dict) -> list[TextContent]:
         error_msg = f"Unexpected error retrieving metadata: {str(e)}"
         return [TextContent(type="text", text=error_msg)]
 
-async def list_dataset_files(arguments: dict) -> list[TextContent]:
-    """List all files in a specific dataset."""
-    identifier = arguments.get("identifier", "")
-    limit = arguments.get("limit", 20)
-    offset = arguments.get("offset", 0)
-    file_type_filter = arguments.get("file_type", "")
+def named_entries(entries: list, name_key: str, affiliation_key: str) -> list:
+    """Collect {name, affiliation} pairs from JSON-LD author or contact objects."""
+    named = []
+    for entry in entries:
+        if isinstance(entry, dict) and entry.get(name_key, ""):
+            named.append({"name": entry[name_key], "affiliation": entry.get(affiliation_key, "")})
+    return named
+
+def format_named(entry: dict) -> str:
+    return f"{entry['name']} ({entry['affiliation']})" if entry["affiliation"] else entry["name"]
+
+def metadata_result(metadata: dict) -> dict:
+    """Pick the displayed fields out of a JSON-LD metadata record."""
+    # Description (from citation:dsDescription)
+    description_obj = metadata.get("citation:dsDescription", {})
+    if isinstance(description_obj, dict):
+        description = description_obj.get("citation:dsDescriptionValue", "No description available")
+    else:
+        description = metadata.get("schema:description", "No description available")
+    # Strip HTML tags for cleaner display if present
+    description = re.sub(r'<[^>]+>', '', description)
+    # Limit description length for display
+    if len(description) > 500:
+        description = description[:500] + "..."
     
-    if not identifier:
+    keywords = []
+    for kw in metadata.get("citation:keyword", []):
+        if isinstance(kw, dict):
+            keywords.append(kw.get("citation:keywordValue", ""))
+        else:
+            keywords.append(str(kw))
+    
+    part_of = metadata.get("schema:isPartOf", {})
+    return {
+        "kind": "metadata",
+        "title": metadata.get("title", metadata.get("schema:name", "No title available")),
+        "doi": metadata.get("@id", ""),
+        "description": description,
+        "authors": named_entries(metadata.get("author", []), "citation:authorName", "citation:authorAffiliation"),
+        "published": metadata.get("schema:datePublished", metadata.get("dateOfDeposit", "")),
+        "keywords": keywords,
+        "subject": metadata.get("subject", ""),
+        "license": metadata.get("schema:license", ""),
+        # Often HuggingFace, GitHub, etc.
+        "alternative_url": metadata.get("alternativeURL", ""),
+        "collection": part_of.get("schema:name", "") if isinstance(part_of, dict) else "",
+        "contacts": named_entries(metadata.get("citation:datasetContact", []),
+                                  "citation:datasetContactName", "citation:datasetContactAffiliation"),
+        "version": metadata.get("schema:version", ""),
+        "status": metadata.get("schema:creativeWorkStatus", ""),
+    }
+
+@renderer("metadata", "markdown")
+def render_metadata_markdown(result: dict) -> str:
+    parts = ["# Dataset Metadata\n\n", f"**Title:** {result['title']}\n\n"]
+    if result["doi"]:
+        parts.append(f"**DOI:** {result['doi']}\n\n")
+    parts.append(f"**Description:** {result['description']}\n\n")
+    if result["authors"]:
+        parts.append("**Authors:**\n")
+        parts.extend(f"  - {format_named(author)}\n" for author in result["authors"])
+        parts.append("\n")
+    if result["published"]:
+        parts.append(f"**Publication Date:** {format_date(result['published'])}\n\n")
+    if result["keywords"]:
+        parts.append(f"**Keywords:** {', '.join(result['keywords'])}\n\n")
+    for label, key in (("Subject", "subject"), ("License", "license"),
+                       ("Alternative URL", "alternative_url"), ("Collection", "collection")):
+        if result[key]:
+            parts.append(f"**{label}:** {result[key]}\n\n")
+    if result["contacts"]:
+        parts.append(f"**Contact:** {', '.join(format_named(contact) for contact in result['contacts'])}\n\n")
+    for label, key in (("Version", "version"), ("Status", "status")):
+        if result[key]:
+            parts.append(f"**{label}:** {result[key]}\n\n")
+    return "".join(parts)
+
+@renderer("metadata", "compact")
+def render_metadata_compact(result: dict) -> str:
+    lines = [f"Title: {result['title']}"]
+    if result["doi"]:
+        lines.append(f"DOI: {result['doi']}")
+    if result["authors"]:
+        lines.append(f"Authors: {'; '.join(format_named(author) for author in result['authors'])}")
+    facts = [f"{label}: {value}" for label, value in (
+        ("Year", format_date(result["published"]) if result["published"] else ""),
+        ("Version", result["version"]), ("Status", result["status"]), ("License", result["license"]),
+    ) if value]
+    if facts:
+        lines.append(" | ".join(facts))
+    keywords = [kw for kw in result["keywords"] if kw]
+    if keywords:
+        lines.append(f"Keywords: {', '.join(keywords)}")
+    for label, key in (("Subject", "subject"), ("Collection", "collection"), ("Alternative URL", "alternative_url")):
+        if result[key]:
+            lines.append(f"{label}: {result[key]}")
+    if result["contacts"]:
+        lines.append(f"Contact: {'; '.join(format_named(contact) for contact in result['contacts'])}")
+    lines.append(f"Description: {compact_cell(result['description'], 300)}")
+    return "\n".join(lines) + "\n"
+
+def summarize_metadata(metadata: dict) -> dict:
+    """Pick the key fields of a JSON-LD metadata record for a batch listing."""
+    authors = []
+    for author in metadata.get("author", []) or []:
+        if isinstance(author, dict) and author.get("citation:authorName"):
+            authors.append(author["citation:authorName"])
+    
+    keywords = metadata.get("citation:keyword", [])
+    if isinstance(keywords, dict):
+        keywords = [keywords]
+    keyword_list = [
+        kw.get("citation:keywordValue", "") if isinstance(kw, dict) else str(kw)
+        for kw in keywords
+    ]
+    
+    description_obj = metadata.get("citation:dsDescription", {})
+    if isinstance(description_obj, list) and description_obj:
+        description_obj = description_obj[0]
+    if isinstance(description_obj, dict):
+        description = description_obj.get("citation:dsDescriptionValue", "")
+    else:
+        description = metadata.get("schema:description", "")
+    description = re.sub(r'<[^>]+>', '', description or "").strip()
+    if len(description) > 200:
+        description = description[:200] + "..."
+    return {
+        "title": metadata.get("title", metadata.get("schema:name", "No title available")),
+        "doi": metadata.get("@id", ""),
+        "authors": authors,
+        "published": metadata.get("schema:datePublished", metadata.get("dateOfDeposit", "")),
+        "keywords": [kw for kw in keyword_list if kw],
+        "description": description,
+    }
+
+@renderer("metadata_batch", "markdown")
+def render_metadata_batch_markdown(result: dict) -> str:
+    parts = [f"# Metadata for {len(result['datasets'])} datasets\n\n"]
+    if result["failed"]:
+        parts.append(f"({result['failed']} could not be retrieved; see errors below)\n\n")
+    for idx, dataset in enumerate(result["datasets"], 1):
+        if dataset["error"]:
+            parts.append(f"{idx}. **{dataset['identifier']}**\n   Error: {dataset['error']}\n\n")
+            continue
+        lines = [f"{idx}. **{dataset['title']}**"]
+        if dataset["doi"]:
+            lines.append(f"   DOI: {dataset['doi']}")
+        lines.append(f"   Authors: {format_authors(dataset['authors'])}")
+        lines.append(f"   Date: {format_date(dataset['published'])}")
+        if dataset["keywords"]:
+            lines.append(f"   Keywords: {', '.join(dataset['keywords'])}")
+        lines.append(f"   Description: {dataset['description'] or 'No description available'}")
+        parts.append("\n".join(lines) + "\n\n")
+    if result["skipped"]:
+        parts.append(f"({result['skipped']} more identifier(s) not retrieved; the limit is {result['limit']} per call.)\n")
+    return "".join(parts)
+
+@renderer("metadata_batch", "compact")
+def render_metadata_batch_compact(result: dict) -> str:
+    lines = []
+    for idx, dataset in enumerate(result["datasets"], 1):
+        if dataset["error"]:
+            lines.append(f"{idx}|{compact_cell(dataset['identifier'])}|error: {compact_cell(dataset['error'])}")
+            continue
+        year = format_date(dataset["published"]) if dataset["published"] else ""
+        cells = [str(idx), compact_cell(dataset["title"]), dataset["doi"] or dataset["identifier"],
+                 compact_cell(format_authors(dataset["authors"]) if dataset["authors"] else "", 40), year,
+                 compact_cell(", ".join(dataset["keywords"]), 60), compact_cell(dataset["description"], 120)]
+        lines.append("|".join(cells))
+    if result["skipped"]:
+        lines.append(f"(not retrieved: {result['skipped']} more; limit {result['limit']} per call)")
+    return "\n".join(lines) + "\n"
+
+def describe_fetch_error(e: Exception) -> str:
+    """Turn an exception from a metadata fetch into a one-line error."""
+    if isinstance(e, httpx.HTTPStatusError):
+        if e.response.status_code == 404:
+            return "Dataset not found"
+        return f"HTTP error {e.response.status_code}"
+    if isinstance(e, httpx.RequestError):
+        return f"Request error: {str(e) or type(e).__name__}"
+    if isinstance(e, APIStatusError):
+        return f"API returned status '{e.status}'"
+    return f"Unexpected error: {str(e)}"
+
+async def get_datasets_metadata(arguments: dict) -> list[TextContent]:
+    """Retrieve compact metadata for several datasets concurrently."""
+    requested_format = output_format(arguments)
+    if requested_format is None:
+        return format_error(arguments)
+    identifiers = arguments.get("identifiers") or []
+    if isinstance(identifiers, str):
+        identifiers = [identifiers]
+    
+    # Normalize and drop blanks and duplicates, keeping the caller's order
+    seen = set()
+    normalized = []
+    for identifier in identifiers:
+        if not isinstance(identifier, str) or not identifier.strip():
+            continue
+        identifier = normalize_identifier(identifier)
+        if identifier.casefold() not in seen:
+            seen.add(identifier.casefold())
+            normalized.append(identifier)
+    
+    if not normalized:
         return [TextContent(
             type="text",
-            text="Error: No dataset identifier provided."
+            text="Error: No dataset identifiers provided."
         )]
     
-    # Clean up the identifier (same logic as get_dataset_metadata)
-    if identifier.startswith("http"):
-        identifier = identifier.split("doi.org/")[-1]
-        if not identifier.startswith("doi:"):
-            identifier = f"doi:{identifier}"
-    elif not identifier.startswith("doi:") and not identifier.isdigit():
-        identifier = f"doi:{identifier}"
-    
-    # Build the API URL for files endpoint
-    api_url = f"{BOREALIS_BASE_URL}/datasets/:persistentId/versions/:latest/files"
-    params = {
-        "persistentId": identifier,
-        "limit": limit,
-        "offset": offset
-    }
+    skipped = len(normalized) - BATCH_MAX_IDENTIFIERS
+    normalized = normalized[:BATCH_MAX_IDENTIFIERS]
     
-    # Prepare headers
-    headers = {}
-    use_auth = False
-    if API_KEY and len(API_KEY) > 10:
-        headers["X-Dataverse-key"] = API_KEY
-        use_auth = True
+    # Fetch concurrently, bounded by a semaphore; the metadata cache and the
+    # shared connection pool are reused by every fetch
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
     
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                api_url,
-                params=params,
-                headers=headers
-            )
-            
-            # If we get a 401 with auth, try again without auth for public datasets
-            if response.status_code == 401 and use_auth:
-                headers = {}
-                response = await client.get(
-                    api_url,
-                    params=params,
-                    headers=headers
-                )
-            
-            response.raise_for_status()
-            response_data = response.json()
-        
-        # Check if response was successful
+    async def fetch_one(identifier: str) -> dict:
+        async with semaphore:
+            response_data = await fetch_dataset_metadata(identifier)
         if response_data.get("status") != "OK":
-            return [TextContent(
-                type="text",
-                text=f"Error: API returned status '{response_data.get('status')}'"
-            )]
+            raise APIStatusError(response_data.get("status"))
+        return response_data.get("data", {})
+    
+    results = await asyncio.gather(*(fetch_one(identifier) for identifier in normalized), return_exceptions=True)
+    
+    datasets = []
+    for identifier, result in zip(normalized, results):
+        if isinstance(result, BaseException):
+            datasets.append({"identifier": identifier, "error": describe_fetch_error(result)})
+        elif not result:
+            datasets.append({"identifier": identifier, "error": "No metadata found in API response."})
+        else:
+            datasets.append({"identifier": identifier, "error": None, **summarize_metadata(result)})
+    
+    result = {
+        "kind": "metadata_batch",
+        "datasets": datasets,
+        "failed": sum(1 for result in results if isinstance(result, BaseException)),
+        "skipped": max(0, skipped),
+        "limit": BATCH_MAX_IDENTIFIERS,
+    }
+    return render_result(result, requested_format)
+
+# File manifest cache settings. The complete file list of a dataset is
+# fetched once and filtered/paginated locally.
+MANIFEST_CACHE_TTL = _env_float("BOREALIS_MANIFEST_CACHE_TTL", 1800.0)
+MANIFEST_CACHE_MAX_ENTRIES = _env_int("BOREALIS_MANIFEST_CACHE_MAX_ENTRIES", 64)
+MANIFEST_CACHE_MAX_BYTES = _env_int("BOREALIS_MANIFEST_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+MANIFEST_PAGE_SIZE = _env_int("BOREALIS_MANIFEST_PAGE_SIZE", 500)
+MANIFEST_FETCH_CONCURRENCY = _env_int("BOREALIS_MANIFEST_CONCURRENCY", 4)
+# Seconds a dataset's latest version id is trusted before it is checked again
+MANIFEST_VERSION_TTL = _env_float("BOREALIS_MANIFEST_VERSION_TTL", 60.0)
+
+class FileManifest:
+    """Complete file list of one dataset version, indexed for local filtering.
+
+    Files are indexed by extension, friendly type and the alphanumeric tokens
+    of their filename and type. Filtering keeps the tool's substring semantics
+    (a term matches if it occurs in the filename or friendly type): a purely
+    alphanumeric term can only occur inside a token, so it is answered by
+    scanning the distinct tokens instead of every file; other terms fall back
+    to a scan over the files. Results are memoized per term.
+    """
+
+    def __init__(self, files: list, version_id=None):
+        self.files = files
+        self.version_id = version_id
+        self.by_extension = defaultdict(list)
+        self.by_type = defaultdict(list)
+        self.by_token = defaultdict(list)
+        self._haystacks = []
+        self._matches = {}
+        for idx, file_info in enumerate(files):
+            data_file = file_info.get("dataFile", {})
+            filename = data_file.get("filename", file_info.get("label", "")).lower()
+            friendly_type = data_file.get("friendlyType", "").lower()
+            self._haystacks.append((filename, friendly_type))
+            extension = os.path.splitext(filename)[1].lstrip(".")
+            if extension:
+                self.by_extension[extension].append(idx)
+            if friendly_type:
+                self.by_type[friendly_type].append(idx)
+            for token in set(re.findall(r"[a-z0-9]+", f"{filename} {friendly_type}")):
+                self.by_token[token].append(idx)
+
+    def filter(self, term: str) -> list:
+        """Return the files whose filename or friendly type contains term."""
+        term = term.lower().strip()
+        if not term:
+            return self.files
+        matches = self._matches.get(term)
+        if matches is None:
+            if re.fullmatch(r"[a-z0-9]+", term):
+                indexes = set()
+                for token, postings in self.by_token.items():
+                    if term in token:
+                        indexes.update(postings)
+                matches = [self.files[idx] for idx in sorted(indexes)]
+            else:
+                matches = [
+                    self.files[idx]
+                    for idx, (filename, friendly_type) in enumerate(self._haystacks)
+                    if term in filename or term in friendly_type
+                ]
+            self._matches[term] = matches
+        return matches
+
+    def extension_summary(self, limit: int = 10) -> str:
+        """Summarize the most common file extensions, e.g. 'csv (10), txt (3)'."""
+        counts = sorted(self.by_extension.items(), key=lambda item: (-len(item[1]), item[0]))
+        return ", ".join(f"{extension} ({len(indexes)})" for extension, indexes in counts[:limit])
+
+manifest_cache = TTLCache(MANIFEST_CACHE_TTL, MANIFEST_CACHE_MAX_ENTRIES, MANIFEST_CACHE_MAX_BYTES)
+manifest_version_cache = TTLCache(MANIFEST_VERSION_TTL, 4096, 4096 * 256)
+
+def manifest_endpoint(identifier: str) -> tuple:
+    """Return (api_url, params) of the latest version's file list."""
+    # Use persistentId parameter for DOIs, or direct ID for numeric IDs
+    if identifier.startswith("doi:"):
+        return f"{BOREALIS_BASE_URL}/datasets/:persistentId/versions/:latest/files", {"persistentId": identifier}
+    return f"{BOREALIS_BASE_URL}/datasets/{identifier}/versions/:latest/files", {}
+
+async def fetch_manifest_version(identifier: str) -> tuple:
+    """Return (version id, file count) of a dataset's latest version.
+
+    Read from a one-file page of the file list, never from the disk cache,
+    and remembered for MANIFEST_VERSION_TTL seconds, so a newly published
+    version is seen within that time.
+    """
+    folded = identifier.casefold()
+    version = manifest_version_cache.get(folded)
+    if version is not None:
+        return version
+    api_url, params = manifest_endpoint(identifier)
+    response_data, _ = await fetch_json(api_url, {**params, "limit": 1, "offset": 0}, timeout=FILES_TIMEOUT)
+    if response_data.get("status") != "OK":
+        raise APIStatusError(response_data.get("status"))
+    files = response_data.get("data", [])
+    version = (files[0].get("datasetVersionId") if files else None, response_data.get("totalCount"))
+    manifest_version_cache.set(folded, version, 256)
+    return version
+
+async def fetch_files_page(api_url: str, params: dict, version: tuple = ()) -> tuple:
+    """Fetch one page of a dataset's file list; returns (response_data, size in bytes)."""
+    response_data, size = await fetch_json(
+        api_url,
+        params,
+        timeout=FILES_TIMEOUT,
+        # ":latest" pages of different versions share a URL
+        cache_key="files:" + json.dumps([api_url, sorted(params.items()), *version]),
+        max_age=MANIFEST_CACHE_TTL
+    )
+    if response_data.get("status") != "OK":
+        raise APIStatusError(response_data.get("status"))
+    return response_data, size
+
+async def fetch_file_manifest(identifier: str) -> FileManifest:
+    """Return the complete file manifest of a dataset's latest version.
+
+    The first page reports the total count; the remaining pages are then
+    fetched concurrently. Manifests are cached per dataset version: a
+    one-file request for the latest version's id and file count comes first
+    (see fetch_manifest_version), so a new version is not hidden behind a
+    cached manifest. Concurrent
+    requests for the same dataset share one build.
+    """
+    folded = identifier.casefold()
+    version = await inflight.do(("manifest_version", folded), lambda: fetch_manifest_version(identifier))
+    cache_key = (folded,) + version
+    manifest = manifest_cache.get(cache_key)
+    if manifest is not None:
+        return manifest
+    if search_index is not None:
+        # File lists refreshed by the last sync of a harvested subtree
+        stored = await asyncio.to_thread(search_index.manifest, folded)
+        if stored is not None and stored[0] == version[0] and version[1] in (None, len(stored[1])):
+            manifest = FileManifest(stored[1], stored[0])
+            manifest_cache.set(cache_key, manifest, len(json.dumps(stored[1])))
+            return manifest
+    return await inflight.do(("manifest",) + cache_key, lambda: build_file_manifest(identifier, version))
+
+async def build_file_manifest(identifier: str, version: Optional[tuple] = None) -> FileManifest:
+    """Fetch every page of a dataset's file list and cache the resulting manifest.
+
+    version is the (version id, file count) pair from fetch_manifest_version,
+    fetched here (bypassing the remembered one) when not given.
+    """
+    if version is None:
+        manifest_version_cache.pop(identifier.casefold())
+        version = await fetch_manifest_version(identifier)
+    cache_key = (identifier.casefold(),) + version
+    
+    api_url, base_params = manifest_endpoint(identifier)
+    
+    first_page, total_bytes = await fetch_files_page(
+        api_url, {**base_params, "limit": MANIFEST_PAGE_SIZE, "offset": 0}, version
+    )
+    files = list(first_page.get("data", []))
+    total_count = first_page.get("totalCount")
+    
+    if total_count is not None and total_count > len(files):
+        # Known total: fetch the remaining pages concurrently, in order
+        semaphore = asyncio.Semaphore(MANIFEST_FETCH_CONCURRENCY)
         
-        # Extract files from the response
-        files = response_data.get("data", [])
-        total_count = response_data.get("totalCount", len(files))
+        async def fetch_page(offset: int) -> tuple:
+            async with semaphore:
+                return await fetch_files_page(
+                    api_url, {**base_params, "limit": MANIFEST_PAGE_SIZE, "offset": offset}, version
+                )
         
-        # Apply client-side filtering if file_type is specified
-        if file_type_filter:
-            filter_lower = file_type_filter.lower()
-            filtered_files = []
-            for file_info in files:
-                data_file = file_info.get("dataFile", {})
-                filename = data_file.get("filename", "").lower()
-                friendly_type = data_file.get("friendlyType", "").lower()
-                
-                # Search in filename or friendly type
-                if filter_lower in filename or filter_lower in friendly_type:
-                    filtered_files.append(file_info)
-            
-            files = filtered_files
-            # Note: total_count still reflects total files in dataset, not filtered count
+        pages = await asyncio.gather(*(
+            fetch_page(offset) for offset in range(len(files), total_count, MANIFEST_PAGE_SIZE)
+        ))
+        for page_data, page_bytes in pages:
+            files.extend(page_data.get("data", []))
+            total_bytes += page_bytes
+    elif total_count is None:
+        # Older API versions don't report a total; page until a short page
+        while files and len(files) % MANIFEST_PAGE_SIZE == 0:
+            page_data, page_bytes = await fetch_files_page(
+                api_url, {**base_params, "limit": MANIFEST_PAGE_SIZE, "offset": len(files)}, version
+            )
+            page_files = page_data.get("data", [])
+            if not page_files:
+                break
+            files.extend(page_files)
+            total_bytes += page_bytes
+    
+    version_id = files[0].get("datasetVersionId") if files else None
+    manifest = FileManifest(files, version_id)
+    manifest_cache.set(cache_key, manifest, total_bytes)
+    return manifest
+
+def file_result_item(file_info: dict) -> dict:
+    """Keep the fields of a file-list entry that are shown to the caller."""
+    # Get detailed file info from dataFile object
+    data_file = file_info.get("dataFile", {})
+    label = file_info.get("label", "Unnamed file")
+    return {
+        "id": data_file.get("id", ""),
+        "filename": data_file.get("filename", label),
+        "description": file_info.get("description", ""),
+        "type": data_file.get("friendlyType", "Unknown"),
+        "size": data_file.get("filesize", 0),
+        "restricted": file_info.get("restricted", False),
+        "md5": data_file.get("md5", ""),
+    }
+
+def files_remaining_note(result: dict) -> str:
+    """Return how many matching files come after the ones shown (empty if none)."""
+    remaining = result["match_count"] - (result["offset"] + len(result["files"]))
+    if remaining <= 0:
+        return ""
+    filter_msg = f" matching '{result['filter']}'" if result["filter"] else ""
+    return f"There are {remaining} more file(s){filter_msg} in this dataset."
+
+@renderer("files", "markdown")
+def render_files_markdown(result: dict) -> str:
+    total_count, match_count = result["total_count"], result["match_count"]
+    offset, files = result["offset"], result["files"]
+    parts = ["# Dataset Files\n\n"]
+    if result["filter"]:
+        parts.append(f"**Showing:** Files matching '{result['filter']}'\n")
+        parts.append(f"**Results:** {match_count} of {total_count} file(s) match\n")
+        if match_count > len(files):
+            parts.append(f"**Showing:** {offset + 1}-{offset + len(files)} of {match_count}\n")
+    else:
+        parts.append(f"**Total files in dataset:** {total_count}\n")
+        if total_count > result["limit"] or offset:
+            parts.append(f"**Showing:** {offset + 1}-{min(offset + len(files), total_count)} of {total_count}\n")
+    parts.append("\n")
+    
+    for idx, entry in enumerate(files, offset + 1):
+        parts.append(f"## {idx}. {entry['filename']}\n")
+        if entry["description"]:
+            parts.append(f"**Description:** {entry['description']}\n")
+        parts.append(f"**Type:** {entry['type']}\n")
+        parts.append(f"**Size:** {format_size(entry['size'])}\n")
+        parts.append(f"**File ID:** {entry['id']}\n")
+        if entry["restricted"]:
+            parts.append("**Access:** Restricted (authentication required)\n")
+        else:
+            parts.append("**Access:** Public\n")
+        if entry["md5"]:
+            parts.append(f"**MD5 Checksum:** {entry['md5']}\n")
+        parts.append("\n")
+    
+    # Add pagination hint if there are more files
+    remaining = files_remaining_note(result)
+    if remaining:
+        parts.append(f"\n*{remaining} To see more, ask to show the next files or specify a larger limit.*\n")
+    return "".join(parts)
+
+@renderer("files", "compact")
+def render_files_compact(result: dict) -> str:
+    offset, files = result["offset"], result["files"]
+    matching = f" matching '{result['filter']}'" if result["filter"] else ""
+    lines = [f"{result['match_count']} file(s){matching} of {result['total_count']}, "
+             f"showing {offset + 1}-{offset + len(files)}",
+             "#|file_id|filename|type|size|access"]
+    for idx, entry in enumerate(files, offset + 1):
+        access = "restricted" if entry["restricted"] else "public"
+        lines.append(f"{idx}|{entry['id']}|{compact_cell(entry['filename'])}|{compact_cell(entry['type'], 30)}|"
+                     f"{format_size(entry['size'])}|{access}")
+    remaining = files_remaining_note(result)
+    if remaining:
+        lines.append(f"{remaining} Use offset={offset + len(files)} for the next ones.")
+    return "\n".join(lines) + "\n"
+
+async def list_dataset_files(arguments: dict) -> list[TextContent]:
+    """List all files in a specific dataset."""
+    requested_format = output_format(arguments)
+    if requested_format is None:
+        return format_error(arguments)
+    identifier = arguments.get("identifier", "")
+    limit = arguments.get("limit", 20)
+    offset = arguments.get("offset", 0)
+    file_type_filter = arguments.get("file_type", "")
+    
+    if not identifier:
+        return [TextContent(
+            type="text",
+            text="Error: No dataset identifier provided."
+        )]
+    
+    # Clean up the identifier (same logic as get_dataset_metadata)
+    identifier = normalize_identifier(identifier)
+    
+    try:
+        # The whole manifest is fetched (or reused from cache) so filtering
+        # and pagination are applied over every file, not one page
+        try:
+            manifest = await fetch_file_manifest(identifier)
+        except APIStatusError as e:
+            return [TextContent(
+                type="text",
+                text=f"Error: API returned status '{e.status}'"
+            )]
+        
+        total_count = len(manifest.files)
+        matching_files = manifest.filter(file_type_filter) if file_type_filter else manifest.files
+        match_count = len(matching_files)
+        files = matching_files[offset:offset + limit]
         
         if not files:
             filter_msg = f" matching '{file_type_filter}'" if file_type_filter else ""
+            if match_count and offset >= match_count:
+                return [TextContent(
+                    type="text",
+                    text=f"No more files{filter_msg}: this dataset has {match_count} such file(s) "
+                         f"and the offset is {offset}."
+                )]
+            types_hint = ""
+            if file_type_filter and manifest.by_extension:
+                types_hint = f"\n\nFile types in this dataset: {manifest.extension_summary()}"
             return [TextContent(
                 type="text",
-                text=f"No files found{filter_msg} in this dataset."
+                text=f"No files found{filter_msg} in this dataset.{types_hint}"
             )]
         
-        # Format the file list
-        result_text = f"# Dataset Files\n\n"
-        
-        if file_type_filter:
-            result_text += f"**Showing:** Files matching '{file_type_filter}'\n"
-            result_text += f"**Results:** {len(files)} file(s) found\n"
-        else:
-            result_text += f"**Total files in dataset:** {total_count}\n"
-            if total_count > limit:
-                result_text += f"**Showing:** {offset + 1}-{min(offset + len(files), total_count)} of {total_count}\n"
-        
-        result_text += "\n"
-        
-        for idx, file_info in enumerate(files, offset + 1):
-            # Extract file information
-            label = file_info.get("label", "Unnamed file")
-            description = file_info.get("description", "")
-            restricted = file_info.get("restricted", False)
-            
-            # Get detailed file info from dataFile object
-            data_file = file_info.get("dataFile", {})
-            file_id = data_file.get("id", "")
-            filename = data_file.get("filename", label)
-            friendly_type = data_file.get("friendlyType", "Unknown")
-            filesize = data_file.get("filesize", 0)
-            md5 = data_file.get("md5", "")
-            
-            # Format file size for readability
-            if filesize < 1024:
-                size_str = f"{filesize} bytes"
-            elif filesize < 1024 * 1024:
-                size_str = f"{filesize / 1024:.1f} KB"
-            elif filesize < 1024 * 1024 * 1024:
-                size_str = f"{filesize / (1024 * 1024):.1f} MB"
-            else:
-                size_str = f"{filesize / (1024 * 1024 * 1024):.2f} GB"
-            
-            # Build file entry
-            result_text += f"## {idx}. {filename}\n"
-            if description:
-                result_text += f"**Description:** {description}\n"
-            result_text += f"**Type:** {friendly_type}\n"
-            result_text += f"**Size:** {size_str}\n"
-            result_text += f"**File ID:** {file_id}\n"
-            
-            if restricted:
-                result_text += f"**Access:** Restricted (authentication required)\n"
-            else:
-                result_text += f"**Access:** Public\n"
-            
-            if md5:
-                result_text += f"**MD5 Checksum:** {md5}\n"
-            
-            result_text += "\n"
-        
-        # Add pagination hint if there are more files
-        if not file_type_filter and total_count > (offset + len(files)):
-            remaining = total_count - (offset + len(files))
-            result_text += f"\n*There are {remaining} more file(s) in this dataset. "
-            result_text += f"To see more, ask to show the next files or specify a larger limit.*\n"
-        
-        return [TextContent(type="text", text=result_text)]
+        result = {
+            "kind": "files",
+            "filter": file_type_filter,
+            "total_count": total_count,
+            "match_count": match_count,
+            "offset": offset,
+            "limit": limit,
+            "files": [file_result_item(file_info) for file_info in files],
+        }
+        return render_result(result, requested_format)
         
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 404:
@@ -944,18 +3293,879 @@ async def list_dataset_files(arguments: dict) -> list[TextContent]:
         error_msg = f"Unexpected error listing files: {str(e)}"
         return [TextContent(type="text", text=error_msg)]
 
+# Largest file get_dataset_file will read for display in chat
+MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB in bytes
+
+# CPU-heavy work (Word document extraction, decoding and formatting large
+# windows) runs in a worker pool so other tool calls aren't stalled. A
+# thread pool suits most use; a process pool also sidesteps the GIL, at
+# the cost of pickling the data both ways.
+WORKER_POOL = os.environ.get("BOREALIS_WORKER_POOL", "thread").lower()
+WORKER_COUNT = _env_int("BOREALIS_WORKER_COUNT", 2)
+WORKER_TIMEOUT = _env_float("BOREALIS_WORKER_TIMEOUT", 30.0)
+WORKER_MIN_BYTES = 256 * 1024  # smaller windows are decoded and formatted inline
+_worker_pool = None
+
+def get_worker_pool() -> concurrent.futures.Executor:
+    """Return the shared worker pool, creating it on first use."""
+    global _worker_pool
+    if _worker_pool is None:
+        if WORKER_POOL == "process":
+            _worker_pool = concurrent.futures.ProcessPoolExecutor(max_workers=WORKER_COUNT)
+        else:
+            _worker_pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=WORKER_COUNT, thread_name_prefix="borealis-worker"
+            )
+    return _worker_pool
+
+async def run_in_worker(function, *args):
+    """Run function(*args) in the worker pool, waiting at most WORKER_TIMEOUT seconds.
+
+    Raises asyncio.TimeoutError when the limit passes. A thread can't be
+    interrupted, so the work runs on to completion in the background while
+    the caller moves on; the pool's size bounds how much of that there is.
+    """
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(loop.run_in_executor(get_worker_pool(), function, *args), WORKER_TIMEOUT)
+
+def decode_lines(raw_lines: list) -> list:
+    """Decode lines as UTF-8, or all of them as Latin-1 if any isn't valid UTF-8."""
+    try:
+        return [line.decode('utf-8') for line in raw_lines]
+    except UnicodeDecodeError:
+        return [line.decode('latin-1') for line in raw_lines]
+
+def iter_docx_lines(doc):
+    """Yield a Word document's body as lines of text, in document order.
+
+    Headings become markdown headings and each table row one "| a | b |" line.
+    """
+    from docx.oxml.ns import qn
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+    paragraph_tag, table_tag = qn("w:p"), qn("w:tbl")
+    for child in doc.element.body.iterchildren():
+        if child.tag == paragraph_tag:
+            para = Paragraph(child, doc)
+            style_name = para.style.name if para.style else ""
+            if style_name.startswith("Heading 1"):
+                yield f"# {para.text}"
+            elif style_name.startswith("Heading 2"):
+                yield f"## {para.text}"
+            elif style_name.startswith("Heading 3"):
+                yield f"### {para.text}"
+            elif "Heading" in style_name:
+                yield f"#### {para.text}"
+            else:
+                yield para.text
+        elif child.tag == table_tag:
+            for row in Table(child, doc).rows:
+                cells = []
+                previous = None
+                for cell in row.cells:
+                    # Merged cells are repeated once per grid column
+                    if cell._tc is previous:
+                        continue
+                    previous = cell._tc
+                    cells.append(" ".join(cell.text.split()).replace("|", "\\|"))
+                yield "| " + " | ".join(cells) + " |"
+
+def extract_docx_lines(content: bytes, limit: Optional[int]) -> tuple:
+    """Extract up to limit lines of text from a .docx file (all if limit is None).
+
+    Runs in the worker pool. Returns (lines, complete), where complete says
+    whether the whole document was read.
+    """
+    from docx import Document
+    lines = list(itertools.islice(iter_docx_lines(Document(io.BytesIO(content))), limit))
+    return lines, limit is None or len(lines) < limit
+
+# Binary formats the file tools reject outright
+BINARY_EXTENSIONS = [
+    '.pdf', '.zip', '.xlsx', '.xls', '.sav', '.dta', '.rdata',
+    '.rds', '.doc', '.pptx', '.ppt', '.jpg', '.jpeg',
+    '.png', '.gif', '.exe', '.dll', '.bin'
+]
+
+class LineReader:
+    """Iterate over a streamed response body line by line, enforcing byte caps.
+
+    Lines are yielded as raw bytes without the trailing newline, with the same
+    boundaries as bytes.split(b"\n"). Iteration stops early (with `exceeded`
+    set) once more than `max_bytes` have arrived, after the lines that end
+    within the cap, and sets `finished` when the whole body has been read.
+    Breaking out of the loop leaves the rest of the body undownloaded.
+
+    No line is buffered past `max_line_bytes`. A longer line either stops
+    iteration with `line_too_long` set, or, while `clip_long_lines` is true,
+    is cut to that length (at a UTF-8 character boundary) and the rest of it
+    skipped as it streams past. `line_bytes` is the full length of the last
+    line yielded, clipped or not, so byte offsets stay exact.
+    """
+
+    def __init__(self, response: httpx.Response, max_bytes: int, max_line_bytes: Optional[int] = None,
+                 clip_long_lines: bool = False):
+        self.response = response
+        self.max_bytes = max_bytes
+        self.max_line_bytes = max_line_bytes
+        self.clip_long_lines = clip_long_lines
+        self.bytes_read = 0
+        self.line_bytes = 0
+        self.clipped_lines = 0
+        self.exceeded = False
+        self.finished = False
+        self.line_too_long = False
+
+    async def __aiter__(self):
+        pending = []
+        kept = 0  # bytes of the current line in pending
+        line_bytes = 0  # bytes of the current line seen so far
+        clipped = False
+        async for chunk in self.response.aiter_bytes():
+            self.bytes_read += len(chunk)
+            metrics.bytes_downloaded += len(chunk)
+            if self.bytes_read > self.max_bytes:
+                # Lines that end within the cap are still yielded
+                self.exceeded = True
+                chunk = chunk[:len(chunk) - (self.bytes_read - self.max_bytes)]
+            start = 0
+            while True:
+                newline = chunk.find(b"\n", start)
+                end = len(chunk) if newline < 0 else newline
+                line_bytes += end - start
+                if not clipped:
+                    piece = chunk[start:end]
+                    if self.max_line_bytes is not None and kept + len(piece) > self.max_line_bytes:
+                        if not self.clip_long_lines:
+                            self.line_too_long = True
+                            return
+                        piece = piece[:self.max_line_bytes - kept]
+                        clipped = True
+                        self.clipped_lines += 1
+                    pending.append(piece)
+                    kept += len(piece)
+                if newline < 0:
+                    break
+                self.line_bytes = line_bytes
+                yield trim_partial_utf8(b"".join(pending)) if clipped else b"".join(pending)
+                pending = []
+                kept = line_bytes = 0
+                clipped = False
+                start = newline + 1
+            if self.exceeded:
+                return
+        self.finished = True
+        self.line_bytes = line_bytes
+        yield trim_partial_utf8(b"".join(pending)) if clipped else b"".join(pending)
+
+def trim_partial_utf8(data: bytes) -> bytes:
+    """Drop an incomplete UTF-8 character left at the end of clipped bytes."""
+    end = len(data)
+    # Step back over continuation bytes to the last lead byte
+    while end > 0 and len(data) - end < 3 and data[end - 1] & 0xC0 == 0x80:
+        end -= 1
+    if end > 0 and data[end - 1] >= 0xC0:
+        lead = data[end - 1]
+        width = 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+        if len(data) - (end - 1) < width:
+            return data[:end - 1]
+    return data
+
+async def read_limited(response: httpx.Response, max_bytes: int) -> Optional[bytes]:
+    """Read a streamed response body, or return None if it exceeds max_bytes."""
+    chunks = []
+    size = 0
+    async for chunk in response.aiter_bytes():
+        size += len(chunk)
+        metrics.bytes_downloaded += len(chunk)
+        if size > max_bytes:
+            return None
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+# get_dataset_file windows past line 1: bytes streamed past to reach start_line
+# are capped separately from the 5MB limit on the lines shown
+FILE_SCAN_MAX_BYTES = _env_int("BOREALIS_FILE_SCAN_MAX_BYTES", 100 * 1024 * 1024)
+LINE_INDEX_STRIDE = 1000
+
+class LineOffsetIndex:
+    """Sparse map from line numbers to byte offsets in one file.
+
+    Filled in as the file streams past: the starting offset of every
+    LINE_INDEX_STRIDE-th line is kept, so a later window can be requested
+    with a Range header from the nearest checkpoint and skip at most a
+    stride of lines. Datafiles never change under a given ID, so offsets
+    stay valid for as long as they are cached.
+    """
+
+    def __init__(self):
+        self.offsets = [0]  # offsets[k] is where line k * LINE_INDEX_STRIDE + 1 starts
+        self.total_lines = None
+        self.file_size = None
+        self.ranges = None  # whether the server honors Range requests, once known
+
+    def record(self, line_no: int, offset: int) -> None:
+        """Note where a line starts; only checkpoint lines extending the index are kept."""
+        checkpoint, remainder = divmod(line_no - 1, LINE_INDEX_STRIDE)
+        if remainder == 0 and checkpoint == len(self.offsets):
+            self.offsets.append(offset)
+
+    def checkpoint(self, line_no: int) -> tuple:
+        """Return (line number, byte offset) of the last checkpoint at or before line_no."""
+        checkpoint = min((line_no - 1) // LINE_INDEX_STRIDE, len(self.offsets) - 1)
+        return checkpoint * LINE_INDEX_STRIDE + 1, self.offsets[checkpoint]
+
+    def size(self) -> int:
+        """Approximate memory footprint in bytes, for the cache's size limit."""
+        return 64 + 8 * len(self.offsets)
+
+line_index_cache = TTLCache(86400.0, 1024, 8 * 1024 * 1024)
+
+# get_dataset_file preview="sample": character budget for the lines shown
+# (roughly 4 characters per token) and the longest line kept whole
+PREVIEW_DEFAULT_CHARS = 8000
+PREVIEW_MAX_CHARS = 100000
+PREVIEW_LINE_CHARS = 500
+
+def decode_line(raw_line: bytes) -> str:
+    """Decode one line as UTF-8, falling back to Latin-1."""
+    try:
+        return raw_line.decode("utf-8")
+    except UnicodeDecodeError:
+        return raw_line.decode("latin-1")
+
+class LineSampler:
+    """Pick lines from a stream to preview within a character budget, in one pass.
+
+    The first lines (a header, usually) take a quarter of the budget and the
+    last lines another quarter. Lines pushed out of the tail window feed a
+    uniform reservoir sample (Algorithm R) sized for the remaining half from
+    the average length of the head lines, so memory stays bounded by the
+    budget however long the file is. Seeded per file, so repeated calls show
+    the same sample.
+    """
+
+    LINE_OVERHEAD = 10  # line number and separator in the rendered output
+    GAP_OVERHEAD = 40  # the omitted-lines marker each sampled line usually brings
+
+    def __init__(self, max_chars: int, seed: Hashable):
+        self.max_chars = max_chars
+        self.head_budget = max_chars // 4
+        self.tail_budget = max_chars // 4
+        self.sample_budget = max_chars - self.head_budget - self.tail_budget
+        self.rng = random.Random(str(seed))
+        self.head = []
+        self.head_chars = 0
+        self.head_open = True
+        self.tail = deque()
+        self.tail_chars = 0
+        self.reservoir = []
+        self.capacity = 0
+        self.interior_lines = 0  # lines that left the tail window
+
+    def add(self, line_no: int, text: str) -> None:
+        """Offer the next line of the stream."""
+        text = text.rstrip("\r")
+        if len(text) > PREVIEW_LINE_CHARS:
+            text = text[:PREVIEW_LINE_CHARS] + " … (line clipped)"
+        cost = len(text) + self.LINE_OVERHEAD
+        if self.head_open:
+            if not self.head or self.head_chars + cost <= self.head_budget:
+                self.head.append((line_no, text))
+                self.head_chars += cost
+                return
+            self.head_open = False
+            average = self.head_chars / len(self.head) + self.GAP_OVERHEAD
+            self.capacity = max(1, int(self.sample_budget / average))
+        self.tail.append((line_no, text))
+        self.tail_chars += cost
+        while self.tail_chars > self.tail_budget and len(self.tail) > 1:
+            evicted = self.tail.popleft()
+            self.tail_chars -= len(evicted[1]) + self.LINE_OVERHEAD
+            self.interior_lines += 1
+            if len(self.reservoir) < self.capacity:
+                self.reservoir.append(evicted)
+            else:
+                slot = self.rng.randrange(self.interior_lines)
+                if slot < self.capacity:
+                    self.reservoir[slot] = evicted
+
+    def result(self) -> dict:
+        """Return the chosen lines as runs of consecutive lines, with counts."""
+        # The reservoir was sized from an average, so trim it to the budget,
+        # dropping lines in random order rather than the longest or latest
+        candidates = list(self.reservoir)
+        self.rng.shuffle(candidates)
+        sampled = []
+        used = 0
+        for line_no, text in candidates:
+            cost = len(text) + self.LINE_OVERHEAD + self.GAP_OVERHEAD
+            if used + cost <= self.sample_budget:
+                sampled.append((line_no, text))
+                used += cost
+        segments = []
+        for line_no, text in self.head + sorted(sampled) + list(self.tail):
+            if segments and segments[-1]["start"] + len(segments[-1]["lines"]) == line_no:
+                segments[-1]["lines"].append(text)
+            else:
+                segments.append({"start": line_no, "lines": [text]})
+        return {
+            "head_lines": len(self.head),
+            "tail_lines": len(self.tail),
+            "sampled_lines": len(sampled),
+            "interior_lines": self.interior_lines,
+            "segments": segments,
+        }
+
+# Signed storage URLs that /access/datafile redirected to, cached for their
+# lifetime so re-fetches of the same file go straight to storage
+SIGNED_URL_SAFETY_MARGIN = 30.0  # seconds shaved off a signed URL's lifetime
+MAX_REDIRECTS = 5
+redirect_cache = TTLCache(3600.0, 512, 4 * 1024 * 1024)
+
+# Data files refused with the key (403) but served without it: fetched
+# anonymously first for a while, saving the authenticated round trip
+PUBLIC_FILE_TTL = _env_float("BOREALIS_PUBLIC_FILE_TTL", 3600.0)
+public_file_cache = TTLCache(PUBLIC_FILE_TTL, 4096, 4096 * 256)
+
+def signed_url_lifetime(url: httpx.URL) -> Optional[float]:
+    """Return the seconds a presigned storage URL remains valid, or None if it isn't signed."""
+    params = url.params
+    try:
+        if "X-Amz-Expires" in params and "X-Amz-Date" in params:
+            # AWS Signature Version 4
+            issued = datetime.strptime(params["X-Amz-Date"], "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+            expires_at = issued.timestamp() + int(params["X-Amz-Expires"])
+        elif "Expires" in params:
+            # Signature Version 2 / GCS style: absolute epoch seconds
+            expires_at = int(params["Expires"])
+        else:
+            return None
+    except ValueError:
+        return None
+    return expires_at - time.time()
+
+async def send_streamed(url, headers: Optional[dict] = None, byte_offset: int = 0) -> httpx.Response:
+    """Send a streamed GET, following redirects without forwarding our headers.
+
+    httpx only strips Authorization on cross-origin redirects, so redirects
+    are followed here to keep X-Dataverse-key from reaching storage hosts.
+    A non-zero byte_offset asks every hop for the body from that byte on.
+    """
+    client = get_http_client()
+    range_header = {"Range": f"bytes={byte_offset}-"} if byte_offset else {}
+    response = await upstream_send(
+        client.build_request("GET", url, headers={**(headers or {}), **range_header}, timeout=DOWNLOAD_TIMEOUT),
+        stream=True
+    )
+    api_host = httpx.URL(url).host
+    hops = 0
+    while response.is_redirect and hops < MAX_REDIRECTS:
+        target = response.url.join(response.headers["location"])
+        await response.aclose()
+        # Keep the key only while we stay on the API host; once dropped it
+        # stays dropped, even for hops within a storage host or back again
+        if target.host != api_host:
+            headers = None
+        response = await upstream_send(
+            client.build_request("GET", target, headers={**(headers or {}), **range_header},
+                                 timeout=DOWNLOAD_TIMEOUT),
+            stream=True
+        )
+        hops += 1
+    return response
+
+async def open_datafile_stream(file_id: str, byte_offset: int = 0, params: Optional[dict] = None,
+                               suffix: str = "") -> httpx.Response:
+    """Open a streamed GET for /access/datafile/{file_id}; the caller must close it.
+
+    A cached signed storage URL is tried first. Otherwise the API URL is
+    requested, retried without the API key on 401/403, and any signed
+    redirect target is remembered for its lifetime. A file that a 403 with
+    the key showed to be public is requested without the key next time. With a byte_offset the
+    body is requested from there with a Range header; check for a 206.
+    params (e.g. format or variables) and a path suffix (e.g.
+    "/metadata/ddi") select another representation of the file.
+    """
+    api_url = f"{BOREALIS_BASE_URL}/access/datafile/{file_id}{suffix}"
+    if params:
+        api_url += f"?{httpx.QueryParams(params)}"
+    
+    # Go straight to storage if we still hold a valid signed URL
+    signed_url = redirect_cache.get(api_url)
+    if signed_url:
+        response = await send_streamed(signed_url, byte_offset=byte_offset)
+        if response.status_code < 400 or response.status_code == 416:
+            return response
+        # Expired or revoked; fall back to the API
+        await response.aclose()
+        redirect_cache.pop(api_url)
+    
+    # Only send the API key if it hasn't been rejected recently, and the
+    # file isn't known to be public
+    public = auth_state.key_configured and public_file_cache.get(api_url) is not None
+    use_auth = not public and auth_state.use_key()
+    headers = {"X-Dataverse-key": API_KEY} if use_auth else {}
+    
+    response = await send_streamed(api_url, headers, byte_offset)
+    
+    if public:
+        auth_state.public_skips += 1
+        if response.status_code in (401, 403):
+            # No longer public: forget that and send the key again
+            await response.aclose()
+            public_file_cache.pop(api_url)
+            use_auth = auth_state.use_key()
+            headers = {"X-Dataverse-key": API_KEY} if use_auth else {}
+            response = await send_streamed(api_url, headers, byte_offset)
+    
+    if use_auth:
+        # If we get a 401 (or a 403 before the key is known to be good),
+        # try without auth for public files. Only a 401 or an explicit
+        # bad-key error condemns the key: a 403 is usually about the file.
+        if response.status_code == 401 or (response.status_code == 403 and auth_state.state != "valid"):
+            rejected = response.status_code == 401 or await is_bad_key_error(response)
+            await response.aclose()
+            auth_state.anonymous_retries += 1
+            response = await send_streamed(api_url, byte_offset=byte_offset)
+            if rejected:
+                auth_state.record_rejected()
+            elif response.status_code < 400:
+                # The key isn't needed (and is refused) for this file
+                public_file_cache.set(api_url, True, len(api_url))
+        elif response.status_code < 400:
+            auth_state.record_accepted()
+    
+    # Remember signed redirect targets (e.g. S3 presigned URLs)
+    if str(response.url) != api_url and response.status_code < 400:
+        lifetime = signed_url_lifetime(response.url)
+        if lifetime is not None and lifetime > SIGNED_URL_SAFETY_MARGIN:
+            signed_url = str(response.url)
+            redirect_cache.set(api_url, signed_url, len(signed_url),
+                               ttl=lifetime - SIGNED_URL_SAFETY_MARGIN)
+    
+    return response
+
+async def is_bad_key_error(response: httpx.Response) -> bool:
+    """Return True if an error response says the API key itself is invalid."""
+    if "application/json" not in response.headers.get("content-type", ""):
+        return False
+    try:
+        await response.aread()
+        message = str(response.json().get("message", "")).lower()
+    except (httpx.HTTPError, ValueError, AttributeError):
+        return False
+    return ("api key" in message or "api token" in message) and any(
+        word in message for word in ("bad", "invalid", "expired"))
+
+async def datafile_error_message(response: httpx.Response, filename: str) -> Optional[TextContent]:
+    """Explain a JSON error from /access/datafile, or return None if there isn't one.
+
+    Only error statuses are read here so that JSON data files are still streamed.
+    """
+    content_type = response.headers.get("content-type", "")
+    if "application/json" not in content_type or response.status_code < 400:
+        return None
+    try:
+        await response.aread()
+        error_data = response.json()
+    except (httpx.HTTPError, ValueError):
+        return None
+    if not isinstance(error_data, dict) or error_data.get("status") != "ERROR":
+        return None
+    if error_data.get("code", response.status_code) == 403:
+        return TextContent(
+            type="text",
+            text=f"🔒 Cannot access '{filename}' - File is restricted\n\n"
+                 f"This file requires specific access permissions that cannot be "
+                 f"granted through the API. To access restricted files, you may need to:\n"
+                 f"1. Request access from the dataset owner through the Borealis website\n"
+                 f"2. Verify you're affiliated with the authorized institution\n"
+                 f"3. Accept any terms of use or data use agreements"
+        )
+    return TextContent(
+        type="text",
+        text=f"Error accessing file: {error_data.get('message', 'Unknown error')}"
+    )
+
+def file_too_large_message(filename: str, size_text: str) -> TextContent:
+    """Build the message returned when a file is over the display size limit."""
+    return TextContent(
+        type="text",
+        text=f"⚠️ Cannot retrieve '{filename}' - File too large ({size_text})\n\n"
+             f"This tool has a 5MB maximum file size limit because large data files "
+             f"are not suitable for display in chat. For large datasets, please download "
+             f"the file directly from the Borealis website for analysis in statistical "
+             f"software or data analysis tools."
+    )
+
+# Ingested tabular files: the variables and row count parsed from the
+# file's DDI codebook, which Dataverse generates at ingest. Keyed by file
+# ID; a codebook without variables means the file wasn't ingested.
+ddi_cache = TTLCache(86400.0, 256, 32 * 1024 * 1024)
+DDI_MAX_CATEGORIES = 20  # value labels kept per variable
+
+def local_name(tag: str) -> str:
+    """Strip the namespace from an ElementTree tag."""
+    return tag.rpartition("}")[2]
+
+def ddi_number(text: Optional[str]):
+    """Parse a DDI statistic as an int or float, or keep the text if it isn't a number."""
+    text = (text or "").strip()
+    try:
+        value = float(text)
+    except ValueError:
+        return text or None
+    if not math.isfinite(value):
+        return text
+    return int(value) if value.is_integer() else value
+
+def ddi_variable(element: ElementTree.Element) -> dict:
+    """Reduce a DDI <var> element to the fields the tools use."""
+    variable = {
+        "id": element.get("ID", ""),
+        "name": element.get("name", ""),
+        "label": "",
+        "type": None,  # numeric or character
+        "interval": element.get("intrvl"),  # discrete or contin
+        "stats": {},  # mean, medn, mode, vald, invd, min, max, stdev
+        "category_count": 0,
+        "categories": [],
+    }
+    for child in element:
+        tag = local_name(child.tag)
+        if tag == "labl" and not variable["label"]:
+            variable["label"] = " ".join((child.text or "").split())
+        elif tag == "varFormat":
+            variable["type"] = child.get("type")
+        elif tag == "sumStat" and child.get("type"):
+            variable["stats"][child.get("type")] = ddi_number(child.text)
+        elif tag == "catgry":
+            variable["category_count"] += 1
+            if len(variable["categories"]) >= DDI_MAX_CATEGORIES:
+                continue
+            category = {"value": "", "label": "", "count": None}
+            for part in child:
+                part_tag = local_name(part.tag)
+                if part_tag == "catValu":
+                    category["value"] = (part.text or "").strip()
+                elif part_tag == "labl":
+                    category["label"] = " ".join((part.text or "").split())
+                elif part_tag == "catStat" and part.get("type", "freq") == "freq":
+                    category["count"] = ddi_number(part.text)
+            variable["categories"].append(category)
+    return variable
+
+class DdiParser:
+    """Parse the variables out of a DDI codebook as it downloads.
+
+    Each <var> element is reduced to a small dict as soon as it closes and
+    then cleared, so memory follows the variable list rather than the size
+    of the codebook.
+    """
+
+    def __init__(self):
+        self.parser = ElementTree.XMLPullParser(events=("end",))
+        self.rows = None
+        self.variables = []
+
+    def feed(self, data: bytes) -> None:
+        self.parser.feed(data)
+        self.collect()
+
+    def close(self) -> dict:
+        self.parser.close()
+        self.collect()
+        return {"rows": self.rows, "variables": self.variables}
+
+    def collect(self) -> None:
+        for _, element in self.parser.read_events():
+            tag = local_name(element.tag)
+            if tag == "var":
+                self.variables.append(ddi_variable(element))
+                element.clear()
+            elif tag == "caseQnty" and self.rows is None:
+                rows = ddi_number(element.text)
+                self.rows = rows if isinstance(rows, int) else None
+            elif tag in ("stdyDscr", "otherMat"):
+                # Study descriptions and other material can be large and aren't used
+                element.clear()
+
+async def get_ddi_codebook(file_id: str) -> dict:
+    """Return an ingested tabular file's row count and variables from its DDI codebook.
+
+    "variables" is empty if the file has no codebook. Parsed results are
+    cached per file ID, and concurrent requests for the same file share one
+    download.
+    """
+    codebook = ddi_cache.get(file_id)
+    if codebook is not None:
+        return codebook
+    return await inflight.do(("ddi", file_id), lambda: fetch_ddi_codebook(file_id))
+
+async def fetch_ddi_codebook(file_id: str) -> dict:
+    """Stream and parse /access/datafile/{file_id}/metadata/ddi."""
+    response = await open_datafile_stream(file_id, suffix="/metadata/ddi")
+    try:
+        if response.status_code in (400, 404):
+            # Not an ingested tabular file
+            codebook = {"rows": None, "variables": []}
+        else:
+            response.raise_for_status()
+            parser = DdiParser()
+            async for chunk in response.aiter_bytes():
+                metrics.bytes_downloaded += len(chunk)
+                parser.feed(chunk)
+            codebook = parser.close()
+    finally:
+        await response.aclose()
+    ddi_cache.set(file_id, codebook, 64 + len(json.dumps(codebook)))
+    return codebook
+
+async def select_variables(file_id: str, filename: str, columns: list):
+    """Look up column names (case-insensitively) in a file's DDI codebook.
+
+    Returns the matching variables in file order, which is the order a
+    subset comes back in, or a TextContent explaining why they can't be
+    selected.
+    """
+    variables = (await get_ddi_codebook(file_id))["variables"]
+    if not variables:
+        return TextContent(
+            type="text",
+            text=f"Error: Columns can only be selected from ingested tabular files, and '{filename}' "
+                 f"has no variable metadata. Leave out columns to read the whole file."
+        )
+    wanted = {column.lower() for column in columns}
+    selection = [variable for variable in variables if variable["name"].lower() in wanted]
+    missing = wanted - {variable["name"].lower() for variable in selection}
+    if missing:
+        known = ", ".join(variable["name"] for variable in variables[:50])
+        if len(variables) > 50:
+            known += f", … ({len(variables):,} in all)"
+        unknown = ", ".join(column for column in columns if column.lower() in missing)
+        return TextContent(
+            type="text",
+            text=f"Error: '{filename}' has no column named {unknown}. Its columns are: {known}\n\n"
+                 f"Use describe_file_variables to search them by name or label."
+        )
+    return selection
+
+def worker_timeout_message(filename: str, file_id: str) -> TextContent:
+    """Build the message returned when extraction or formatting runs past WORKER_TIMEOUT."""
+    return TextContent(
+        type="text",
+        text=f"⚠️ Processing '{filename}' took longer than {WORKER_TIMEOUT:g} seconds and was abandoned. "
+             f"Try fewer lines, or download the file directly.\n\n"
+             f"**Direct download link:** https://borealisdata.ca/api/access/datafile/{file_id}"
+    )
+
+def past_end_message(filename: str, total_lines: int, start_line: int) -> TextContent:
+    """Build the message returned when start_line is beyond the end of a file."""
+    return TextContent(
+        type="text",
+        text=f"'{filename}' has only {total_lines:,} lines, so there is nothing to show from "
+             f"line {start_line:,}. Use a smaller start_line."
+    )
+
+def response_file_size(response: httpx.Response) -> Optional[int]:
+    """Return the full size of a downloaded file from Content-Range or Content-Length."""
+    content_range = response.headers.get("content-range", "")
+    if response.status_code == 206:
+        total = content_range.rpartition("/")[2]
+        return int(total) if total.isdigit() else None
+    content_length = response.headers.get("content-length")
+    return int(content_length) if content_length and content_length.isdigit() else None
+
 async def get_dataset_file(arguments: dict) -> list[TextContent]:
-    """Download and retrieve content of a specific file from a dataset."""
-    file_id = arguments.get("file_id", "")
+    """Download and retrieve content of a specific file from a dataset.
+
+    Identical concurrent requests share one download and its result.
+    """
+    flight_key = ("file",) + tuple(
+        str(arguments.get(name, ""))
+        for name in ("file_id", "filename", "max_lines", "start_line", "doi", "format", "preview", "max_chars",
+                     "columns", "file_format")
+    )
+    return await inflight.do(flight_key, lambda: read_dataset_file(arguments))
+
+def representation_markdown(result: dict) -> str:
+    """Markdown lines naming a column subset or the original format, if one was read."""
+    text = ""
+    if result.get("columns"):
+        text += f"**Columns:** {', '.join(result['columns'])}\n"
+    if result.get("file_format") == "original":
+        text += "**Format:** original upload\n"
+    return text
+
+def representation_compact(result: dict) -> str:
+    """Compact counterpart of representation_markdown, e.g. ", columns a,b"."""
+    text = ""
+    if result.get("columns"):
+        text += f", columns {','.join(result['columns'])}"
+    if result.get("file_format") == "original":
+        text += ", original"
+    return text
+
+@renderer("file", "markdown")
+def render_file_markdown(result: dict) -> str:
+    start_line, max_lines, total_lines = result["start_line"], result["max_lines"], result["total_lines"]
+    file_size = result["file_size"]
+    last_line = start_line + len(result["lines"]) - 1
+    parts = [f"# File: {result['filename']}\n\n", f"**File ID:** {result['file_id']}\n"]
+    parts.append(representation_markdown(result))
+    if total_lines is not None:
+        parts.append(f"**Total lines:** {total_lines:,}\n")
+    else:
+        parts.append(f"**Total lines:** more than {last_line:,} (stopped reading after the lines shown)\n")
+    if start_line > 1 or result["truncated"]:
+        parts.append(f"**Lines shown:** {start_line:,}–{last_line:,}\n")
+    if file_size is not None:
+        parts.append(f"**File size:** {file_size:,} bytes ({file_size / 1024:.1f} KB)\n\n")
+    else:
+        parts.append("**File size:** unknown (server did not report it)\n\n")
+    
+    if result["truncated"]:
+        doi = result["doi"]
+        doi_line = f"\n- **Download the full file directly:** Visit the dataset at {doi}" if doi else ""
+        total_text = f"file has {total_lines:,} total lines" if total_lines is not None else "file has more lines"
+        shown_text = f"first {max_lines:,} lines" if start_line == 1 else f"{max_lines:,} lines from line {start_line:,}"
+        parts.append(
+            f"⚠️ **Note:** File truncated to {shown_text} "
+            f"({total_text})\n\n"
+            f"**Why the limit?** Claude's context window is 200,000 tokens. Loading large files "
+            f"in full can crowd out conversation history and reduce response quality. "
+            f"The maximum supported limit is 2,000 lines.\n\n"
+            f"**Your options:**\n"
+            f"- **See the next lines:** Call again with start_line={start_line + max_lines}\n"
+            f"- **See more lines at once:** Ask to re-fetch this file with a higher line limit (up to 2,000)"
+            f"{doi_line}\n\n"
+        )
+    parts.append("---\n\n")
+    
+    # Add line numbers and content
+    parts.extend(f"{line_num:4d} | {line}\n" for line_num, line in enumerate(result["lines"], start_line))
+    
+    if result["truncated"]:
+        if total_lines is not None:
+            parts.append(f"\n... ({total_lines - last_line:,} more lines not shown)")
+        else:
+            parts.append("\n... (more lines not shown)")
+    return "".join(parts)
+
+@renderer("file", "compact")
+def render_file_compact(result: dict) -> str:
+    start_line, total_lines = result["start_line"], result["total_lines"]
+    last_line = start_line + len(result["lines"]) - 1
+    total = f"{total_lines:,}" if total_lines is not None else f"more than {last_line:,}"
+    size = f", {format_size(result['file_size'])}" if result["file_size"] is not None else ""
+    lines = [f"{result['filename']} (file {result['file_id']}{representation_compact(result)}): "
+             f"lines {start_line:,}-{last_line:,} of {total}{size}"]
+    lines.extend(f"{line_num}|{line}" for line_num, line in enumerate(result["lines"], start_line))
+    if result["truncated"]:
+        lines.append(f"(more: start_line={start_line + result['max_lines']})")
+    return "\n".join(lines) + "\n"
+
+def sample_gap(previous_end: int, next_start: int) -> str:
+    """Describe the lines left out between two segments of a sample."""
+    first, last = previous_end + 1, next_start - 1
+    if first == last:
+        return f"line {first:,} omitted"
+    return f"lines {first:,}–{last:,} omitted ({last - first + 1:,} lines)"
+
+@renderer("file_sample", "markdown")
+def render_file_sample_markdown(result: dict) -> str:
+    total_lines, file_size, segments = result["total_lines"], result["file_size"], result["segments"]
+    last_seen = segments[-1]["start"] + len(segments[-1]["lines"]) - 1 if segments else 0
+    parts = [f"# File: {result['filename']} (sampled preview)\n\n", f"**File ID:** {result['file_id']}\n",
+             representation_markdown(result)]
+    if total_lines is not None:
+        parts.append(f"**Total lines:** {total_lines:,}\n")
+    else:
+        parts.append(f"**Total lines:** more than {last_seen:,} "
+                     f"(stopped reading after {FILE_SCAN_MAX_BYTES // (1024 * 1024)} MB)\n")
+    if file_size is not None:
+        parts.append(f"**File size:** {file_size:,} bytes ({file_size / 1024:.1f} KB)\n")
+    if len(segments) <= 1 and result["complete"]:
+        parts.append(f"**Preview:** the whole file fits in {result['max_chars']:,} characters\n\n")
+    else:
+        parts.append(
+            f"**Preview:** the first {result['head_lines']:,} and last {result['tail_lines']:,} lines read, "
+            f"plus {result['sampled_lines']:,} lines sampled at random from the "
+            f"{result['interior_lines']:,} in between, within about {result['max_chars']:,} characters. "
+            f"Gaps are marked with ⋮; use start_line to read any part in full.\n\n"
+        )
+    parts.append("---\n\n")
+    previous_end = 0
+    for segment in segments:
+        if segment["start"] > previous_end + 1:
+            parts.append(f"   ⋮ {sample_gap(previous_end, segment['start'])}\n")
+        parts.extend(f"{line_num:4d} | {line}\n" for line_num, line in enumerate(segment["lines"], segment["start"]))
+        previous_end = segment["start"] + len(segment["lines"]) - 1
+    if not result["complete"]:
+        parts.append(f"\n... (lines after {previous_end:,} not read)")
+    return "".join(parts)
+
+@renderer("file_sample", "compact")
+def render_file_sample_compact(result: dict) -> str:
+    total_lines, segments = result["total_lines"], result["segments"]
+    total = f"{total_lines:,} lines" if total_lines is not None else "lines not all read"
+    size = f", {format_size(result['file_size'])}" if result["file_size"] is not None else ""
+    lines = [f"{result['filename']} (file {result['file_id']}{representation_compact(result)}): sample, {total}{size}"]
+    previous_end = 0
+    for segment in segments:
+        if segment["start"] > previous_end + 1:
+            lines.append(f"⋮|{sample_gap(previous_end, segment['start'])}")
+        lines.extend(f"{line_num}|{line}" for line_num, line in enumerate(segment["lines"], segment["start"]))
+        previous_end = segment["start"] + len(segment["lines"]) - 1
+    if not result["complete"]:
+        lines.append(f"(not read past line {previous_end})")
+    return "\n".join(lines) + "\n"
+
+async def read_dataset_file(arguments: dict) -> list[TextContent]:
+    """Stream a file and format a window of its lines for display."""
+    requested_format = output_format(arguments)
+    if requested_format is None:
+        return format_error(arguments)
+    file_id = str(arguments.get("file_id", ""))
     filename = arguments.get("filename", "file")
     max_lines = min(int(arguments.get("max_lines", 100)), 2000)
+    start_line = max(1, int(arguments.get("start_line", 1)))
     doi = arguments.get("doi", "")
+    preview = str(arguments.get("preview") or "head").strip().lower()
+    file_format = str(arguments.get("file_format") or "tab").strip().lower()
+    columns = arguments.get("columns") or []
+    if isinstance(columns, str):
+        columns = columns.split(",")
+    columns = [str(column).strip() for column in columns if str(column).strip()]
     
     if not file_id:
         return [TextContent(
             type="text",
             text="Error: No file ID provided. Use list_dataset_files to get file IDs."
         )]
+    if file_format not in ("tab", "original"):
+        return [TextContent(
+            type="text",
+            text=f"Error: Unknown file_format '{arguments.get('file_format')}'. Use 'tab' or 'original'."
+        )]
+    if columns and file_format == "original":
+        return [TextContent(
+            type="text",
+            text="Error: Columns can only be selected from the tab-delimited version of a file. "
+                 "Leave out file_format or set it to 'tab'."
+        )]
+    if preview not in ("head", "sample"):
+        return [TextContent(
+            type="text",
+            text=f"Error: Unknown preview '{arguments.get('preview')}'. Use 'head' or 'sample'."
+        )]
+    sampler = None
+    if preview == "sample":
+        # A sample always covers the file from its first line
+        max_chars = max(1000, min(int(arguments.get("max_chars", PREVIEW_DEFAULT_CHARS)), PREVIEW_MAX_CHARS))
+        sampler = LineSampler(max_chars, file_id)
+        start_line = 1
     
     # Define supported text file extensions
     TEXT_EXTENSIONS = [
@@ -964,13 +4174,6 @@ async def get_dataset_file(arguments: dict) -> list[TextContent]:
         '.yaml', '.yml', '.ini', '.cfg', '.conf'
     ]
     
-    # Define binary extensions to explicitly reject
-    BINARY_EXTENSIONS = [
-        '.pdf', '.zip', '.xlsx', '.xls', '.sav', '.dta', '.rdata',
-        '.rds', '.doc', '.pptx', '.ppt', '.jpg', '.jpeg',
-        '.png', '.gif', '.exe', '.dll', '.bin'
-    ]
-    
     # Check if filename suggests binary format
     filename_lower = filename.lower()
     is_likely_text = any(filename_lower.endswith(ext) for ext in TEXT_EXTENSIONS)
@@ -996,109 +4199,80 @@ async def get_dataset_file(arguments: dict) -> list[TextContent]:
                  f"**Direct download link:** {download_url}"
         )]
     
-    # Build the API URL for file access
-    api_url = f"{BOREALIS_BASE_URL}/access/datafile/{file_id}"
-    
-    # Prepare headers
-    headers = {}
-    use_auth = False
-    if API_KEY and len(API_KEY) > 10:
-        headers["X-Dataverse-key"] = API_KEY
-        use_auth = True
+    is_docx = filename_lower.endswith('.docx')
+    if is_docx and (columns or file_format == "original"):
+        return [TextContent(
+            type="text",
+            text=f"Error: '{filename}' is a Word document; columns and file_format only apply to tabular files."
+        )]
     
     try:
-        # First, make a HEAD request to check file size without downloading
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            head_response = await client.head(
-                api_url,
-                headers=headers,
-                follow_redirects=True
-            )
-            
-            # Check content length if available
-            content_length = head_response.headers.get("content-length")
-            if content_length:
-                file_size = int(content_length)
-                max_size = 5 * 1024 * 1024  # 5MB in bytes
-                
-                if file_size > max_size:
-                    size_mb = file_size / (1024 * 1024)
-                    return [TextContent(
-                        type="text",
-                        text=f"⚠️ Cannot retrieve '{filename}' - File too large ({size_mb:.1f} MB)\n\n"
-                             f"This tool has a 5MB maximum file size limit because large data files "
-                             f"are not suitable for display in chat. For large datasets, please download "
-                             f"the file directly from the Borealis website for analysis in statistical "
-                             f"software or data analysis tools."
-                    )]
-            
-            # Now download the actual file content
-            response = await client.get(
-                api_url,
-                headers=headers,
-                follow_redirects=True
-            )
-            
-            # If we get a 401 or 403 with auth, try without auth for public files
-            if response.status_code in [401, 403] and use_auth:
-                headers = {}
-                response = await client.get(
-                    api_url,
-                    headers=headers,
-                    follow_redirects=True
-                )
-            
-            # Check for error responses (HTML error pages, JSON errors)
-            content_type = response.headers.get("content-type", "")
-            if "application/json" in content_type:
-                # This is likely an error response
-                try:
-                    error_data = response.json()
-                    if error_data.get("status") == "ERROR":
-                        error_code = error_data.get("code", response.status_code)
-                        if error_code == 403:
-                            return [TextContent(
-                                type="text",
-                                text=f"🔒 Cannot access '{filename}' - File is restricted\n\n"
-                                     f"This file requires specific access permissions that cannot be "
-                                     f"granted through the API. To access restricted files, you may need to:\n"
-                                     f"1. Request access from the dataset owner through the Borealis website\n"
-                                     f"2. Verify you're affiliated with the authorized institution\n"
-                                     f"3. Accept any terms of use or data use agreements"
-                            )]
-                        else:
-                            return [TextContent(
-                                type="text",
-                                text=f"Error accessing file: {error_data.get('message', 'Unknown error')}"
-                            )]
-                except:
-                    pass
-            
+        # Ask for the smallest representation that answers the question: a
+        # column subset of the ingested file, the original upload, or the
+        # default (the tab-delimited archival copy for ingested files)
+        params = {}
+        if file_format == "original":
+            params["format"] = "original"
+        if columns:
+            selection = await select_variables(file_id, filename, columns)
+            if isinstance(selection, TextContent):
+                return [selection]
+            columns = [variable["name"] for variable in selection]
+            params["variables"] = ",".join(variable["id"].lstrip("v") for variable in selection)
+        # Line offsets differ per representation
+        index_key = f"{file_id}?{httpx.QueryParams(params)}" if params else file_id
+        
+        # Start from the nearest known line offset at or before start_line
+        line_index = None
+        first_line, byte_offset = 1, 0
+        if not is_docx:
+            line_index = line_index_cache.get(index_key) or LineOffsetIndex()
+            if line_index.total_lines is not None and start_line > line_index.total_lines:
+                return [past_end_message(filename, line_index.total_lines, start_line)]
+            if line_index.ranges is not False:
+                first_line, byte_offset = line_index.checkpoint(start_line)
+        
+        # One streamed GET: size, content type and auth outcome all come from
+        # the response headers, and the body is only read as far as needed
+        response = await open_datafile_stream(file_id, byte_offset, params)
+        
+        try:
+            error = await datafile_error_message(response, filename)
+            if error is not None:
+                return [error]
+            if byte_offset and response.status_code == 416:
+                # The checkpoint is the empty line after the final newline
+                line_index.total_lines = first_line
+                line_index_cache.set(index_key, line_index, line_index.size())
+                return [past_end_message(filename, first_line, start_line)] if start_line > first_line else [
+                    TextContent(type="text", text=f"Line {start_line:,} of '{filename}' is the empty last line.")
+                ]
             response.raise_for_status()
+            if byte_offset:
+                # A 200 means the Range header was ignored and the whole file follows
+                line_index.ranges = response.status_code == 206
+                if not line_index.ranges:
+                    first_line, byte_offset = 1, 0
             
-            # Get the file content
-            file_content = response.content
+            # File size from the response headers, when the server sends one
+            file_size = response_file_size(response)
+            if file_size is None and line_index is not None:
+                file_size = line_index.file_size
 
-            # DOCX extraction
-            if filename_lower.endswith('.docx'):
+            # DOCX extraction needs the whole document
+            if is_docx:
+                if file_size is not None and file_size > MAX_FILE_SIZE:
+                    return [file_too_large_message(filename, f"{file_size / (1024 * 1024):.1f} MB")]
+                file_content = await read_limited(response, MAX_FILE_SIZE)
+                if file_content is None:
+                    return [file_too_large_message(filename, f"over {MAX_FILE_SIZE // (1024 * 1024)} MB")]
+                file_size = len(file_content)
+                payload_bytes = file_size
                 try:
-                    import io
-                    from docx import Document
-                    doc = Document(io.BytesIO(file_content))
-                    extracted_lines = []
-                    for para in doc.paragraphs:
-                        style_name = para.style.name if para.style else ""
-                        if style_name.startswith("Heading 1"):
-                            extracted_lines.append(f"# {para.text}")
-                        elif style_name.startswith("Heading 2"):
-                            extracted_lines.append(f"## {para.text}")
-                        elif style_name.startswith("Heading 3"):
-                            extracted_lines.append(f"### {para.text}")
-                        elif "Heading" in style_name:
-                            extracted_lines.append(f"#### {para.text}")
-                        else:
-                            extracted_lines.append(para.text)
-                    text_content = "\n".join(extracted_lines)
+                    # Stop one line past the window, so truncation is known;
+                    # a sample needs every line
+                    line_limit = None if sampler is not None else start_line + max_lines
+                    lines, complete = await run_in_worker(extract_docx_lines, file_content, line_limit)
                 except ImportError:
                     download_url = f"https://borealisdata.ca/api/access/datafile/{file_id}"
                     return [TextContent(
@@ -1108,6 +4282,8 @@ async def get_dataset_file(arguments: dict) -> list[TextContent]:
                              f"  pip install python-docx\n\n"
                              f"**Direct download link:** {download_url}"
                     )]
+                except asyncio.TimeoutError:
+                    return [worker_timeout_message(filename, file_id)]
                 except Exception as e:
                     download_url = f"https://borealisdata.ca/api/access/datafile/{file_id}"
                     return [TextContent(
@@ -1115,16 +4291,82 @@ async def get_dataset_file(arguments: dict) -> list[TextContent]:
                         text=f"Failed to extract text from '{filename}': {str(e)}\n\n"
                              f"**Direct download link:** {download_url}"
                     )]
+                total_lines = len(lines) if complete else None
+                if start_line > len(lines):
+                    return [past_end_message(filename, len(lines), start_line)]
+                lines = lines[start_line - 1:]
+                if sampler is not None:
+                    for line_no, line in enumerate(lines, 1):
+                        sampler.add(line_no, line)
+                scan_complete = True
             else:
-                # Try to decode as text
-                try:
-                    # Try UTF-8 first
-                    text_content = file_content.decode('utf-8')
-                except UnicodeDecodeError:
+                # Skip to start_line, noting line offsets on the way, then read
+                # one line past the limit so we know whether to truncate, and
+                # stop and drop the rest of the body. A sample reads it all.
+                # Lines skipped over, or sampled, only need a prefix; a window
+                # line too long to return stops the download.
+                reader = LineReader(response, FILE_SCAN_MAX_BYTES, MAX_FILE_SIZE,
+                                    clip_long_lines=sampler is not None or start_line > first_line)
+                raw_lines = []
+                window_bytes = 0
+                line_no = first_line - 1
+                position = byte_offset
+                async for raw_line in reader:
+                    line_no += 1
+                    if file_format == "original" and line_no == 1 and b"\x00" in raw_line:
+                        return [TextContent(
+                            type="text",
+                            text=f"⚠️ The original upload of '{filename}' is a binary file (e.g. SPSS or Stata). "
+                                 f"Leave out file_format to read its tab-delimited version."
+                        )]
+                    line_index.record(line_no, position)
+                    position += reader.line_bytes + 1
+                    if sampler is not None:
+                        sampler.add(line_no, decode_line(raw_line))
+                    elif line_no >= start_line:
+                        raw_lines.append(raw_line)
+                        window_bytes += len(raw_line) + 1
+                        if len(raw_lines) > max_lines or window_bytes > MAX_FILE_SIZE:
+                            break
+                    else:
+                        # Window lines are read in full
+                        reader.clip_long_lines = line_no + 1 < start_line
+                # Total line count is only known once the whole file was read
+                if reader.finished:
+                    line_index.total_lines = line_no
+                    if file_size is None and byte_offset == 0:
+                        file_size = reader.bytes_read
+                line_index.file_size = file_size
+                line_index_cache.set(index_key, line_index, line_index.size())
+                total_lines = line_index.total_lines
+                scan_complete = not reader.exceeded
+                payload_bytes = window_bytes
+                if sampler is None:
+                    if reader.line_too_long:
+                        return [file_too_large_message(
+                            filename, f"line {line_no + 1:,} alone is over {MAX_FILE_SIZE // (1024 * 1024)} MB"
+                        )]
+                    if window_bytes > MAX_FILE_SIZE:
+                        return [file_too_large_message(
+                            filename, f"over {MAX_FILE_SIZE // (1024 * 1024)} MB in the requested lines"
+                        )]
+                    if not raw_lines:
+                        if reader.exceeded:
+                            return [TextContent(
+                                type="text",
+                                text=f"Line {start_line:,} of '{filename}' was not reached within "
+                                     f"{FILE_SCAN_MAX_BYTES // (1024 * 1024)} MB (scanned up to line {line_no:,}). "
+                                     f"Call again with the same start_line to continue from there."
+                            )]
+                        return [past_end_message(filename, line_no, start_line)]
+                    
+                    # Try to decode as text, off the event loop when there's a lot
                     try:
-                        # Try Latin-1 as fallback
-                        text_content = file_content.decode('latin-1')
-                    except:
+                        if window_bytes >= WORKER_MIN_BYTES:
+                            lines = await run_in_worker(decode_lines, raw_lines)
+                        else:
+                            lines = decode_lines(raw_lines)
+                    except UnicodeDecodeError:
                         download_url = f"https://borealisdata.ca/api/access/datafile/{file_id}"
                         return [TextContent(
                             type="text",
@@ -1133,48 +4375,529 @@ async def get_dataset_file(arguments: dict) -> list[TextContent]:
                                  f"text encoding. Please download it directly from Borealis to examine with appropriate software.\n\n"
                                  f"**Direct download link:** {download_url}"
                         )]
-            
-            # Split into lines and check length
-            lines = text_content.split('\n')
-            total_lines = len(lines)
-            
-            # Format the output
-            result_text = f"# File: {filename}\n\n"
-            result_text += f"**File ID:** {file_id}\n"
-            result_text += f"**Total lines:** {total_lines:,}\n"
-            result_text += f"**File size:** {len(file_content):,} bytes ({len(file_content) / 1024:.1f} KB)\n\n"
-            
-            # Truncate if needed
-            if total_lines > max_lines:
-                doi_line = f"\n- **Download the full file directly:** Visit the dataset at {doi}" if doi else ""
-                result_text += (
-                    f"⚠️ **Note:** File truncated to first {max_lines:,} lines "
-                    f"(file has {total_lines:,} total lines)\n\n"
-                    f"**Why the limit?** Claude's context window is 200,000 tokens. Loading large files "
-                    f"in full can crowd out conversation history and reduce response quality. "
-                    f"The maximum supported limit is 2,000 lines.\n\n"
-                    f"**Your options:**\n"
-                    f"- **See more lines:** Ask to re-fetch this file with a higher line limit (up to 2,000)"
-                    f"{doi_line}\n\n"
-                )
-                result_text += "---\n\n"
-                display_lines = lines[:max_lines]
+        finally:
+            await response.aclose()
+        
+        if sampler is not None:
+            result = {
+                "kind": "file_sample",
+                "file_id": file_id,
+                "filename": filename,
+                "doi": doi,
+                "total_lines": total_lines,
+                "file_size": file_size,
+                "complete": scan_complete,
+                "columns": columns or None,
+                "file_format": file_format,
+                "max_chars": sampler.max_chars,
+                **sampler.result(),
+            }
+            return render_result(result, requested_format)
+        
+        truncated = len(lines) > max_lines
+        result = {
+            "kind": "file",
+            "file_id": file_id,
+            "filename": filename,
+            "doi": doi,
+            "total_lines": total_lines,
+            "file_size": file_size,
+            "columns": columns or None,
+            "file_format": file_format,
+            "start_line": start_line,
+            "max_lines": max_lines,
+            "truncated": truncated,
+            # Limit very long lines
+            "lines": [line if len(line) <= 500 else line[:500] + "... (line truncated)" for line in lines[:max_lines]],
+        }
+        if payload_bytes >= WORKER_MIN_BYTES:
+            return await run_in_worker(render_result, result, requested_format)
+        return render_result(result, requested_format)
+    
+    except asyncio.TimeoutError:
+        return [worker_timeout_message(filename, file_id)]
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            error_msg = f"File not found (ID: {file_id}). Please check the file ID from list_dataset_files."
+        elif e.response.status_code == 403:
+            error_msg = f"🔒 Access denied to '{filename}'. This file is restricted and requires special permissions."
+        else:
+            error_msg = f"HTTP error {e.response.status_code} while accessing file."
+        return [TextContent(type="text", text=error_msg)]
+    except httpx.RequestError as e:
+        error_msg = f"Network error occurred: {str(e)}"
+        return [TextContent(type="text", text=error_msg)]
+    except Exception as e:
+        error_msg = f"Unexpected error retrieving file: {str(e)}"
+        return [TextContent(type="text", text=error_msg)]
+
+# Tabular profiling: one streaming pass over a delimited file, summarizing
+# each column in bounded memory instead of returning its lines
+PROFILE_MAX_BYTES = _env_int("BOREALIS_PROFILE_MAX_BYTES", 500 * 1024 * 1024)
+PROFILE_MAX_LINE_BYTES = 1024 * 1024  # a longer line ends the profile there
+PROFILE_EXTENSIONS = ('.csv', '.tsv', '.tab', '.txt', '.dat')
+PROFILE_SNIFF_LINES = 50
+PROFILE_BATCH_LINES = 2000
+PROFILE_MAX_COLUMNS = 200  # further columns are counted but not profiled
+PROFILE_DISTINCT_LIMIT = 10000  # distinct values are counted exactly up to this
+PROFILE_COUNTERS = 64  # space-saving counters per column for top values
+PROFILE_MAX_VALUE_LENGTH = 100
+NULL_TOKENS = frozenset({"", "na", "n/a", "nan", "null", "none", "."})
+NUMBER_START = frozenset("0123456789+-.")
+BOOLEAN_TOKENS = frozenset({"true", "false", "yes", "no", "t", "f", "y", "n"})
+ISO_DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?")
+DELIMITER_NAMES = {",": "comma", "\t": "tab", ";": "semicolon", "|": "pipe"}
+
+class SpaceSaving:
+    """Approximate most frequent values of a stream with a fixed number of counters.
+
+    Space-saving algorithm (Metwally et al.): an unseen value takes over the
+    counter of the least frequent one and inherits its count, which is kept
+    as that value's possible overcount. Any value occurring more than
+    n / capacity times is guaranteed to hold a counter.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        # One (count, value) entry per counter; counts may lag behind
+        self._heap = []
+
+    def add(self, value: str) -> None:
+        counts = self.counts
+        if value in counts:
+            counts[value] += 1
+            return
+        if len(counts) < self.capacity:
+            counts[value] = 1
+            self.errors[value] = 0
+            heapq.heappush(self._heap, (1, value))
+            return
+        # Pop until the smallest entry is up to date
+        while True:
+            count, victim = heapq.heappop(self._heap)
+            if counts[victim] == count:
+                break
+            heapq.heappush(self._heap, (counts[victim], victim))
+        del counts[victim]
+        del self.errors[victim]
+        counts[value] = count + 1
+        self.errors[value] = count
+        heapq.heappush(self._heap, (count + 1, value))
+
+    def top(self, k: int) -> list:
+        """Return up to k (value, count, possible overcount) tuples, most frequent first."""
+        ranked = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [(value, count, self.errors[value]) for value, count in ranked]
+
+class ColumnProfile:
+    """Streaming summary of one column: type, nulls, distinct values, range and top values."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.values = 0
+        self.nulls = 0
+        self.integers = 0
+        self.floats = 0
+        self.booleans = 0
+        self.dates = 0
+        # Welford's online mean and variance over the numeric values
+        self.numeric = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.first_date = None
+        self.last_date = None
+        self.distinct = set()
+        self.distinct_overflow = False
+        self.top = SpaceSaving(PROFILE_COUNTERS)
+
+    def add(self, raw: str) -> None:
+        value = raw.strip()
+        if value.lower() in NULL_TOKENS:
+            self.nulls += 1
+            return
+        self.values += 1
+        value = value[:PROFILE_MAX_VALUE_LENGTH]
+        if not self.distinct_overflow:
+            self.distinct.add(value)
+            if len(self.distinct) > PROFILE_DISTINCT_LIMIT:
+                self.distinct_overflow = True
+                self.distinct = set()
+        
+        # Cheap character checks first: exceptions are slow on text columns
+        number = None
+        if value[0] in NUMBER_START:
+            if value.isascii() and value.lstrip("+-").isdigit():
+                try:
+                    number = int(value)
+                    self.integers += 1
+                except ValueError:
+                    pass
             else:
-                result_text += "---\n\n"
-                display_lines = lines
-
-            # Add line numbers and content
-            for line_num, line in enumerate(display_lines, 1):
-                # Limit very long lines
-                if len(line) > 500:
-                    line = line[:500] + "... (line truncated)"
-                result_text += f"{line_num:4d} | {line}\n"
-
-            if total_lines > max_lines:
-                result_text += f"\n... ({total_lines - max_lines:,} more lines not shown)"
+                try:
+                    number = float(value)
+                except ValueError:
+                    pass
+                else:
+                    if math.isfinite(number):
+                        self.floats += 1
+                    else:
+                        number = None
+        # Top values of a many-valued numeric column are never shown
+        if not (self.distinct_overflow and number is not None and self.numeric + 1 == self.values):
+            self.top.add(value)
+        if number is not None:
+            self.numeric += 1
+            delta = number - self.mean
+            self.mean += delta / self.numeric
+            self.m2 += delta * (number - self.mean)
+            if self.minimum is None or number < self.minimum:
+                self.minimum = number
+            if self.maximum is None or number > self.maximum:
+                self.maximum = number
+        elif value.lower() in BOOLEAN_TOKENS:
+            self.booleans += 1
+        elif ISO_DATE_PATTERN.fullmatch(value):
+            self.dates += 1
+            if self.first_date is None or value < self.first_date:
+                self.first_date = value
+            if self.last_date is None or value > self.last_date:
+                self.last_date = value
+
+    @property
+    def inferred_type(self) -> str:
+        if not self.values:
+            return "empty"
+        if self.integers == self.values:
+            return "integer"
+        if self.integers + self.floats == self.values:
+            return "float"
+        if self.booleans == self.values:
+            return "boolean"
+        if self.dates == self.values:
+            return "date"
+        return "text"
+
+    def result(self, top_k: int) -> dict:
+        """Return the column's summary as plain data for rendering."""
+        inferred = self.inferred_type
+        stats = top = None
+        if inferred in ("integer", "float"):
+            stddev = (self.m2 / (self.numeric - 1)) ** 0.5 if self.numeric > 1 else 0.0
+            stats = {"min": self.minimum, "max": self.maximum, "mean": self.mean, "sd": stddev}
+        # Small sets of integer codes are usually categories
+        if inferred in ("text", "boolean") or (
+                inferred == "integer" and not self.distinct_overflow and len(self.distinct) <= top_k):
+            # A count mostly inherited from evicted values says nothing
+            top = [{"value": value, "count": count, "approximate": bool(overcount)}
+                   for value, count, overcount in self.top.top(top_k) if overcount * 2 < count]
+        return {
+            "name": self.name,
+            "type": inferred,
+            "values": self.values,
+            "nulls": self.nulls,
+            "distinct": None if self.distinct_overflow else len(self.distinct),
+            "numeric_values": self.numeric,
+            "stats": stats,
+            "first_date": self.first_date if inferred == "date" else None,
+            "last_date": self.last_date if inferred == "date" else None,
+            "top": top,
+        }
+
+class TabularProfiler:
+    """Parse delimited text one batch of lines at a time and profile its columns.
+
+    Quoted fields may span lines: a batch is only parsed up to the last line
+    that ends outside quotes, and the rest waits for the next batch. A quote
+    left open for more than csv's field size limit is taken to be a stray
+    one: the record it opened is dropped as malformed and parsing resumes
+    outside quotes, so one bad line can't hold the rest of the file.
+    """
+
+    def __init__(self, delimiter: str, has_header: bool):
+        self.delimiter = delimiter
+        self.has_header = has_header
+        self.header = None
+        self.columns = []
+        self.rows = 0
+        self.ragged_rows = 0
+        self.malformed_rows = 0
+        self.width = 0
+        self._pending = []
+        self._complete = 0
+        self._in_quotes = False
+        self._open_chars = 0  # characters of the record still inside quotes
+
+    def add_line(self, line: str) -> None:
+        self._pending.append(line + "\n")
+        if line.count('"') % 2:
+            self._in_quotes = not self._in_quotes
+        if not self._in_quotes:
+            self._complete = len(self._pending)
+            self._open_chars = 0
+            if self._complete >= PROFILE_BATCH_LINES:
+                self.flush()
+            return
+        self._open_chars += len(line) + 1
+        if self._open_chars > csv.field_size_limit():
+            self.flush()
+            self._pending = []
+            self._in_quotes = False
+            self._open_chars = 0
+            self.malformed_rows += 1
+
+    def flush(self, final: bool = False) -> None:
+        """Parse the complete records gathered so far (everything, if final).
+
+        Without final, a record still open at the end is left unparsed; that
+        is how a body cut off at the byte cap is finished.
+        """
+        end = len(self._pending) if final else self._complete
+        batch = self._pending[:end]
+        self._pending = self._pending[end:]
+        self._complete = 0
+        for fields in csv.reader(batch, delimiter=self.delimiter):
+            if not fields:
+                continue
+            self.add_row(fields)
+
+    def add_row(self, fields: list) -> None:
+        if self.header is None:
+            if self.has_header:
+                self.header = [name.strip() or f"column_{idx}" for idx, name in enumerate(fields, 1)]
+                self.width = len(fields)
+                self.columns = [ColumnProfile(name) for name in self.header[:PROFILE_MAX_COLUMNS]]
+                return
+            self.header = []
+            self.width = len(fields)
+        if len(fields) != self.width:
+            self.ragged_rows += 1
+        self.rows += 1
+        while len(self.columns) < min(len(fields), PROFILE_MAX_COLUMNS):
+            idx = len(self.columns)
+            name = self.header[idx] if idx < len(self.header) else f"column_{idx + 1}"
+            self.columns.append(ColumnProfile(name))
+        for column, value in zip(self.columns, fields):
+            column.add(value)
+        # Columns missing from a short row count as nulls
+        for column in self.columns[len(fields):]:
+            column.nulls += 1
+
+def sniff_table(sample_lines: list, filename: str) -> tuple:
+    """Guess the delimiter and whether there is a header row; returns (delimiter, has_header)."""
+    sample = "\n".join(sample_lines)
+    sniffer = csv.Sniffer()
+    try:
+        delimiter = sniffer.sniff(sample, delimiters=",\t;|").delimiter
+    except csv.Error:
+        first = sample_lines[0] if sample_lines else ""
+        if filename.lower().endswith((".tsv", ".tab")):
+            delimiter = "\t"
+        else:
+            delimiter = max(",\t;|", key=first.count)
+    if filename.lower().endswith(".tab"):
+        # Dataverse's ingested tabular format always has a header row
+        return delimiter, True
+    try:
+        has_header = sniffer.has_header(sample)
+    except csv.Error:
+        has_header = True
+    return delimiter, has_header
+
+def profile_top_values(top: list, limit: int = 40) -> str:
+    parts = []
+    for entry in top:
+        shown = entry["value"] if len(entry["value"]) <= limit else entry["value"][:limit] + "…"
+        shown = " ".join(shown.split())
+        parts.append(f"{shown} ({'~' if entry['approximate'] else ''}{entry['count']:,})")
+    if not parts:
+        return "no frequent values"
+    return "top: " + ", ".join(parts)
+
+def profile_column_summary(column: dict, limit: int = 40) -> str:
+    """Describe a profiled column's range or most frequent values in one line."""
+    stats = column["stats"]
+    if stats is not None:
+        text = (f"min {stats['min']:.6g}, max {stats['max']:.6g}, "
+                f"mean {stats['mean']:.6g}, sd {stats['sd']:.4g}")
+        if column["top"] is not None:
+            text += "; " + profile_top_values(column["top"], limit)
+        return text
+    if column["type"] == "date":
+        return f"from {column['first_date']} to {column['last_date']}"
+    if column["top"] is None:
+        return ""
+    text = profile_top_values(column["top"], limit)
+    if column["numeric_values"]:
+        text += f" ({column['numeric_values']:,} numeric values)"
+    return text
+
+@renderer("profile", "markdown")
+def render_profile_markdown(result: dict) -> str:
+    delimiter = DELIMITER_NAMES.get(result["delimiter"], repr(result["delimiter"]))
+    bytes_profiled = result["bytes_profiled"]
+    columns = result["columns"]
+    parts = [f"# Profile: {result['filename']}\n\n", f"**File ID:** {result['file_id']}\n"]
+    parts.append(f"**Rows:** {result['rows']:,} ({'plus a header row' if result['has_header'] else 'no header row'}) | "
+                 f"**Columns:** {result['total_columns']:,} | **Delimiter:** {delimiter} | **Encoding:** {result['encoding']}\n")
+    parts.append(f"**Bytes profiled:** {bytes_profiled:,}\n")
+    if result["long_line"] is not None:
+        parts.append(f"\n⚠️ Line {result['long_line']:,} is over {PROFILE_MAX_LINE_BYTES // (1024 * 1024)} MB long, "
+                     f"so profiling stopped there; counts cover the lines before it.\n")
+    elif not result["complete"]:
+        parts.append(f"\n⚠️ Only the first {bytes_profiled / (1024 * 1024):,.1f} MB were profiled; "
+                     f"the file is larger, so counts cover that part only.\n")
+    if result["ragged_rows"]:
+        parts.append(f"\n⚠️ {result['ragged_rows']:,} rows have a different number of fields than the first row.\n")
+    if result["malformed_rows"]:
+        parts.append(f"\n⚠️ {result['malformed_rows']:,} rows were skipped: each opened a quote that never closed.\n")
+    if result["total_columns"] > len(columns):
+        parts.append(f"\n(Only the first {len(columns)} columns are profiled.)\n")
+    
+    parts.append("\n| # | Column | Type | Nulls | Distinct | Summary |\n|---|---|---|---|---|---|\n")
+    for idx, column in enumerate(columns, 1):
+        total = column["values"] + column["nulls"]
+        nulls = f"{column['nulls']:,}" + (f" ({column['nulls'] / total:.0%})" if column["nulls"] and total else "")
+        distinct = f">{result['distinct_limit']:,}" if column["distinct"] is None else f"{column['distinct']:,}"
+        name = column["name"].replace("|", "\\|")
+        summary = profile_column_summary(column).replace("|", "\\|")
+        parts.append(f"| {idx} | {name} | {column['type']} | {nulls} | {distinct} | {summary} |\n")
+    if any(entry["approximate"] for column in columns for entry in column["top"] or ()):
+        parts.append("\n~ marks approximate counts (upper bounds from a fixed number of counters).\n")
+    return "".join(parts)
+
+@renderer("profile", "compact")
+def render_profile_compact(result: dict) -> str:
+    columns = result["columns"]
+    header = (f"{result['filename']} (file {result['file_id']}): {result['rows']:,} rows, "
+              f"{result['total_columns']:,} columns, {DELIMITER_NAMES.get(result['delimiter'], repr(result['delimiter']))}-delimited, "
+              f"{result['encoding']}")
+    if result["long_line"] is not None:
+        header += f", stopped at long line {result['long_line']:,}"
+    elif not result["complete"]:
+        header += f", first {result['bytes_profiled'] / (1024 * 1024):,.1f} MB only"
+    if result["ragged_rows"]:
+        header += f", {result['ragged_rows']:,} ragged rows"
+    if result["malformed_rows"]:
+        header += f", {result['malformed_rows']:,} malformed rows skipped"
+    lines = [header]
+    for idx, column in enumerate(columns, 1):
+        distinct = f">{result['distinct_limit']}" if column["distinct"] is None else str(column["distinct"])
+        cells = [str(idx), column["name"], column["type"], f"{column['nulls']} null", f"{distinct} distinct",
+                 profile_column_summary(column, limit=20)]
+        lines.append("|".join(compact_cell(cell, limit=120) for cell in cells))
+    return "\n".join(lines) + "\n"
+
+async def profile_tabular_file(arguments: dict) -> list[TextContent]:
+    """Profile a delimited text file in one streaming pass.
+
+    Identical concurrent requests share one download and its result.
+    """
+    flight_key = ("profile",) + tuple(str(arguments.get(name, "")) for name in ("file_id", "filename", "top_k", "format"))
+    return await inflight.do(flight_key, lambda: run_tabular_profile(arguments))
+
+async def run_tabular_profile(arguments: dict) -> list[TextContent]:
+    """Stream a delimited file and summarize each column."""
+    requested_format = output_format(arguments)
+    if requested_format is None:
+        return format_error(arguments)
+    file_id = str(arguments.get("file_id", ""))
+    filename = arguments.get("filename", "file")
+    top_k = max(1, min(int(arguments.get("top_k", 5)), 20))
+    
+    if not file_id:
+        return [TextContent(
+            type="text",
+            text="Error: No file ID provided. Use list_dataset_files to get file IDs."
+        )]
+    extension = os.path.splitext(filename.lower())[1]
+    if extension and extension not in PROFILE_EXTENSIONS:
+        return [TextContent(
+            type="text",
+            text=f"⚠️ Cannot profile '{filename}' - only delimited text files "
+                 f"({', '.join(PROFILE_EXTENSIONS)}) can be profiled. Use get_dataset_file to read other text files."
+        )]
+    
+    try:
+        response = await open_datafile_stream(file_id)
+        try:
+            error = await datafile_error_message(response, filename)
+            if error is not None:
+                return [error]
+            response.raise_for_status()
             
-            return [TextContent(type="text", text=result_text)]
+            reader = LineReader(response, PROFILE_MAX_BYTES, PROFILE_MAX_LINE_BYTES)
+            profiler = None
+            sample = []
+            encoding = "UTF-8"
+            line_no = position = 0
+            async for raw_line in reader:
+                line_no += 1
+                position += reader.line_bytes + 1
+                if raw_line.endswith(b"\r"):
+                    raw_line = raw_line[:-1]
+                if encoding == "UTF-8":
+                    try:
+                        line = raw_line.decode("utf-8")
+                    except UnicodeDecodeError:
+                        # Latin-1 decodes anything; switch for the rest of the file
+                        encoding = "Latin-1"
+                if encoding == "Latin-1":
+                    line = raw_line.decode("latin-1")
+                if profiler is None:
+                    if not sample:
+                        line = line.lstrip("\ufeff")
+                    sample.append(line)
+                    if len(sample) < PROFILE_SNIFF_LINES:
+                        continue
+                    profiler = TabularProfiler(*sniff_table(sample, filename))
+                    for sample_line in sample:
+                        profiler.add_line(sample_line)
+                    continue
+                profiler.add_line(line)
+            if profiler is None:
+                # Fewer lines than the sniffing sample
+                while sample and not sample[-1]:
+                    sample.pop()
+                if not sample and reader.line_too_long:
+                    return [TextContent(
+                        type="text",
+                        text=f"⚠️ Cannot profile '{filename}' - its first line is over "
+                             f"{PROFILE_MAX_LINE_BYTES // (1024 * 1024)} MB long, so it is not a delimited text file."
+                    )]
+                if not sample:
+                    return [TextContent(type="text", text=f"'{filename}' is empty.")]
+                profiler = TabularProfiler(*sniff_table(sample, filename))
+                for sample_line in sample:
+                    profiler.add_line(sample_line)
+            complete = not reader.exceeded and not reader.line_too_long
+            profiler.flush(final=complete)
+        finally:
+            await response.aclose()
         
+        result = {
+            "kind": "profile",
+            "file_id": file_id,
+            "filename": filename,
+            "rows": profiler.rows,
+            "has_header": profiler.has_header,
+            "total_columns": max(profiler.width, len(profiler.columns)),
+            "delimiter": profiler.delimiter,
+            "encoding": encoding,
+            # Only whole lines count when a long line cut the profile short
+            "bytes_profiled": position if reader.line_too_long else min(reader.bytes_read, PROFILE_MAX_BYTES),
+            "complete": complete,
+            "long_line": line_no + 1 if reader.line_too_long else None,
+            "ragged_rows": profiler.ragged_rows,
+            "malformed_rows": profiler.malformed_rows,
+            "distinct_limit": PROFILE_DISTINCT_LIMIT,
+            "columns": [column.result(top_k) for column in profiler.columns],
+        }
+        return render_result(result, requested_format)
+    
     except httpx.HTTPStatusError as e:
         if e.response.status_code == 404:
             error_msg = f"File not found (ID: {file_id}). Please check the file ID from list_dataset_files."
@@ -1187,17 +4910,531 @@ async def get_dataset_file(arguments: dict) -> list[TextContent]:
         error_msg = f"Network error occurred: {str(e)}"
         return [TextContent(type="text", text=error_msg)]
     except Exception as e:
-        error_msg = f"Unexpected error retrieving file: {str(e)}"
+        error_msg = f"Unexpected error profiling file: {str(e)}"
+        return [TextContent(type="text", text=error_msg)]
+
+# search_in_file: bytes streamed per call and characters of matching lines
+# and context returned before the search stops early. Only the first
+# FILE_SEARCH_MAX_LINE_BYTES of a longer line are searched.
+FILE_SEARCH_MAX_BYTES = _env_int("BOREALIS_SEARCH_MAX_BYTES", 500 * 1024 * 1024)
+FILE_SEARCH_MAX_CHARS = 50000
+FILE_SEARCH_MAX_LINE_BYTES = 1024 * 1024
+
+class MatchCollector:
+    """Group matching lines and their context into hunks as a file streams past.
+
+    Only the last `context` lines are held back for a possible match, so
+    memory is bounded by what gets returned. Lines arrive as bytes and are
+    only decoded once they are kept.
+    """
+
+    def __init__(self, context: int, max_matches: int, max_chars: int):
+        self.context = context
+        self.max_matches = max_matches
+        self.max_chars = max_chars
+        self.before = deque(maxlen=context)
+        self.after = 0  # context lines still owed to the last match
+        self.hunks = []
+        self.matches = 0
+        self.chars = 0
+
+    def add(self, line_no: int, raw_line: bytes, matched: bool) -> None:
+        """Offer the next line and whether it matched.
+
+        Once the limits are reached, later matches only count as context.
+        """
+        if matched and not self.limit_reached:
+            for context_line in self.before:
+                self.append(*context_line)
+            self.before.clear()
+            self.append(line_no, raw_line)
+            self.hunks[-1]["matches"].append(line_no)
+            self.matches += 1
+            self.after = self.context
+        elif self.after:
+            self.append(line_no, raw_line)
+            self.after -= 1
+        elif self.context:
+            self.before.append((line_no, raw_line))
+
+    def append(self, line_no: int, raw_line: bytes) -> None:
+        text = decode_line(raw_line).rstrip("\r")
+        if len(text) > PREVIEW_LINE_CHARS:
+            text = text[:PREVIEW_LINE_CHARS] + " … (line clipped)"
+        self.chars += len(text) + 8
+        hunk = self.hunks[-1] if self.hunks else None
+        if hunk is not None and hunk["start"] + len(hunk["lines"]) == line_no:
+            hunk["lines"].append(text)
+        else:
+            self.hunks.append({"start": line_no, "lines": [text], "matches": []})
+
+    @property
+    def limit_reached(self) -> bool:
+        return self.matches >= self.max_matches or self.chars >= self.max_chars
+
+    @property
+    def full(self) -> bool:
+        """Whether enough has been collected, once the last match has its context."""
+        return self.limit_reached and not self.after
+
+def search_pattern_label(result: dict) -> str:
+    """Describe the pattern searched for, e.g. "`foo` (regular expression, ignoring case)"."""
+    options = [name for name, enabled in (("regular expression", result["regex"]),
+                                           ("ignoring case", result["ignore_case"])) if enabled]
+    return f"`{result['pattern']}`" + (f" ({', '.join(options)})" if options else "")
+
+def search_stop_note(result: dict) -> Optional[str]:
+    """Explain why a search stopped before the end of the file, or None if it didn't."""
+    next_line = result["next_line"]
+    if result["stopped"] == "matches":
+        return f"Stopped after {result['matches']:,} matches. Call again with start_line={next_line} for more."
+    if result["stopped"] == "output":
+        return f"Stopped after {FILE_SEARCH_MAX_CHARS:,} characters of results. Call again with start_line={next_line} for more."
+    if result["stopped"] == "bytes":
+        return (f"Searched {FILE_SEARCH_MAX_BYTES // (1024 * 1024)} MB without reaching the end of the file. "
+                f"Call again with start_line={next_line} to continue.")
+    return None
+
+@renderer("file_search", "markdown")
+def render_file_search_markdown(result: dict) -> str:
+    parts = [f"# Search: {result['filename']}\n\n", f"**File ID:** {result['file_id']}\n",
+             f"**Pattern:** {search_pattern_label(result)}\n"]
+    searched = f"lines {result['start_line']:,}–{result['last_line']:,}"
+    if result["stopped"] is None:
+        searched += " (end of file)" if result["start_line"] > 1 else " (whole file)"
+    parts.append(f"**Matches:** {result['matches']:,} in {searched}\n\n")
+    if not result["hunks"]:
+        parts.append("No matching lines.\n")
+    else:
+        parts.append("Matching lines are marked with `>`.\n\n---\n\n")
+    for idx, hunk in enumerate(result["hunks"]):
+        if idx:
+            parts.append("   ⋮\n")
+        matched = set(hunk["matches"])
+        parts.extend(f"{line_num:4d} {'>' if line_num in matched else '|'} {line}\n"
+                     for line_num, line in enumerate(hunk["lines"], hunk["start"]))
+    note = search_stop_note(result)
+    if note:
+        parts.append(f"\n⚠️ {note}\n")
+    return "".join(parts)
+
+@renderer("file_search", "compact")
+def render_file_search_compact(result: dict) -> str:
+    lines = [f"{result['filename']} (file {result['file_id']}): {result['matches']:,} matches for "
+             f"{search_pattern_label(result)} in lines {result['start_line']:,}-{result['last_line']:,}"]
+    for idx, hunk in enumerate(result["hunks"]):
+        if idx:
+            lines.append("--")
+        matched = set(hunk["matches"])
+        # grep's layout: "12:match" and "11-context"
+        lines.extend(f"{line_num}{':' if line_num in matched else '-'}{line}"
+                     for line_num, line in enumerate(hunk["lines"], hunk["start"]))
+    if result["stopped"] is not None:
+        lines.append(f"(more: start_line={result['next_line']})")
+    return "\n".join(lines) + "\n"
+
+async def search_in_file(arguments: dict) -> list[TextContent]:
+    """Search a text file line by line in one streaming pass.
+
+    Identical concurrent requests share one download and its result.
+    """
+    flight_key = ("search_in_file",) + tuple(
+        str(arguments.get(name, "")) for name in
+        ("file_id", "filename", "pattern", "regex", "ignore_case", "context", "max_matches", "start_line", "format")
+    )
+    return await inflight.do(flight_key, lambda: run_file_search(arguments))
+
+async def run_file_search(arguments: dict) -> list[TextContent]:
+    """Stream a file and collect the lines matching a pattern, with context."""
+    requested_format = output_format(arguments)
+    if requested_format is None:
+        return format_error(arguments)
+    file_id = str(arguments.get("file_id", ""))
+    filename = arguments.get("filename", "file")
+    pattern = str(arguments.get("pattern") or "")
+    use_regex = bool(arguments.get("regex", False))
+    ignore_case = bool(arguments.get("ignore_case", False))
+    context = max(0, min(int(arguments.get("context", 2)), 10))
+    max_matches = max(1, min(int(arguments.get("max_matches", 20)), 200))
+    start_line = max(1, int(arguments.get("start_line", 1)))
+    
+    if not file_id:
+        return [TextContent(
+            type="text",
+            text="Error: No file ID provided. Use list_dataset_files to get file IDs."
+        )]
+    if not pattern:
+        return [TextContent(type="text", text="Error: No pattern provided.")]
+    try:
+        flags = re.IGNORECASE if ignore_case else 0
+        if not use_regex and pattern.isascii():
+            # ASCII text matches the same bytes in UTF-8 and Latin-1, so
+            # lines can be searched without decoding them
+            matcher = re.compile(re.escape(pattern.encode("ascii")), flags)
+        else:
+            matcher = re.compile(pattern if use_regex else re.escape(pattern), flags)
+    except re.error as e:
+        return [TextContent(type="text", text=f"Error: Invalid regular expression: {e}")]
+    filename_lower = filename.lower()
+    if filename_lower.endswith('.docx'):
+        return [TextContent(
+            type="text",
+            text=f"⚠️ Cannot search '{filename}' - only plain text files can be searched. "
+                 f"Use get_dataset_file to read Word documents."
+        )]
+    if any(filename_lower.endswith(ext) for ext in BINARY_EXTENSIONS):
+        return [TextContent(
+            type="text",
+            text=f"⚠️ Cannot search '{filename}' - only plain text files can be searched.\n\n"
+                 f"**Direct download link:** https://borealisdata.ca/api/access/datafile/{file_id}"
+        )]
+    
+    # Start from the nearest known line offset, as get_dataset_file does
+    line_index = line_index_cache.get(file_id) or LineOffsetIndex()
+    if line_index.total_lines is not None and start_line > line_index.total_lines:
+        return [past_end_message(filename, line_index.total_lines, start_line)]
+    first_line, byte_offset = 1, 0
+    if line_index.ranges is not False:
+        first_line, byte_offset = line_index.checkpoint(start_line)
+    
+    try:
+        response = await open_datafile_stream(file_id, byte_offset)
+        try:
+            error = await datafile_error_message(response, filename)
+            if error is not None:
+                return [error]
+            if byte_offset and response.status_code == 416:
+                return [past_end_message(filename, first_line, start_line)]
+            response.raise_for_status()
+            if byte_offset:
+                line_index.ranges = response.status_code == 206
+                if not line_index.ranges:
+                    first_line, byte_offset = 1, 0
+            file_size = response_file_size(response)
+            if file_size is None:
+                file_size = line_index.file_size
+            
+            reader = LineReader(response, FILE_SEARCH_MAX_BYTES, FILE_SEARCH_MAX_LINE_BYTES, clip_long_lines=True)
+            collector = MatchCollector(context, max_matches, FILE_SEARCH_MAX_CHARS)
+            match_bytes = isinstance(matcher.pattern, bytes)
+            line_no = first_line - 1
+            position = byte_offset
+            async for raw_line in reader:
+                line_no += 1
+                line_index.record(line_no, position)
+                position += reader.line_bytes + 1
+                if line_no < start_line:
+                    continue
+                if b"\x00" in raw_line:
+                    download_url = f"https://borealisdata.ca/api/access/datafile/{file_id}"
+                    return [TextContent(
+                        type="text",
+                        text=f"⚠️ Cannot search '{filename}' - File appears to be binary.\n\n"
+                             f"**Direct download link:** {download_url}"
+                    )]
+                subject = raw_line if match_bytes else decode_line(raw_line)
+                collector.add(line_no, raw_line, matcher.search(subject) is not None)
+                if collector.full:
+                    break
+            if reader.finished:
+                line_index.total_lines = line_no
+                if file_size is None and byte_offset == 0:
+                    file_size = reader.bytes_read
+            line_index.file_size = file_size
+            line_index_cache.set(file_id, line_index, line_index.size())
+        finally:
+            await response.aclose()
+        
+        if line_no < start_line:
+            if reader.exceeded:
+                return [TextContent(
+                    type="text",
+                    text=f"Line {start_line:,} of '{filename}' was not reached within "
+                         f"{FILE_SEARCH_MAX_BYTES // (1024 * 1024)} MB (scanned up to line {line_no:,}). "
+                         f"Call again with the same start_line to continue from there."
+                )]
+            return [past_end_message(filename, line_no, start_line)]
+        # Resume after the last counted match: lines shown as context after it
+        # may match too
+        if reader.finished:
+            stopped, next_line = None, None
+        elif collector.full:
+            stopped = "matches" if collector.matches >= max_matches else "output"
+            next_line = collector.hunks[-1]["matches"][-1] + 1
+        else:
+            stopped, next_line = "bytes", line_no + 1
+        result = {
+            "kind": "file_search",
+            "file_id": file_id,
+            "filename": filename,
+            "pattern": pattern,
+            "regex": use_regex,
+            "ignore_case": ignore_case,
+            "start_line": start_line,
+            "last_line": line_no,
+            "total_lines": line_index.total_lines,
+            "file_size": file_size,
+            "matches": collector.matches,
+            "stopped": stopped,
+            "next_line": next_line,
+            "hunks": collector.hunks,
+        }
+        return render_result(result, requested_format)
+    
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 404:
+            error_msg = f"File not found (ID: {file_id}). Please check the file ID from list_dataset_files."
+        elif e.response.status_code == 403:
+            error_msg = f"🔒 Access denied to '{filename}'. This file is restricted and requires special permissions."
+        else:
+            error_msg = f"HTTP error {e.response.status_code} while accessing file."
+        return [TextContent(type="text", text=error_msg)]
+    except httpx.RequestError as e:
+        error_msg = f"Network error occurred: {str(e)}"
+        return [TextContent(type="text", text=error_msg)]
+    except Exception as e:
+        error_msg = f"Unexpected error searching file: {str(e)}"
+        return [TextContent(type="text", text=error_msg)]
+
+def variable_type(variable: dict) -> str:
+    """Describe a DDI variable's type, e.g. "numeric (discrete)"."""
+    kind = {"character": "text"}.get(variable["type"], variable["type"] or "")
+    interval = {"discrete": "discrete", "contin": "continuous"}.get(variable["interval"])
+    if kind == "numeric" and interval:
+        return f"numeric ({interval})"
+    return kind or "unknown"
+
+def format_stat(value) -> str:
+    if isinstance(value, int):
+        return f"{value:,}"
+    if isinstance(value, float):
+        return f"{value:,.0f}" if abs(value) >= 1e6 else f"{value:.6g}"
+    return str(value)
+
+def variable_summary(variable: dict, max_categories: int = 5) -> str:
+    """Describe a variable's statistics and value labels in one line."""
+    stats = variable["stats"]
+    parts = []
+    numbers = [f"{name} {format_stat(stats[key])}" for key, name in
+               (("min", "min"), ("max", "max"), ("mean", "mean"), ("medn", "median"), ("stdev", "sd"))
+               if stats.get(key) is not None]
+    if numbers:
+        parts.append(", ".join(numbers))
+    if variable["categories"]:
+        shown = []
+        for category in variable["categories"][:max_categories]:
+            text = category["value"]
+            if category["label"]:
+                text += f" {category['label']}"
+            if category["count"] is not None:
+                text += f" ({format_stat(category['count'])})"
+            shown.append(text)
+        more = variable["category_count"] - len(shown)
+        parts.append("; ".join(shown) + (f"; … {more:,} more" if more > 0 else ""))
+    return "; ".join(parts)
+
+@renderer("variables", "markdown")
+def render_variables_markdown(result: dict) -> str:
+    variables, offset = result["variables"], result["offset"]
+    parts = [f"# Variables: {result['filename']}\n\n", f"**File ID:** {result['file_id']}\n"]
+    summary = f"**Variables:** {result['total_variables']:,}"
+    if result["rows"] is not None:
+        summary = f"**Rows:** {result['rows']:,} | " + summary
+    if result["filter"]:
+        summary += f" ({result['matching']:,} matching '{result['filter']}')"
+    parts.append(summary + "\n")
+    if not variables:
+        parts.append("\nNo variables match.\n" if result["filter"] else "\nNo variables to show.\n")
+        return "".join(parts)
+    if offset or result["matching"] > offset + len(variables):
+        parts.append(f"**Showing:** {offset + 1:,}–{offset + len(variables):,} of {result['matching']:,}\n")
+    parts.append("\n| # | Name | Label | Type | Valid | Missing | Summary |\n|---|---|---|---|---|---|---|\n")
+    for variable in variables:
+        stats = variable["stats"]
+        cells = [
+            variable["name"], variable["label"], variable_type(variable),
+            format_stat(stats["vald"]) if stats.get("vald") is not None else "",
+            format_stat(stats["invd"]) if stats.get("invd") is not None else "",
+            variable_summary(variable),
+        ]
+        cells = [" ".join(str(cell).split()).replace("|", "\\|") for cell in cells]
+        parts.append(f"| {variable['position']} | " + " | ".join(cells) + " |\n")
+    if result["matching"] > offset + len(variables):
+        parts.append(f"\n*Call again with offset={offset + len(variables)} for more variables.*\n")
+    return "".join(parts)
+
+@renderer("variables", "compact")
+def render_variables_compact(result: dict) -> str:
+    variables, offset = result["variables"], result["offset"]
+    rows = f"{result['rows']:,} rows, " if result["rows"] is not None else ""
+    header = f"{result['filename']} (file {result['file_id']}): {rows}{result['total_variables']:,} variables"
+    if result["filter"]:
+        header += f", {result['matching']:,} matching '{result['filter']}'"
+    if variables and (offset or result["matching"] > offset + len(variables)):
+        header += f", showing {offset + 1:,}-{offset + len(variables):,}"
+    lines = [header]
+    for variable in variables:
+        cells = [str(variable["position"]), variable["name"], variable_type(variable), variable["label"],
+                 variable_summary(variable, max_categories=3)]
+        lines.append("|".join(compact_cell(cell) for cell in cells))
+    if result["matching"] > offset + len(variables):
+        lines.append(f"(more: offset={offset + len(variables)})")
+    return "\n".join(lines) + "\n"
+
+async def describe_file_variables(arguments: dict) -> list[TextContent]:
+    """List an ingested tabular file's variables from its DDI codebook."""
+    requested_format = output_format(arguments)
+    if requested_format is None:
+        return format_error(arguments)
+    file_id = str(arguments.get("file_id", ""))
+    filename = arguments.get("filename", "file")
+    text_filter = str(arguments.get("filter") or "").strip()
+    limit = max(1, min(int(arguments.get("limit", 100)), 1000))
+    offset = max(0, int(arguments.get("offset", 0)))
+    
+    if not file_id:
+        return [TextContent(
+            type="text",
+            text="Error: No file ID provided. Use list_dataset_files to get file IDs."
+        )]
+    
+    try:
+        codebook = await get_ddi_codebook(file_id)
+        if not codebook["variables"]:
+            return [TextContent(
+                type="text",
+                text=f"'{filename}' has no variable metadata: only ingested tabular files have a DDI codebook. "
+                     f"Use profile_tabular_file to summarize a CSV or other delimited file."
+            )]
+        matching = [
+            dict(variable, position=position)
+            for position, variable in enumerate(codebook["variables"], 1)
+            if not text_filter or text_filter.lower() in variable["name"].lower()
+            or text_filter.lower() in variable["label"].lower()
+        ]
+        result = {
+            "kind": "variables",
+            "file_id": file_id,
+            "filename": filename,
+            "rows": codebook["rows"],
+            "total_variables": len(codebook["variables"]),
+            "filter": text_filter,
+            "matching": len(matching),
+            "offset": offset,
+            "variables": matching[offset:offset + limit],
+        }
+        return render_result(result, requested_format)
+    
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 403:
+            error_msg = f"🔒 Access denied to the variable metadata of '{filename}'. This file is restricted."
+        else:
+            error_msg = f"HTTP error {e.response.status_code} while fetching variable metadata."
+        return [TextContent(type="text", text=error_msg)]
+    except httpx.RequestError as e:
+        error_msg = f"Network error occurred: {str(e)}"
+        return [TextContent(type="text", text=error_msg)]
+    except ElementTree.ParseError as e:
+        return [TextContent(type="text", text=f"Could not parse the DDI codebook of '{filename}': {e}")]
+    except Exception as e:
+        error_msg = f"Unexpected error describing file variables: {str(e)}"
         return [TextContent(type="text", text=error_msg)]
 
+async def server_stats(arguments: dict) -> list[TextContent]:
+    """Return runtime metrics as JSON."""
+    return [TextContent(type="text", text=json.dumps(metrics.snapshot(), indent=2))]
+
 async def main():
     """Run the server using stdio transport."""
-    async with stdio_server() as (read_stream, write_stream):
-        await app.run(
-            read_stream,
-            write_stream,
-            app.create_initialization_options()
-        )
+    global _http_client
+    logging.basicConfig(
+        level=os.environ.get("BOREALIS_LOG_LEVEL", "INFO").upper(),
+        stream=sys.stderr,
+        format="%(asctime)s %(name)s %(levelname)s: %(message)s"
+    )
+    # One pooled client for the lifetime of the server process
+    _http_client = create_http_client()
+    metrics_path = os.path.expanduser(METRICS_FILE.replace("{pid}", str(os.getpid()))) if METRICS_FILE else ""
+    writer = asyncio.create_task(metrics_writer(metrics_path, METRICS_INTERVAL)) if metrics_path else None
+    syncer = asyncio.create_task(sync_loop(SYNC_INTERVAL)) if search_index is not None and SYNC_INTERVAL > 0 else None
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await app.run(
+                read_stream,
+                write_stream,
+                app.create_initialization_options()
+            )
+    finally:
+        if syncer is not None:
+            syncer.cancel()
+        if writer is not None:
+            writer.cancel()
+            # Leave the final counts behind
+            try:
+                write_metrics_file(metrics_path, metrics.render_prometheus())
+            except OSError as e:
+                logger.warning("Cannot write metrics file %s: %s", metrics_path, e)
+        if _worker_pool is not None:
+            _worker_pool.shutdown(wait=False, cancel_futures=True)
+        await _http_client.aclose()
+
+async def harvest_cli(targets: list) -> int:
+    """Harvest the given dataverse subtrees into the local index; returns an exit status."""
+    logging.basicConfig(
+        level=os.environ.get("BOREALIS_LOG_LEVEL", "INFO").upper(),
+        stream=sys.stderr,
+        format="%(asctime)s %(name)s %(levelname)s: %(message)s"
+    )
+    if search_index is None:
+        print("Set BOREALIS_INDEX_DIR to the directory for the local search index.", file=sys.stderr)
+        return 1
+    if not targets:
+        print("Usage: borealis_server.py harvest <dataverse> [<dataverse> ...]", file=sys.stderr)
+        return 1
+    status = 0
+    try:
+        for target in targets:
+            # Accept institution names as well as aliases
+            candidates = institution_resolver.resolve(target, limit=1)
+            alias = candidates[0][0] if candidates and candidates[0][1] >= 0.97 else target.strip()
+            started = time.monotonic()
+            try:
+                count = await harvest_subtree(alias)
+            except (httpx.HTTPError, APIStatusError) as e:
+                print(f"Failed to harvest '{alias}': {e}", file=sys.stderr)
+                status = 1
+                continue
+            print(f"Harvested {count} records from '{alias}' in {time.monotonic() - started:.1f}s")
+    finally:
+        await get_http_client().aclose()
+    return status
+
+async def sync_cli(aliases: list) -> int:
+    """Sync the given (or all harvested) subtrees once; returns an exit status."""
+    logging.basicConfig(
+        level=os.environ.get("BOREALIS_LOG_LEVEL", "WARNING").upper(),
+        stream=sys.stderr,
+        format="%(asctime)s %(name)s %(levelname)s: %(message)s"
+    )
+    if search_index is None:
+        print("Set BOREALIS_INDEX_DIR to the directory for the local search index.", file=sys.stderr)
+        return 1
+    if not aliases:
+        aliases = await asyncio.to_thread(search_index.subtree_aliases)
+        if not aliases:
+            print("No subtrees harvested yet; run `borealis_server.py harvest <dataverse>` first.", file=sys.stderr)
+            return 1
+    try:
+        reports = await sync_all_subtrees(aliases)
+    finally:
+        await get_http_client().aclose()
+    for report in reports:
+        print(format_sync_report(report))
+    return 0 if len(reports) == len(aliases) else 1
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "harvest":
+        sys.exit(asyncio.run(harvest_cli(sys.argv[2:])))
+    if len(sys.argv) > 1 and sys.argv[1] == "sync":
+        sys.exit(asyncio.run(sync_cli(sys.argv[2:])))
     asyncio.run(main())
\ No newline at end of file